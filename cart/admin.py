@@ -1,5 +1,17 @@
 from django.contrib import admin
 from .models import *
+from .summary import invalidate_summaries
 # Register your models here.
 
-admin.site.register(GioHang)
\ No newline at end of file
+@admin.register(GioHang)
+class GioHangAdmin(admin.ModelAdmin):
+    # GioHang không có post_delete (cart/signals.py), xóa tóm tắt giỏ hàng của khách khi xóa trong admin
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_summaries(KhachHang.objects.filter(pk=obj.KhachHang_id).values_list('User_id', flat=True))
+
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list('KhachHang__User_id', flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_summaries(user_ids)
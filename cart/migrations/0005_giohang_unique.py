@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:23
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def gop_dong_trung(apps, schema_editor):
+    # Gộp các dòng trùng (khách hàng, sản phẩm) do bấm đúp trước đây vào dòng cũ nhất, cộng số lượng
+    GioHang = apps.get_model('cart', 'GioHang')
+    duplicates = GioHang.objects.values('KhachHang_id', 'SanPham_id').annotate(so_dong=Count('id'), dau_tien=Min('id'), tong=Sum('SoLuong')).filter(so_dong__gt=1)
+    for row in duplicates.iterator():
+        lines = GioHang.objects.filter(KhachHang_id=row['KhachHang_id'], SanPham_id=row['SanPham_id'])
+        lines.filter(id=row['dau_tien']).update(SoLuong=row['tong'])
+        lines.exclude(id=row['dau_tien']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_alter_giohang_khachhang'),
+        ('customer', '0005_khachhang_hotenkhongdau'),
+        ('product', '0012_sanphamhienthi_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(gop_dong_trung, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='giohang',
+            constraint=models.UniqueConstraint(fields=('KhachHang', 'SanPham'), name='giohang_khachhang_sanpham_unique'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from customer.models import KhachHang
 from product.models import MauSac, SanPham
 # Create your models here.  
@@ -15,12 +16,39 @@ class GioHang(models.Model):
     class Meta:
         verbose_name = "Giỏ Hàng"
         verbose_name_plural = "Giỏ Hàng"
+        constraints = [
+            # Mỗi sản phẩm chỉ một dòng trong giỏ của khách hàng, thêm lại thì cộng số lượng (GioHang.them)
+            models.UniqueConstraint(fields=['KhachHang', 'SanPham'], name='giohang_khachhang_sanpham_unique'),
+        ]
     
     def save(self, *args, **kwargs):
         self.TenSanPham = self.SanPham.TenSanPham
         self.MoTaNgan = self.SanPham.MoTaNgan
         self.GiaBan = self.SanPham.GiaBan
         super(GioHang, self).save(*args, **kwargs)
+
+    @classmethod
+    def them(cls, khachhang_id, sanpham, soluong, mausac_id=None):
+        """
+        Thêm sản phẩm vào giỏ, đã có thì cộng số lượng. Trả về False nếu sản phẩm đã có
+        trong giỏ với màu khác (mỗi sản phẩm một dòng, không đổi màu của số lượng đã thêm);
+        dòng chưa chọn màu (thêm qua GET) thì nhận màu vừa chọn.
+        Dòng đã có chỉ tốn một UPDATE ... SET SoLuong = SoLuong + n; hai request cùng lúc
+        (bấm đúp) không tạo hai dòng nhờ ràng buộc unique, bên thua quay lại UPDATE.
+        """
+        changes = {'SoLuong': F('SoLuong') + soluong}
+        lines = cls.objects.filter(KhachHang_id=khachhang_id, SanPham=sanpham)
+        if mausac_id is not None:
+            changes['MauSac_id'] = mausac_id
+            lines = lines.filter(Q(MauSac_id=mausac_id) | Q(MauSac__isnull=True))
+        if lines.update(**changes) == 0:
+            try:
+                with transaction.atomic():
+                    cls(KhachHang_id=khachhang_id, SanPham=sanpham, SoLuong=soluong, MauSac_id=mausac_id).save()
+            except IntegrityError:
+                # Dòng vừa được tạo cùng lúc; không khớp màu thì là sản phẩm đã có với màu khác
+                return lines.update(**changes) > 0
+        return True
     
         
     def __str__(self):
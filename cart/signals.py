@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from customer.models import KhachHang
+from product.models import MauSac, SanPham
+from .models import GioHang
+from .summary import invalidate_summaries
+
+# Xóa tóm tắt giỏ hàng đã cache (cart/summary.py) khi dữ liệu của nó thay đổi.
+# Không nối post_delete cho GioHang để giohang.delete() lúc đặt hàng vẫn là một câu DELETE (fast delete);
+# nơi xóa giỏ hàng tự gọi invalidate_summaries. Dòng giỏ hàng bị xóa theo CASCADE khi xóa SanPham/MauSac
+# được xử lý qua signal xóa của SanPham/MauSac (hai model này vốn đã phát signal từng dòng).
+
+
+@receiver(post_save, sender=GioHang)
+def summary_on_cart_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_summaries(KhachHang.objects.filter(pk=instance.KhachHang_id).values_list('User_id', flat=True))
+
+
+@receiver(post_save, sender=SanPham)
+def summary_on_product_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_summaries(GioHang.objects.filter(SanPham_id=instance.pk).values_list('KhachHang__User_id', flat=True))
+
+
+@receiver(pre_delete, sender=SanPham)
+@receiver(pre_delete, sender=MauSac)
+def summary_before_cascade_delete(sender, instance, **kwargs):
+    # Ghi lại người dùng có dòng giỏ hàng sắp bị xóa theo CASCADE, xóa tóm tắt sau khi xóa xong
+    instance._giohang_user_ids = list(GioHang.objects.filter(**{sender.__name__: instance}).values_list('KhachHang__User_id', flat=True))
+
+
+@receiver(post_delete, sender=SanPham)
+@receiver(post_delete, sender=MauSac)
+def summary_on_cascade_delete(sender, instance, **kwargs):
+    invalidate_summaries(getattr(instance, '_giohang_user_ids', []))
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from .models import GioHang, SanPham
+
+# Tóm tắt giỏ hàng cho header / giỏ hàng mini (số dòng, tổng tiền, vài dòng đầu), cache theo từng người dùng.
+# Khóa theo User.id nên lúc đọc không cần truy vấn KhachHang hay GioHang; cart/signals.py xóa khóa
+# khi GioHang được lưu/xóa hoặc khi sản phẩm trong giỏ đổi tên, ảnh, đường dẫn.
+
+SUMMARY_TIMEOUT = 60 * 60 * 24
+
+# Số dòng hiển thị trong giỏ hàng mini
+MINI_CART_LINES = 5
+
+LINE_FIELDS = ('id', 'TenSanPham', 'SoLuong', 'GiaBan', 'SanPham__DuongDan', 'SanPham__AnhChinh')
+
+
+def summary_key(user_id):
+    return 'gio_hang:%s' % user_id
+
+
+def build_summary(user_id):
+    rows = list(GioHang.objects.filter(KhachHang__User_id=user_id).order_by('id').values_list(*LINE_FIELDS))
+    storage = SanPham._meta.get_field('AnhChinh').storage
+    lines = [{
+        'id': id, 'TenSanPham': ten, 'SoLuong': soluong, 'GiaBan': giaban,
+        'DuongDan': duongdan, 'AnhChinh': storage.url(anh) if anh else '',
+    } for id, ten, soluong, giaban, duongdan, anh in rows[:MINI_CART_LINES]]
+    return {
+        'count': len(rows),
+        'total': sum(soluong * (giaban or 0) for _, _, soluong, giaban, _, _ in rows),
+        'lines': lines,
+    }
+
+
+def cart_summary(user_id):
+    """{'count': số dòng, 'total': tổng tiền, 'lines': MINI_CART_LINES dòng đầu} của giỏ hàng người dùng."""
+    key = summary_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_summary(user_id)
+        cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_summaries(user_ids):
+    keys = [summary_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        cache.delete_many(keys)
@@ -1,5 +1,6 @@
 import pytest
 import tempfile
+from django.db import connection
 from django.urls import reverse
 
 from django.core.files import File
@@ -69,8 +70,8 @@ def test_CART001(client, setup_data):
     assert response.context['giohang'].count() == 1
     assert response.context['mausac'].count() == 1
     assert response.context['thanhtoan'] == 135000
-    assert response.context['phiship'] == "30000"
-    assert response.context['phivat'] == "5"
+    assert response.context['phiship'] == 30000
+    assert response.context['phivat'] == 5
     assert response.context['total_price'] == 100000
     assert response.context['giohang'][0].SoLuong == 2
 
@@ -91,8 +92,8 @@ def test_CART002(client, setup_data):
     assert response.context['giohang'].count() == 0  
     assert response.context['mausac'].count() > 0  
     assert response.context['thanhtoan'] == 0  
-    assert response.context['phiship'] == "30000"
-    assert response.context['phivat'] == "5"  
+    assert response.context['phiship'] == 30000
+    assert response.context['phivat'] == 5  
     assert response.context['total_price'] == 0  
 
 # CART003 
@@ -194,7 +195,10 @@ def test_CART008(client, setup_data):
     }, **{'HTTP_HOST': 'testserver'})
 
     # Kiểm tra mã trạng thái HTTP
-    assert response.json() == {"success": "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"}
+    assert response.json()["success"] == "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"
+    # Trả kèm tóm tắt giỏ hàng mới
+    assert response.json()["giohang"]["count"] == 1
+    assert response.json()["giohang"]["total"] == 50000
 
     # Kiểm tra sản phẩm đã được thêm vào giỏ hàng
     giohang = GioHang.objects.filter(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'])
@@ -275,7 +279,7 @@ def test_CART012(client, setup_data):
 # CART013
 @pytest.mark.django_db
 def test_CART013(client, setup_data):
-    """CART013: Kiểm tra lỗi khi sản phẩm đã có trong giỏ qua POST"""
+    """CART013: Kiểm tra cộng số lượng khi sản phẩm đã có trong giỏ qua POST"""
     
     # Tạo giỏ hàng với sản phẩm đã có
     GioHang.objects.create(
@@ -295,8 +299,12 @@ def test_CART013(client, setup_data):
         'soluong': 1
     }, **{'HTTP_HOST': 'testserver'})
 
-    # Kiểm tra mã trạng thái HTTP
-    assert response.json() == {"error": "Sản Phẩm Đã Có Trong Giỏ Hàng!"}
+    # Kiểm tra không tạo dòng mới mà cộng số lượng vào dòng đã có
+    assert response.json()["success"] == "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"
+    assert response.json()["giohang"]["total"] == 100000
+    giohang = GioHang.objects.filter(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'])
+    assert giohang.count() == 1
+    assert giohang.first().SoLuong == 2
 
 # CART014
 @pytest.mark.django_db
@@ -312,7 +320,7 @@ def test_CART014(client, setup_data):
     }, **{'HTTP_HOST': 'testserver'})
 
     # Kiểm tra mã trạng thái HTTP
-    assert response.json() == {"success": "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"}
+    assert response.json()["success"] == "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"
 
     # Kiểm tra sản phẩm đã được thêm vào giỏ hàng
     giohang = GioHang.objects.filter(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'])
@@ -351,7 +359,7 @@ def test_CART016(client, setup_data):
 # CART017
 @pytest.mark.django_db
 def test_CART017(client, setup_data):
-    """CART017: Kiểm tra lỗi khi sản phẩm đã có trong giỏ qua GET"""
+    """CART017: Kiểm tra cộng số lượng khi sản phẩm đã có trong giỏ qua GET"""
     
     # Tạo giỏ hàng với sản phẩm đã có
     GioHang.objects.create(
@@ -369,8 +377,13 @@ def test_CART017(client, setup_data):
         'masanpham': setup_data['sanpham'].id
     }, **{'HTTP_HOST': 'testserver'})
 
-    # Kiểm tra mã trạng thái HTTP
-    assert response.json() == {"error": "Sản Phẩm Đã Có Trong Giỏ Hàng!"}
+    # Kiểm tra không tạo dòng mới mà cộng số lượng vào dòng đã có
+    assert response.json()["success"] == "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"
+    assert response.json()["giohang"]["total"] == 100000
+    giohang = GioHang.objects.filter(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'])
+    assert giohang.count() == 1
+    assert giohang.first().SoLuong == 2
+    assert giohang.first().MauSac == setup_data['mausac']
 
 # CART018
 @pytest.mark.django_db
@@ -704,4 +717,59 @@ def test_CART041(client, setup_data):
     """CART041: Kiểm tra chuyển hướng khi không phải POST."""
     client.force_login(setup_data['user'])
     response = client.get(reverse('check_property_product'), **{'HTTP_HOST': 'testserver'})
-    assert response.url == reverse('cart_list')
\ No newline at end of file
+    assert response.url == reverse('cart_list')
+# CART042
+@pytest.mark.skipif(connection.vendor == 'sqlite', reason="SQLite khóa cả database khi ghi, request song song có thể báo 'database is locked'")
+@pytest.mark.django_db(transaction=True)
+def test_CART042(setup_data):
+    """CART042: Nhiều request thêm cùng sản phẩm cùng lúc (bấm đúp) đều thành công, chỉ tạo một dòng và không mất lần thêm nào."""
+    from concurrent.futures import ThreadPoolExecutor
+    from django.test import Client
+
+    # Đăng nhập một lần, các luồng dùng chung cookie session (không ghi session trong lúc chạy song song)
+    login = Client()
+    login.force_login(setup_data['user'])
+
+    def add(_):
+        client = Client()
+        client.cookies = login.cookies
+        try:
+            return client.post(reverse('add_product_cart'), {
+                'masanpham': setup_data['sanpham'].id,
+                'mausac': setup_data['mausac'].id,
+                'soluong': 1
+            }, **{'HTTP_HOST': 'testserver'}).json()
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(add, range(16)))
+
+    assert all("success" in result for result in results)
+    giohang = GioHang.objects.filter(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'])
+    assert giohang.count() == 1
+    assert giohang.first().SoLuong == len(results)
+
+# CART043
+@pytest.mark.django_db
+def test_CART043(client, setup_data):
+    """CART043: Thêm sản phẩm đã có trong giỏ với màu khác bị từ chối, dòng cũ giữ nguyên màu và số lượng."""
+    GioHang.objects.create(
+        KhachHang=setup_data['khachhang'],
+        SanPham=setup_data['sanpham'],
+        SoLuong=1,
+        MauSac=setup_data['mausac']
+    )
+    mausac_khac = MauSac.objects.create(id=2, TenMauSac='Blue', MaMauSac='#0000FF')
+    client.force_login(setup_data['user'])
+
+    response = client.post(reverse('add_product_cart'), {
+        'masanpham': setup_data['sanpham'].id,
+        'mausac': mausac_khac.id,
+        'soluong': 1
+    }, **{'HTTP_HOST': 'testserver'})
+
+    assert response.json() == {"error": "Sản Phẩm Đã Có Trong Giỏ Hàng Với Màu Khác!"}
+    giohang = GioHang.objects.get(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'])
+    assert giohang.SoLuong == 1
+    assert giohang.MauSac == setup_data['mausac']
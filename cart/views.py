@@ -1,10 +1,12 @@
 from django.shortcuts import render, redirect, HttpResponse
 from django.http import JsonResponse
 from django.views import View
-from django.contrib.auth.models import User
 from customer.models import KhachHang
 from .models import *
 from website.models import *
+from website.config import config
+from order import pricing
+from .summary import cart_summary, invalidate_summaries
 # Create your views here.
 
 template_error = '404error.html'
@@ -15,22 +17,16 @@ class CartList(View):
     template_name = 'cart/list.html'
 
     def get(self, request):
-        user = User.objects.all().get(id=request.user.id)
-        khachhang = KhachHang.objects.all().get(User=user)
+        khachhang = request.khachhang
         giohang = GioHang.objects.all().filter(KhachHang=khachhang)
         mausac = MauSac.objects.all()
-        total_price = 0
-    
-        for item in giohang:
-            total_price += item.SoLuong * item.GiaBan
-        
-        loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phiship")
-        phiship = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
         
-        loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phivat")
-        phivat = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
+        phiship = config.integer("phiship")
+        phivat = config.integer("phivat")
         
-        thanhtoan = int(total_price + total_price * int(phivat) / 100 + int(phiship))
+        tien = pricing.totals(giohang, phivat, phiship)
+        total_price = tien.subtotal
+        thanhtoan = tien.total
         
         data = {"title": "Giỏ hàng", "giohang": giohang, "mausac": mausac, "thanhtoan": thanhtoan, "phiship": phiship, "phivat": phivat, "total_price": total_price}
         return render(request, self.template_name, data)
@@ -45,10 +41,9 @@ def AddProductToCart(request):
             masanpham = int(request.POST['masanpham'])
             mamausac = request.POST['mausac']
             soluong = request.POST['soluong']
-            sanpham = SanPham.objects.all().get(id=masanpham)
-            mausac = MauSac.objects.all().get(id=mamausac)
-            user = User.objects.all().get(id=request.user.id)
-            khachhang = KhachHang.objects.all().get(User=user)
+            sanpham = SanPham.objects.only('TenSanPham', 'MoTaNgan', 'GiaBan').get(id=masanpham)
+            if not MauSac.objects.filter(id=mamausac).exists():
+                raise MauSac.DoesNotExist
             
             if int(soluong) <= 0 or soluong == "":
                 return JsonResponse({"error": "Số Lượng Sản Phẩm Phải Lớn Hơn 0!"})
@@ -56,35 +51,27 @@ def AddProductToCart(request):
             if int(mamausac) == 0 or mamausac == "":
                 return JsonResponse({"error": "Vui Lòng Chọn Màu Sắc!"})
             
-            
-            count_giohang = GioHang.objects.all().filter(KhachHang=khachhang, SanPham=sanpham).count()
-            
-            if count_giohang == 1:
-                return JsonResponse({"error": "Sản Phẩm Đã Có Trong Giỏ Hàng!"})
-            elif count_giohang == 0:
-                cart = GioHang(KhachHang=khachhang, SanPham=sanpham, SoLuong=soluong, MauSac=mausac)
-                cart.save()
-                return JsonResponse({"success": "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"})
+            # Đã có trong giỏ cùng màu thì cộng thêm số lượng
+            if not GioHang.them(request.khachhang.pk, sanpham, int(soluong), int(mamausac)):
+                return JsonResponse({"error": "Sản Phẩm Đã Có Trong Giỏ Hàng Với Màu Khác!"})
+            return cart_added(request)
         except:
             return JsonResponse({"error": "Có Lỗi Khi Thêm Sản Phẩm Vào Giỏ Hàng!"})
 
     elif request.method == "GET":
         try:
             masanpham = int(request.GET.get('masanpham'))
-            sanpham = SanPham.objects.all().get(id=masanpham)
-            user = User.objects.all().get(id=request.user.id)
-            khachhang = KhachHang.objects.all().get(User=user)
-            count_giohang = GioHang.objects.all().filter(KhachHang=khachhang, SanPham=sanpham).count()
-            
-            if count_giohang == 1:
-                return JsonResponse({"error": "Sản Phẩm Đã Có Trong Giỏ Hàng!"})
-            elif count_giohang == 0:
-                cart = GioHang(KhachHang=khachhang, SanPham=sanpham)
-                cart.save()
-                return JsonResponse({"success": "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!"})
+            sanpham = SanPham.objects.only('TenSanPham', 'MoTaNgan', 'GiaBan').get(id=masanpham)
+            GioHang.them(request.khachhang.pk, sanpham, 1)
+            return cart_added(request)
         except:
             return JsonResponse({"error": "Có Lỗi Khi Thêm Sản Phẩm Vào Giỏ Hàng!"})
 
+def cart_added(request):
+    # UPDATE cộng số lượng không phát post_save, tự xóa tóm tắt cũ rồi trả tóm tắt mới cho giỏ hàng mini
+    invalidate_summaries([request.user.id])
+    return JsonResponse({"success": "Thêm Sản Phẩm Vào Giỏ Hàng Thành Công!", "giohang": cart_summary(request.user.id)})
+
 def UpdateNumberToCart(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Vui Lòng Đăng Nhập!"})
@@ -139,6 +126,7 @@ def DeleteProductToCart(request, id):
     try:
         giohang = GioHang.objects.all().get(id=id)
         giohang.delete()
+        invalidate_summaries([request.user.id])
         return redirect('cart_list')
     except:
         return JsonResponse({"error": "Có Lỗi Khi Xóa Sản Phẩm!"})
@@ -149,8 +137,7 @@ def CheckPropertyProduct(request):
     
     if request.method == "POST":
         try:
-            user = User.objects.all().get(id=request.user.id)
-            khachhang = KhachHang.objects.all().get(User=user)
+            khachhang = request.khachhang
             giohang = GioHang.objects.all().filter(KhachHang=khachhang, MauSac=None)
             
             if giohang.count() >= 1:
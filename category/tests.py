@@ -225,4 +225,27 @@ def test_detail_category_invalid_slug(client, detail_category_data):
 #     assert response.status_code == 200
 #     assert response.templates[0].name == 'category/product.html'
 #     assert len(response.context['sanpham']) == 12
-#     assert response.context['page'] == 1
\ No newline at end of file
+#     assert response.context['page'] == 1
+# Test Case 16
+def test_detail_category_conditional_get(client, detail_category_data):
+    """
+    Mục tiêu: Trang chuyên mục trả 304 khi ETag khớp, kể cả khi trang lấy từ cache cả trang.
+    Input: GET trang chuyên mục, gửi lại ETag (lần này trang đã được cache), sau đó sửa một sản phẩm.
+    Expected Output: 304 khi chưa đổi gì, 200 với ETag mới sau khi sản phẩm thay đổi.
+    """
+    url = reverse('detail_category', kwargs={'slug': detail_category_data.DuongDan})
+    response = client.get(url, {'sap_xep': 'giam'}, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    response = client.get(url, {'sap_xep': 'giam'}, HTTP_HOST='localhost', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['X-Page-Cache'] == 'HIT'
+    assert client.get(url, {'sap_xep': 'tang'}, HTTP_HOST='localhost', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    sanpham = SanPham.objects.get(id=3)
+    sanpham.GiaBan = 1
+    sanpham.save()
+    response = client.get(url, {'sap_xep': 'giam'}, HTTP_HOST='localhost', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
@@ -1,6 +1,29 @@
 # conftest.py
+import pytest
+from django.core.cache import caches
+from django.db import transaction
+
 pytest_plugins = ['pytest_django']
 
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Dữ liệu DB được rollback sau mỗi test nhưng cache thì không
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def run_on_commit_immediately(request, monkeypatch):
+    # Test django_db thường chạy trong một transaction không bao giờ commit nên transaction.on_commit
+    # (tăng phiên bản cache, cập nhật chỉ mục) không chạy; cho chạy ngay như khi ghi ngoài transaction.
+    # Test django_db(transaction=True) giữ nguyên on_commit thật.
+    marker = request.node.get_closest_marker('django_db')
+    transactional = (marker is not None and marker.kwargs.get('transaction')) or 'transactional_db' in request.fixturenames
+    if not transactional:
+        monkeypatch.setattr(transaction, 'on_commit', lambda func, using=None, robust=False: func())
+
 # conftest.py
 # import pytest
 # from django.conf import settings
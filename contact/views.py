@@ -1,6 +1,5 @@
 from django.shortcuts import render
 from django.views import View
-from django.contrib.auth.models import User 
 from customer.models import *
 from .models import *
 import re
@@ -15,8 +14,7 @@ class Contact(View):
     def get(self, request):
         try:
             if(request.user.is_authenticated):
-                user = User.objects.all().get(username=request.user.username)
-                khachhang = KhachHang.objects.all().get(User=user)
+                khachhang = request.khachhang
                 data = {"title": "Phản Hồi Với Chúng Tôi", "khachhang": khachhang}
                 return render(request, self.template_name, data)
             else:
@@ -52,8 +50,7 @@ class Contact(View):
             lienhe.save()
             
             if(request.user.is_authenticated):
-                user = User.objects.all().get(username=request.user.username)
-                khachhang = KhachHang.objects.all().get(User=user)
+                khachhang = request.khachhang
                 data = {"title": "Phản Hồi Với Chúng Tôi", "khachhang": khachhang, "success": "Cảm ơn bạn đã gửi phản hồi!"}
                 return render(request, self.template_name, data)
             else:
@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
 from .models import KhachHang
+from website.admin import FoldedSearchMixin
 
 @admin.register(KhachHang)
-class KhachHangAdmin(admin.ModelAdmin):
+class KhachHangAdmin(FoldedSearchMixin, admin.ModelAdmin):
     list_display = ('id', 'get_username', 'get_first_name', 'get_last_name', 'get_so_dien_thoai', 'get_dia_chi', 'get_gioi_tinh')
-    search_fields = ('User__first_name', 'User__last_name', 'SoDienThoai')
+    # Họ tên (tìm theo họ đệm) và tên riêng, cùng tìm theo đầu chuỗi để dùng index
+    search_fields = ('^HoTenKhongDau', '^TenKhongDau', 'SoDienThoai')
     list_filter = ('GioiTinh', 'SoDienThoai', 'DiaChi')
     list_per_page = 10
 
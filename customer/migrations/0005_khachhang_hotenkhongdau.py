@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:29
+
+from django.db import migrations, models
+from website.text import fold_text
+
+
+def populate_hotenkhongdau(apps, schema_editor):
+    KhachHang = apps.get_model('customer', 'KhachHang')
+    for obj in KhachHang.objects.select_related('User').all().iterator():
+        obj.HoTenKhongDau = fold_text(obj.User.first_name + " " + obj.User.last_name)
+        obj.save(update_fields=['HoTenKhongDau'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0004_alter_khachhang_diachi_alter_khachhang_sodienthoai'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='khachhang',
+            name='HoTenKhongDau',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_hotenkhongdau, migrations.RunPython.noop),
+    ]
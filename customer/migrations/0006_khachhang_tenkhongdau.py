@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:03
+
+from django.db import migrations, models
+from website.text import fold_text
+
+
+def populate_tenkhongdau(apps, schema_editor):
+    KhachHang = apps.get_model('customer', 'KhachHang')
+    for obj in KhachHang.objects.select_related('User').all().iterator():
+        obj.TenKhongDau = fold_text(obj.User.last_name)
+        obj.save(update_fields=['TenKhongDau'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0005_khachhang_hotenkhongdau'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='khachhang',
+            name='TenKhongDau',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(populate_tenkhongdau, migrations.RunPython.noop),
+    ]
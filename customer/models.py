@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.text import slugify 
+from website.text import fold_text
 
 class KhachHang(models.Model):
     User = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -8,6 +9,8 @@ class KhachHang(models.Model):
     DiaChi = models.CharField(max_length=500, null=True, blank=True)
     GioiTinh = models.CharField(max_length=10, choices=[('1', 'Nam'), (0, "Nữ")])
     DuongDan = models.SlugField(blank=True, null=True)
+    HoTenKhongDau = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)  # Họ tên bỏ dấu, chữ thường để tìm kiếm
+    TenKhongDau = models.CharField(max_length=150, blank=True, default='', db_index=True, editable=False)  # Tên (last_name) bỏ dấu, để tìm theo tên
     
     class Meta:
         verbose_name = "Khách Hàng"
@@ -15,6 +18,8 @@ class KhachHang(models.Model):
 
     def save(self, *args, **kwargs):
         self.DuongDan = slugify(self.User.first_name + " " + self.User.last_name + " " + str(self.User.id))
+        self.HoTenKhongDau = fold_text(self.User.first_name + " " + self.User.last_name)
+        self.TenKhongDau = fold_text(self.User.last_name)
         super(KhachHang, self).save(*args, **kwargs)
     
     def __str__(self):
@@ -0,0 +1,13 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from website.text import fold_text
+from .models import KhachHang
+
+
+@receiver(post_save, sender=User)
+def sync_hotenkhongdau(sender, instance, raw=False, **kwargs):
+    # Họ tên nằm ở User nên sửa User (ví dụ trong admin) cũng phải cập nhật cột không dấu
+    if not raw:
+        KhachHang.objects.filter(User=instance).update(HoTenKhongDau=fold_text(instance.first_name + " " + instance.last_name),
+                                                       TenKhongDau=fold_text(instance.last_name))
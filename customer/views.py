@@ -4,8 +4,9 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.views import View
 from order.models import DonHang, ChiTietDonHang
+from order import pricing
 from .models import *
-from website.models import LoaiThongTin, ThongTin
+from website.config import config
 from django.contrib.auth import update_session_auth_hash
 import re
 # Create your views here.
@@ -17,8 +18,8 @@ class Customer(View):
 
     def get(self, request):
         try:
-            user = User.objects.all().get(username=request.user.username)
-            khachhang = KhachHang.objects.all().get(User=user)
+            khachhang = request.khachhang
+            user = khachhang.User
 
             donhang = DonHang.objects.all().filter(KhachHang = khachhang).order_by("-id")
 
@@ -32,8 +33,8 @@ class Customer(View):
         
     def post(self, request):
         try:
-            user = User.objects.all().get(username=request.user.username)
-            khachhang = KhachHang.objects.all().get(User=user)
+            khachhang = request.khachhang
+            user = khachhang.User
 
             donhang = DonHang.objects.all().filter(KhachHang = khachhang).order_by("-id")
 
@@ -83,9 +84,6 @@ class Customer(View):
 
             user.save()
             khachhang.save()
-            
-            user = User.objects.all().get(username=request.user.username)
-            khachhang = KhachHang.objects.all().get(User=user)
 
             donhang = DonHang.objects.all().filter(KhachHang = khachhang).order_by("-id")
 
@@ -115,22 +113,15 @@ class CustomerOrderDetail(View):
 
     def get(self, request, id):
         try:
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phiship")
-            phiship = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
-
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phivat")
-            phivat = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
+            phiship = config.integer("phiship")
+            phivat = config.integer("phivat")
 
             donhang = DonHang.objects.all().get(pk=id)
-            chitietdonhang = ChiTietDonHang.objects.all().filter(DonHang=donhang)
-
-            total_price = 0
-    
-            for item in chitietdonhang:
-                total_price += item.SoLuong * item.GiaBan
-                item.GiaTien = item.GiaBan * item.SoLuong
+            chitietdonhang = pricing.with_line_totals(ChiTietDonHang.objects.all().filter(DonHang=donhang))
 
-            thanhtoan = int(total_price + total_price * int(phivat) / 100 + int(phiship))
+            tien = pricing.totals(chitietdonhang, phivat, phiship)
+            total_price = tien.subtotal
+            thanhtoan = tien.total
 
             data = {"title": "Thông Tin Đơn Hàng ĐH000" + str(id), "chitietdonhang": chitietdonhang, "madon": id, "phiship": phiship, "phivat": phivat, "thanhtoan": thanhtoan, "tongdon": total_price}
             return render(request, self.template_name, data)
@@ -140,8 +131,7 @@ class CustomerOrderDetail(View):
 class CustomerOrderCancel(View):
     def get(self, request, id):
         try:
-            user = User.objects.all().get(username=request.user.username)
-            khachhang = KhachHang.objects.all().get(User=user)
+            khachhang = request.khachhang
 
             don_hang = DonHang.objects.get(id=id,KhachHang=khachhang)
             don_hang.TrangThai = "khh"
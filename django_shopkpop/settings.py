@@ -46,18 +46,24 @@ INSTALLED_APPS = [
     'contact',
     'category',
     'cart',
-    'order'
+    'order',
+    'search'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'website.middleware.CachePolicyMiddleware',
+    # Trước SessionMiddleware: trang cache dùng chung không cần session, và khi CSDL lỗi bản cũ vẫn được trả
+    # cho người đã đăng nhập (nạp session/user cũng là truy vấn CSDL)
+    'website.middleware.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'website.middleware.KhachHangMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'website.middleware.AuthMiddleware'
+    'website.middleware.AuthMiddleware',
 ]
 
 ROOT_URLCONF = 'django_shopkpop.urls'
@@ -76,7 +82,6 @@ TEMPLATES = [
                 'website.context_processors.category_context_processor',
                 'website.context_processors.nhataitro_context_processor',
                 'website.context_processors.thongtin_context_processor',
-                'website.context_processors.giohang_context_processor',
                 'website.context_processors.base_url',
 
             ],
@@ -112,6 +117,49 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# LocMemCache chỉ dùng được trong một tiến trình, khi chạy nhiều worker nên đổi sang Redis/Memcached
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Bản render tốt gần nhất của các trang chính, riêng từng tiến trình (website/pagecache.py)
+    'fallback': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fallback',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Cache cả trang dùng chung cho mọi người xem (website/pagecache.py), thời gian tính bằng giây
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_FALLBACK_CACHE = 'fallback'
+PAGE_OUTAGE_SECONDS = 30  # sau khi gặp lỗi CSDL, trả bản dự phòng luôn trong khoảng thời gian này
+
+# Cache-Control theo tên URL (website/cachepolicy.py), thời gian tính bằng giây.
+# Trang danh sách/chi tiết không phụ thuộc session (phần riêng nạp qua personal_fragments) nên không Vary: Cookie.
+_TRANG_DANH_SACH = {'max_age': 60, 's_maxage': 300, 'stale_while_revalidate': 600}
+_TRANG_CHI_TIET = {'max_age': 0, 's_maxage': 300, 'stale_while_revalidate': 600}  # trình duyệt luôn hỏi lại bằng ETag
+CACHE_POLICIES = {
+    'home': _TRANG_DANH_SACH,
+    'product': _TRANG_DANH_SACH,
+    'category': _TRANG_DANH_SACH,
+    'detail_category': _TRANG_DANH_SACH,
+    'list_news': _TRANG_DANH_SACH,
+    'detail_product': _TRANG_CHI_TIET,
+    'detail_news': _TRANG_CHI_TIET,
+    'media': {'max_age': 60 * 60 * 24 * 7, 's_maxage': 60 * 60 * 24 * 30},
+    'cart_list': {'private': True, 'vary_cookie': True},
+    'customer': {'private': True, 'vary_cookie': True},
+}
+
+# Lọc/sắp xếp danh sách sản phẩm trong bộ nhớ bằng numpy (product/engine.py), cần cài numpy
+CATALOG_IN_MEMORY = False
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
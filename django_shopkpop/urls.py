@@ -13,5 +13,6 @@ urlpatterns = [
     path('khach-hang/', include('customer.urls')),
     path('gio-hang/', include('cart.urls')),
     path('dat-hang/', include('order.urls')),
+    path('tim-kiem/', include('search.urls')),
     path('ckeditor/', include('ckeditor_uploader.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
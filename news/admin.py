@@ -2,8 +2,10 @@ from django.contrib import admin
 from .models import TinTuc
 from ckeditor.widgets import CKEditorWidget
 from django.db import models
+from website.admin import FoldedSearchMixin
 
-class TinTucAdmin(admin.ModelAdmin):
+class TinTucAdmin(FoldedSearchMixin, admin.ModelAdmin):
+    search_fields = ('^TieuDeKhongDau',)
     formfield_overrides = {
         models.TextField: {'widget': CKEditorWidget}
     }
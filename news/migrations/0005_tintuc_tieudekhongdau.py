@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:29
+
+from django.db import migrations, models
+from website.text import fold_text
+
+
+def populate_tieudekhongdau(apps, schema_editor):
+    TinTuc = apps.get_model('news', 'TinTuc')
+    for obj in TinTuc.objects.all().iterator():
+        obj.TieuDeKhongDau = fold_text(obj.TieuDe)
+        obj.save(update_fields=['TieuDeKhongDau'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_alter_tintuc_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tintuc',
+            name='TieuDeKhongDau',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(populate_tieudekhongdau, migrations.RunPython.noop),
+    ]
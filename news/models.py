@@ -1,11 +1,13 @@
 from django.db import models
 from ckeditor.fields import RichTextField
 from django.utils.text import slugify 
+from website.text import fold_text
 
 
 # Create your models here.
 class TinTuc(models.Model):
     TieuDe = models.CharField(max_length=500)
+    TieuDeKhongDau = models.CharField(max_length=500, blank=True, default='', db_index=True, editable=False)  # Tiêu đề bỏ dấu, chữ thường để tìm kiếm
     AnhChinh = models.ImageField(upload_to ='uploads/', blank=False, null=False)
     The = models.CharField(max_length=255)
     NoiDung = RichTextField()
@@ -19,6 +21,7 @@ class TinTuc(models.Model):
     
     def save(self, *args, **kwargs):
         self.DuongDan = slugify(self.TieuDe)
+        self.TieuDeKhongDau = fold_text(self.TieuDe)
         super(TinTuc, self).save(*args, **kwargs)
     
     def __str__(self):
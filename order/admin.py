@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DonHang, ChiTietDonHang
+from .models import DonHang, ChiTietDonHang, ThongKeBanChay, DongMua
 
 class ChiTietDonHangInline(admin.TabularInline):
     model = ChiTietDonHang
@@ -8,8 +8,26 @@ class DonHangAdmin(admin.ModelAdmin):
     inlines = [ChiTietDonHangInline]
     readonly_fields = ("id", "ThoiGian", "TongTien")
 
+    def save_related(self, request, form, formsets, change):
+        # Cộng DongMua một lần cho cả đơn sau khi lưu các dòng chi tiết, chỉ cho cặp có sản phẩm mới thêm
+        da_ghi_nhan = list(ChiTietDonHang.objects.filter(DonHang_id=form.instance.pk).values_list('SanPham_id', flat=True)) if change else []
+        super().save_related(request, form, formsets, change)
+        DongMua.ghi_nhan_don_hang(form.instance.pk, da_ghi_nhan)
+
 class ChiTietDonHangAdmin(admin.ModelAdmin):
     readonly_fields = ("id", "SanPham", "DonHang", "GiaBan", "SoLuong", "TongTien")
     
 admin.site.register(DonHang, DonHangAdmin)
 admin.site.register(ChiTietDonHang, ChiTietDonHangAdmin)
+
+class ThongKeBanChayAdmin(admin.ModelAdmin):
+    list_display = ("SanPham", "SoDonHang", "SoLuongBan", "updated_at")
+    readonly_fields = ("SanPham", "SoDonHang", "SoLuongBan", "updated_at")
+
+admin.site.register(ThongKeBanChay, ThongKeBanChayAdmin)
+
+class DongMuaAdmin(admin.ModelAdmin):
+    list_display = ("SanPham", "SanPhamLienQuan", "SoLan")
+    readonly_fields = ("SanPham", "SanPhamLienQuan", "SoLan")
+
+admin.site.register(DongMua, DongMuaAdmin)
@@ -0,0 +1,56 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from customer.models import KhachHang
+from order import pricing
+from order.models import DonHang, ChiTietDonHang
+from product.models import SanPham, ChuyenMuc
+
+
+class Command(BaseCommand):
+    help = 'So sánh thời gian tính tiền một đơn hàng lớn: vòng lặp Python qua từng dòng và SUM trong SQL (order/pricing.py). Dữ liệu được rollback sau khi chạy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--so-dong', type=int, default=20000, help='Số dòng chi tiết đơn hàng giả tạo ra.')
+        parser.add_argument('--lap', type=int, default=20, help='Số lần lặp mỗi cách tính.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            donhang = self.seed(options['so_dong'])
+            lines = ChiTietDonHang.objects.filter(DonHang=donhang)
+
+            def python_loop():
+                # Cách cũ: nạp từng dòng rồi cộng, công thức float
+                total_price = 0
+                for item in lines.all():
+                    total_price += item.SoLuong * item.GiaBan
+                return int(total_price + total_price * int('5') / 100 + int('30000'))
+
+            def sql_sum():
+                return pricing.totals(lines.all(), '5', '30000').total
+
+            assert python_loop() == sql_sum()
+            self.stdout.write('%-30s %12s' % ('Cách tính (%d dòng)' % options['so_dong'], 'ms'))
+            self.stdout.write('%-30s %12.2f' % ('Vòng lặp Python', self.measure(options['lap'], python_loop)))
+            self.stdout.write('%-30s %12.2f' % ('SUM trong SQL', self.measure(options['lap'], sql_sum)))
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        user = User.objects.create(username='bench-pricing')
+        khachhang = KhachHang.objects.create(User=user)
+        chuyenmuc = ChuyenMuc.objects.create(TenChuyenMuc='Bench pricing')
+        sanpham = SanPham.objects.create(TenSanPham='bench-pricing', GiaBan=123000, GiaKhuyenMai=150000, MoTaNgan='', MoTaDai='', ChuyenMuc=chuyenmuc)
+        donhang = DonHang.objects.create(KhachHang=khachhang, SoDienThoai='0912345678', DiaChi='Bench', TongTien=0)
+        # bulk_create bỏ qua save() nên không cập nhật thống kê bán chạy/mua kèm
+        ChiTietDonHang.objects.bulk_create(
+            (ChiTietDonHang(DonHang=donhang, SanPham=sanpham, GiaBan=sanpham.GiaBan + i % 7 * 1000, SoLuong=1 + i % 5) for i in range(count)),
+            batch_size=2000,
+        )
+        return donhang
+
+    def measure(self, repeat, function):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) * 1000 / repeat
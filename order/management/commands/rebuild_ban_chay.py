@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from order.models import ChiTietDonHang, ThongKeBanChay
+from website.versions import bump_model_version
+
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng ThongKeBanChay từ toàn bộ ChiTietDonHang (dùng khi khởi tạo hoặc sau khi sửa/xóa đơn hàng).'
+
+    def handle(self, *args, **options):
+        rows = ChiTietDonHang.objects.values('SanPham_id') \
+            .annotate(so_don=Count('id'), so_luong=Sum('SoLuong')) \
+            .order_by()
+
+        with transaction.atomic():
+            ThongKeBanChay.objects.all().delete()
+            ThongKeBanChay.objects.bulk_create(
+                (ThongKeBanChay(SanPham_id=row['SanPham_id'], SoDonHang=row['so_don'], SoLuongBan=row['so_luong'] or 0) for row in rows),
+                batch_size=1000,
+            )
+        bump_model_version(ThongKeBanChay)
+
+        self.stdout.write(self.style.SUCCESS('Đã tính lại thống kê bán chạy cho %d sản phẩm.' % ThongKeBanChay.objects.count()))
@@ -0,0 +1,41 @@
+from collections import Counter
+from itertools import groupby
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from order.models import ChiTietDonHang, DongMua
+from website.versions import bump_model_version
+
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng DongMua (sản phẩm mua kèm) từ toàn bộ ChiTietDonHang, đọc theo lô để giới hạn bộ nhớ.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Số dòng ChiTietDonHang đọc mỗi lần.')
+        parser.add_argument('--flush-size', type=int, default=200000, help='Số cặp giữ trong bộ nhớ trước khi ghi vào DB.')
+
+    def handle(self, *args, **options):
+        # Đọc (DonHang, SanPham) theo thứ tự đơn hàng, mỗi đơn nằm liền nhau nên chỉ cần giữ một đơn
+        # và bộ đếm cặp; bộ đếm được gộp vào DB mỗi khi vượt flush-size.
+        lines = ChiTietDonHang.objects.order_by('DonHang_id', 'id').values_list('DonHang_id', 'SanPham_id') \
+            .iterator(chunk_size=options['chunk_size'])
+
+        counts = Counter()
+        orders = 0
+        with transaction.atomic():
+            # DongMua không có signal xóa và không bảng nào trỏ tới nên delete() là một câu DELETE,
+            # không nạp từng dòng (bảng có thể rất lớn)
+            DongMua.objects.all().delete()
+            for donhang_id, group in groupby(lines, key=lambda line: line[0]):
+                sanpham_ids = list(dict.fromkeys(sanpham_id for _, sanpham_id in group))[:DongMua.MAX_SAN_PHAM_MOI_DON]
+                for a in sanpham_ids:
+                    for b in sanpham_ids:
+                        if a != b:
+                            counts[(a, b)] += 1
+                orders += 1
+                if len(counts) >= options['flush_size']:
+                    DongMua.cong_don_nhieu(counts)
+                    counts.clear()
+            DongMua.cong_don_nhieu(counts)
+        bump_model_version(DongMua)
+
+        self.stdout.write(self.style.SUCCESS('Đã tính lại sản phẩm mua kèm từ %d đơn hàng (%d cặp).' % (orders, DongMua.objects.count())))
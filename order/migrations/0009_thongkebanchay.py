@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_thongkebanchay(apps, schema_editor):
+    ChiTietDonHang = apps.get_model('order', 'ChiTietDonHang')
+    ThongKeBanChay = apps.get_model('order', 'ThongKeBanChay')
+    rows = ChiTietDonHang.objects.values('SanPham_id').annotate(so_don=Count('id'), so_luong=Sum('SoLuong')).order_by()
+    ThongKeBanChay.objects.bulk_create(
+        (ThongKeBanChay(SanPham_id=row['SanPham_id'], SoDonHang=row['so_don'], SoLuongBan=row['so_luong'] or 0) for row in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0008_chitietdonhang_mausac'),
+        ('product', '0009_alter_sanpham_phantramgiam'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThongKeBanChay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('SoDonHang', models.IntegerField(default=0)),
+                ('SoLuongBan', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('SanPham', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ThongKeBanChay', to='product.sanpham')),
+            ],
+            options={
+                'verbose_name': 'Thống Kê Bán Chạy',
+                'verbose_name_plural': 'Thống Kê Bán Chạy',
+                'indexes': [models.Index(fields=['-SoDonHang', 'SanPham'], name='banchay_sodonhang_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_thongkebanchay, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0009_thongkebanchay'),
+        ('product', '0010_sanpham_tenkhongdau'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DongMua',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('SoLan', models.IntegerField(default=0)),
+                ('SanPham', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='DongMua', to='product.sanpham')),
+                ('SanPhamLienQuan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.sanpham')),
+            ],
+            options={
+                'verbose_name': 'Sản Phẩm Mua Kèm',
+                'verbose_name_plural': 'Sản Phẩm Mua Kèm',
+                'indexes': [models.Index(fields=['SanPham', '-SoLan'], name='dongmua_sanpham_solan_idx')],
+                'constraints': [models.UniqueConstraint(fields=('SanPham', 'SanPhamLienQuan'), name='dongmua_cap_unique')],
+            },
+        ),
+    ]
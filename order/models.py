@@ -1,7 +1,10 @@
 from turtle import back
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from itertools import groupby
+from django.db.models import F, Q
 from customer.models import KhachHang
 from product.models import SanPham, MauSac
+from website.versions import bump_model_version
 
 # Create your models here.
 class DonHang(models.Model):
@@ -43,9 +46,139 @@ class ChiTietDonHang(models.Model):
         verbose_name_plural = "Chi Tiết Đơn Hàng"
     
     def save(self, *args, **kwargs):
+        is_new = self._state.adding
         self.GiaBan = self.SanPham.GiaBan
         self.TongTien = self.SanPham.GiaBan * self.SoLuong
         super(ChiTietDonHang, self).save(*args, **kwargs)
+        if is_new:
+            # DongMua được cộng một lần cho cả đơn sau khi tạo xong các dòng (DongMua.ghi_nhan_don_hang)
+            ThongKeBanChay.ghi_nhan(self.SanPham_id, self.SoLuong)
     
     def __str__(self):
-        return "Mã Đơn Hàng: " + str(self.DonHang.id) + " - Sản Phẩm: " + self.SanPham.TenSanPham + " - Giá Bán: " + str(self.GiaBan) +  " - Số Lượng: " + str(self.SoLuong) + " - Tổng Tiền: " + str(self.TongTien)
\ No newline at end of file
+        return "Mã Đơn Hàng: " + str(self.DonHang.id) + " - Sản Phẩm: " + self.SanPham.TenSanPham + " - Giá Bán: " + str(self.GiaBan) +  " - Số Lượng: " + str(self.SoLuong) + " - Tổng Tiền: " + str(self.TongTien)
+
+
+class ThongKeBanChay(models.Model):
+    SanPham = models.OneToOneField(SanPham, on_delete=models.CASCADE, related_name='ThongKeBanChay')
+    SoDonHang = models.IntegerField(default=0)  # Số dòng chi tiết đơn hàng của sản phẩm
+    SoLuongBan = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Thống Kê Bán Chạy"
+        verbose_name_plural = "Thống Kê Bán Chạy"
+        indexes = [
+            models.Index(fields=['-SoDonHang', 'SanPham'], name='banchay_sodonhang_idx'),
+        ]
+
+    @classmethod
+    def ghi_nhan(cls, sanpham_id, soluong):
+        # Cộng dồn bằng UPDATE ... SET x = x + n để không bị mất số khi nhiều đơn cùng lúc
+        updated = cls.objects.filter(SanPham_id=sanpham_id).update(SoDonHang=F('SoDonHang') + 1, SoLuongBan=F('SoLuongBan') + soluong)
+        if updated == 0:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(SanPham_id=sanpham_id, SoDonHang=1, SoLuongBan=soluong)
+            except IntegrityError:
+                cls.objects.filter(SanPham_id=sanpham_id).update(SoDonHang=F('SoDonHang') + 1, SoLuongBan=F('SoLuongBan') + soluong)
+        # update() không phát signal, tự tăng phiên bản cho trang cache có danh sách bán chạy
+        bump_model_version(cls)
+
+    @classmethod
+    def top(cls, limit):
+        # Giữ nguyên tên khóa như truy vấn GROUP BY cũ để template không phải đổi
+        return cls.objects.filter(SoDonHang__gt=0).order_by('-SoDonHang', 'SanPham_id') \
+            .values('SanPham_id', 'SanPham__TenSanPham', 'SanPham__GiaBan', 'SanPham__GiaKhuyenMai', 'SanPham__PhanTramGiam', 'SanPham__AnhChinh', 'SanPham__DuongDan', count=F('SoDonHang'))[:limit]
+
+    def __str__(self):
+        return "Sản Phẩm: " + self.SanPham.TenSanPham + " - Số Đơn: " + str(self.SoDonHang) + " - Số Lượng Bán: " + str(self.SoLuongBan)
+
+
+class DongMua(models.Model):
+    """
+    Ma trận đồng mua dạng thưa: mỗi dòng là một cặp sản phẩm từng nằm chung một đơn hàng,
+    SoLan là số đơn hàng có cả hai. Lưu cả hai chiều (a, b) và (b, a) để lấy top-k sản phẩm
+    mua kèm của một sản phẩm bằng một truy vấn trên index (SanPham, -SoLan).
+    """
+    SanPham = models.ForeignKey(SanPham, on_delete=models.CASCADE, related_name='DongMua')
+    SanPhamLienQuan = models.ForeignKey('product.SanPham', on_delete=models.CASCADE, related_name='+')
+    SoLan = models.IntegerField(default=0)
+
+    # Đơn có quá nhiều sản phẩm khác nhau tạo ra số cặp tăng theo bình phương, chỉ lấy chừng này sản phẩm đầu
+    MAX_SAN_PHAM_MOI_DON = 50
+
+    class Meta:
+        verbose_name = "Sản Phẩm Mua Kèm"
+        verbose_name_plural = "Sản Phẩm Mua Kèm"
+        constraints = [
+            models.UniqueConstraint(fields=['SanPham', 'SanPhamLienQuan'], name='dongmua_cap_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['SanPham', '-SoLan'], name='dongmua_sanpham_solan_idx'),
+        ]
+
+    @classmethod
+    def ghi_nhan_don_hang(cls, donhang_id, da_ghi_nhan=()):
+        """
+        Cộng các cặp sản phẩm của một đơn hàng, gọi một lần sau khi đã tạo xong mọi dòng ChiTietDonHang.
+        da_ghi_nhan: sản phẩm đã có trong đơn từ lần ghi nhận trước (thêm dòng vào đơn cũ), cặp giữa chúng không cộng lại.
+        Tốn một truy vấn đọc cặp đã có, mỗi sản phẩm một UPDATE và một INSERT cho các cặp mới.
+        """
+        lines = ChiTietDonHang.objects.filter(DonHang_id=donhang_id).order_by('id').values_list('SanPham_id', flat=True)
+        sanpham_ids = list(dict.fromkeys(lines))[:cls.MAX_SAN_PHAM_MOI_DON]
+        da_ghi_nhan = set(da_ghi_nhan)
+        pairs = [(a, b) for a in sanpham_ids for b in sanpham_ids if a != b and not (a in da_ghi_nhan and b in da_ghi_nhan)]
+        if not pairs:
+            return
+        existing = set(cls.objects.filter(SanPham_id__in=sanpham_ids, SanPhamLienQuan_id__in=sanpham_ids).values_list('SanPham_id', 'SanPhamLienQuan_id'))
+        for sanpham_id, group in groupby([pair for pair in pairs if pair in existing], key=lambda pair: pair[0]):
+            cls.objects.filter(SanPham_id=sanpham_id, SanPhamLienQuan_id__in=[lienquan_id for _, lienquan_id in group]).update(SoLan=F('SoLan') + 1)
+        missing = [pair for pair in pairs if pair not in existing]
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([cls(SanPham_id=sanpham_id, SanPhamLienQuan_id=lienquan_id, SoLan=1) for sanpham_id, lienquan_id in missing])
+        except IntegrityError:
+            # Đơn khác vừa tạo một trong các cặp này, cộng dồn từng cặp
+            for sanpham_id, lienquan_id in missing:
+                cls.cong_don(sanpham_id, lienquan_id, 1)
+        bump_model_version(cls)
+
+    @classmethod
+    def cong_don(cls, sanpham_id, lienquan_id, solan):
+        updated = cls.objects.filter(SanPham_id=sanpham_id, SanPhamLienQuan_id=lienquan_id).update(SoLan=F('SoLan') + solan)
+        if updated == 0:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(SanPham_id=sanpham_id, SanPhamLienQuan_id=lienquan_id, SoLan=solan)
+            except IntegrityError:
+                cls.objects.filter(SanPham_id=sanpham_id, SanPhamLienQuan_id=lienquan_id).update(SoLan=F('SoLan') + solan)
+
+    @classmethod
+    def cong_don_nhieu(cls, counts, batch_size=1000):
+        """Gộp dict {(sanpham_id, lienquan_id): solan} vào bảng bằng bulk_update/bulk_create theo lô."""
+        pairs = list(counts.items())
+        for start in range(0, len(pairs), batch_size):
+            batch = dict(pairs[start:start + batch_size])
+            condition = Q()
+            for sanpham_id, group in groupby(sorted(batch), key=lambda pair: pair[0]):
+                condition |= Q(SanPham_id=sanpham_id, SanPhamLienQuan_id__in=[lienquan_id for _, lienquan_id in group])
+            existing = list(cls.objects.filter(condition))
+            for row in existing:
+                row.SoLan += batch.pop((row.SanPham_id, row.SanPhamLienQuan_id))
+            cls.objects.bulk_update(existing, ['SoLan'], batch_size=batch_size)
+            cls.objects.bulk_create(
+                [cls(SanPham_id=sanpham_id, SanPhamLienQuan_id=lienquan_id, SoLan=solan) for (sanpham_id, lienquan_id), solan in batch.items()],
+                batch_size=batch_size,
+            )
+
+    @classmethod
+    def mua_kem(cls, sanpham_id, limit):
+        """Top sản phẩm hay được mua cùng, một truy vấn (index SanPham, -SoLan + join khóa chính)."""
+        from product.catalog import CARD_FIELDS
+        rows = cls.objects.filter(SanPham_id=sanpham_id).select_related('SanPhamLienQuan') \
+            .only('SanPhamLienQuan', *('SanPhamLienQuan__' + field for field in CARD_FIELDS)) \
+            .order_by('-SoLan', 'SanPhamLienQuan_id')[:limit]
+        return [row.SanPhamLienQuan for row in rows]
+
+    def __str__(self):
+        return "Sản Phẩm: " + str(self.SanPham_id) + " - Mua Kèm: " + str(self.SanPhamLienQuan_id) + " - Số Lần: " + str(self.SoLan)
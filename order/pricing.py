@@ -0,0 +1,36 @@
+from collections import namedtuple
+from django.db.models import F, QuerySet, Sum
+
+# Tính tiền dùng chung cho giỏ hàng, đặt hàng và chi tiết đơn hàng (dòng có SoLuong, GiaBan):
+#   tạm tính = tổng SoLuong * GiaBan, thuế = tạm tính * phivat / 100 (làm tròn xuống), tổng = tạm tính + thuế + phiship.
+# Tính hoàn toàn bằng số nguyên, cho cùng kết quả với int(tạm tính + tạm tính * vat / 100 + ship) trước đây
+# nhưng không sai số float khi số tiền lớn. Queryset chưa nạp thì tạm tính là một SUM trong SQL.
+
+Totals = namedtuple('Totals', 'subtotal tax shipping total')
+
+
+def line_total():
+    return F('SoLuong') * F('GiaBan')
+
+
+def with_line_totals(queryset):
+    """Thêm GiaTien = SoLuong * GiaBan (tính trong SQL) cho từng dòng, dùng khi template hiển thị từng dòng."""
+    return queryset.annotate(GiaTien=line_total())
+
+
+def subtotal(lines):
+    """Tổng SoLuong * GiaBan của queryset (một SUM trong SQL) hoặc danh sách dòng đã nạp."""
+    if isinstance(lines, QuerySet) and lines._result_cache is None:
+        return lines.aggregate(tong=Sum(line_total()))['tong'] or 0
+    return sum(item.SoLuong * item.GiaBan for item in lines)
+
+
+def totals(lines, phivat, phiship):
+    """
+    lines: queryset/danh sách dòng, hoặc tạm tính (int) đã tính sẵn từ CSDL.
+    phivat (phần trăm) và phiship nhận cả chuỗi GiaTri của ThongTin.
+    """
+    tam_tinh = lines if isinstance(lines, int) else subtotal(lines)
+    tax = tam_tinh * int(phivat) // 100
+    shipping = int(phiship)
+    return Totals(tam_tinh, tax, shipping, tam_tinh + tax + shipping)
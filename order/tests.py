@@ -280,3 +280,110 @@ def test_ORDER015(client, setup_data):
     }, **{'HTTP_HOST': 'testserver'})
 
     assert response.json() == {"error": "Không có sản phẩm nào trong giỏ để đặt hàng!"}
+
+# ORDER016
+@pytest.mark.django_db
+def test_ORDER016(client, setup_data):
+    """ORDER016: Đặt hàng cập nhật ThongKeBanChay, trang chủ đọc top sản phẩm từ bảng này"""
+    from order.models import ThongKeBanChay
+    GioHang.objects.create(KhachHang=setup_data['khachhang'], SanPham=setup_data['sanpham'], SoLuong=3, MauSac=setup_data['mausac'])
+    client.force_login(setup_data['user'])
+    client.post(reverse('pay_cart'), {'sodienthoai': '0912345678', 'diachi': 'Ha Noi', 'ghichu': ''}, **{'HTTP_HOST': 'testserver'})
+
+    thongke = ThongKeBanChay.objects.get(SanPham=setup_data['sanpham'])
+    assert thongke.SoDonHang == 1
+    assert thongke.SoLuongBan == 3
+
+    response = client.get(reverse('home'), **{'HTTP_HOST': 'testserver'})
+    top_products = list(response.context['top_products'])
+    assert top_products[0]['SanPham_id'] == setup_data['sanpham'].id
+    assert top_products[0]['count'] == 1
+
+# ORDER017
+@pytest.mark.django_db
+def test_ORDER017(setup_data):
+    """ORDER017: Lệnh rebuild_ban_chay tính lại thống kê từ ChiTietDonHang"""
+    from django.core.management import call_command
+    from order.models import ThongKeBanChay
+    donhang = DonHang.objects.create(KhachHang=setup_data['khachhang'], SoDienThoai='0912345678', DiaChi='Ha Noi', TongTien=0)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=setup_data['sanpham'], SoLuong=2)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=setup_data['sanpham'], SoLuong=4)
+    ThongKeBanChay.objects.all().update(SoDonHang=0, SoLuongBan=0)
+
+    call_command('rebuild_ban_chay')
+
+    thongke = ThongKeBanChay.objects.get(SanPham=setup_data['sanpham'])
+    assert thongke.SoDonHang == 2
+    assert thongke.SoLuongBan == 6
+
+# ORDER018
+@pytest.mark.django_db
+def test_ORDER018(client, setup_data):
+    """ORDER018: DongMua được cộng một lần mỗi đơn, lệnh rebuild_dong_mua cho cùng kết quả và xóa bảng bằng một câu DELETE, trang chi tiết ưu tiên sản phẩm mua kèm"""
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from order.models import DongMua
+    sanpham_a = setup_data['sanpham']
+    chuyenmuc_b = ChuyenMuc.objects.create(TenChuyenMuc='Chuyên mục B')
+    sanpham_b = SanPham.objects.create(TenSanPham='Sản phẩm B', MoTaNgan='Mô tả', GiaBan=10000, GiaKhuyenMai=20000, ChuyenMuc=chuyenmuc_b)
+    sanpham_c = SanPham.objects.create(TenSanPham='Sản phẩm C', MoTaNgan='Mô tả', GiaBan=10000, GiaKhuyenMai=20000, ChuyenMuc=chuyenmuc_b)
+
+    for products in ([sanpham_a, sanpham_b, sanpham_a], [sanpham_a, sanpham_b, sanpham_c], [sanpham_b, sanpham_c]):
+        donhang = DonHang.objects.create(KhachHang=setup_data['khachhang'], SoDienThoai='0912345678', DiaChi='Ha Noi', TongTien=0)
+        for sanpham in products:
+            ChiTietDonHang.objects.create(DonHang=donhang, SanPham=sanpham, SoLuong=1)
+        DongMua.ghi_nhan_don_hang(donhang.id)
+
+    def matrix():
+        return {(row.SanPham_id, row.SanPhamLienQuan_id): row.SoLan for row in DongMua.objects.all()}
+
+    incremental = matrix()
+    assert incremental[(sanpham_a.id, sanpham_b.id)] == 2
+    assert incremental[(sanpham_b.id, sanpham_a.id)] == 2
+    assert incremental[(sanpham_b.id, sanpham_c.id)] == 2
+    assert incremental[(sanpham_a.id, sanpham_c.id)] == 1
+
+    with CaptureQueriesContext(connection) as queries:
+        call_command('rebuild_dong_mua', chunk_size=2, flush_size=1)
+    assert matrix() == incremental
+    dongmua_sql = [query['sql'] for query in queries if DongMua._meta.db_table in query['sql']]
+    # Không SELECT từng dòng để phát signal trước khi xóa
+    assert dongmua_sql[0].startswith('DELETE') and sum(sql.startswith('DELETE') for sql in dongmua_sql) == 1
+
+    # Thêm dòng vào đơn cũ: chỉ cộng các cặp có sản phẩm mới
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=sanpham_a, SoLuong=1)
+    DongMua.ghi_nhan_don_hang(donhang.id, [sanpham_b.id, sanpham_c.id])
+    assert matrix()[(sanpham_b.id, sanpham_c.id)] == 2
+    assert matrix()[(sanpham_a.id, sanpham_c.id)] == 2
+    incremental = matrix()
+    call_command('rebuild_dong_mua')
+    assert matrix() == incremental
+
+    assert DongMua.mua_kem(sanpham_b.id, 4) == [sanpham_a, sanpham_c]
+    response = client.get(reverse('detail_product', kwargs={'slug': sanpham_a.DuongDan}), **{'HTTP_HOST': 'testserver'})
+    assert list(response.context['sanphamlienquan']) == [sanpham_b, sanpham_c]
+
+# ORDER019
+@pytest.mark.django_db
+def test_ORDER019(client, setup_data, django_assert_num_queries):
+    """ORDER019: Tính tiền bằng số nguyên, queryset chỉ tốn một SUM, kết quả giống công thức cũ; trang chi tiết đơn hàng dùng chung cách tính"""
+    from order import pricing
+    donhang = DonHang.objects.create(KhachHang=setup_data['khachhang'], SoDienThoai='0912345678', DiaChi='Ha Noi', TongTien=0)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=setup_data['sanpham'], SoLuong=3)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=setup_data['sanpham'], SoLuong=1)
+    lines = ChiTietDonHang.objects.filter(DonHang=donhang)
+
+    with django_assert_num_queries(1):
+        tien = pricing.totals(lines, "5", "30000")
+    assert tien == pricing.Totals(200000, 10000, 30000, 240000)
+    assert pricing.totals(200000, 5, 30000) == tien
+    assert pricing.totals(list(lines), "5", "30000") == tien
+    # Thuế làm tròn xuống như int() trước đây
+    assert pricing.totals(99999, "5", "0").total == int(99999 + 99999 * 5 / 100)
+
+    client.force_login(setup_data['user'])
+    response = client.get(reverse('customer_order_detail', kwargs={'id': donhang.id}), **{'HTTP_HOST': 'testserver'})
+    assert response.context['tongdon'] == 200000
+    assert response.context['thanhtoan'] == 240000
+    assert [item.GiaTien for item in response.context['chitietdonhang']] == [150000, 50000]
@@ -1,11 +1,13 @@
 from contextlib import redirect_stderr
 from django.shortcuts import render, redirect
 from django.views import View
-from django.contrib.auth.models import User
 from customer.models import KhachHang
 from .models import *
 from cart.models import *
+from cart.summary import invalidate_summaries
 from website.models import *
+from website.config import config
+from . import pricing
 import re
 # Create your views here.
 
@@ -16,8 +18,7 @@ class PayCart(View):
     
     def get(self, request):
         try:
-            user = User.objects.all().get(id=request.user.id)
-            khachhang = KhachHang.objects.all().get(User=user)
+            khachhang = request.khachhang
             giohang = GioHang.objects.all().filter(KhachHang=khachhang, MauSac=None)
             
             if giohang.count() >= 1:
@@ -29,21 +30,12 @@ class PayCart(View):
                 return redirect('cart_list')
             
             
-            giohang = GioHang.objects.all().filter(KhachHang=khachhang)
+            giohang = pricing.with_line_totals(GioHang.objects.all().filter(KhachHang=khachhang))
             
-            total_price = 0
-    
-            for item in giohang:
-                total_price += item.SoLuong * item.GiaBan
-                item.GiaTien = item.GiaBan * item.SoLuong
-                
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phiship")
-            phiship = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
-            
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phivat")
-            phivat = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
+            phiship = config.integer("phiship")
+            phivat = config.integer("phivat")
             
-            thanhtoan = int(total_price + total_price * int(phivat) / 100 + int(phiship))
+            thanhtoan = pricing.totals(giohang, phivat, phiship).total
             
             data = {"title": "Đặt hàng", "khachhang": khachhang, "phiship": phiship, "phivat": phivat, "thanhtoan": thanhtoan, "giohang": giohang}
             return render(request, self.template_name, data)
@@ -55,37 +47,19 @@ class PayCart(View):
             phone = request.POST['sodienthoai']
             address = request.POST['diachi']
             note = request.POST['ghichu']
-            user = User.objects.all().get(id=request.user.id)
-            khachhang = KhachHang.objects.all().get(User=user)
-            giohang = GioHang.objects.all().filter(KhachHang=khachhang)
+            khachhang = request.khachhang
+            giohang = pricing.with_line_totals(GioHang.objects.all().filter(KhachHang=khachhang))
             
-            total_price = 0
-    
-            for item in giohang:
-                total_price += item.SoLuong * item.GiaBan
-                item.GiaTien = item.GiaBan * item.SoLuong
-                
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phiship")
-            phiship = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
+            phiship = config.integer("phiship")
+            phivat = config.integer("phivat")
             
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phivat")
-            phivat = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
-            
-            thanhtoan = int(total_price + total_price * int(phivat) / 100 + int(phiship))
+            thanhtoan = pricing.totals(giohang, phivat, phiship).total
             
             phone_regex = re.compile(r'^(03|05|07|08|09)\d{8}$')
             if(bool(phone_regex.match(phone)) == False):
                 data = {"title": "Đặt hàng", "khachhang": khachhang, "phiship": phiship, "phivat": phivat, "thanhtoan": thanhtoan, "giohang": giohang, "errorMessage": "Vui Lòng Nhập Số Điện Thoại Hợp Lệ!"}
                 return render(request, self.template_name, data)
             
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phiship")
-            phiship = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
-            
-            loaithongtin = LoaiThongTin.objects.all().get(MaLoai="phivat")
-            phivat = ThongTin.objects.all().get(LoaiThongTin=loaithongtin).GiaTri
-            
-            thanhtoan = int(total_price + total_price * int(phivat) / 100 + int(phiship))
-            
             donhang = DonHang.objects.create(KhachHang=khachhang, SoDienThoai=phone, DiaChi=address, GhiChu=note, TongTien=thanhtoan, TrangThai="cxl")
             donhang.save()
             
@@ -94,8 +68,10 @@ class PayCart(View):
             for item in giohang:
                 chitietdonhang = ChiTietDonHang.objects.create(DonHang=donhangthanhtoan, SanPham=item.SanPham, SoLuong=item.SoLuong, MauSac=item.MauSac)
                 chitietdonhang.save()
+            DongMua.ghi_nhan_don_hang(donhangthanhtoan.id)
             
             giohang.delete()
+            invalidate_summaries([request.user.id])
             return redirect('/') # chuyển đến giao diện trang chủ
         except:
             return render(request, template_error)
\ No newline at end of file
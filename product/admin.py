@@ -2,16 +2,17 @@ from django.contrib import admin
 from .models import *
 from django.utils.html import format_html
 from django.conf import settings
+from website.admin import FoldedSearchMixin
 
 
 class MauSacAdmin(admin.ModelAdmin):
     readonly_fields = ("id", "TenMauSac", "MaMauSac")
 
 @admin.register(SanPham)
-class SanPhamAdmin(admin.ModelAdmin):
+class SanPhamAdmin(FoldedSearchMixin, admin.ModelAdmin):
     list_display = ('id', 'get_hinhanh','get_tensanpham', 'get_motangan', 'get_chuyenmuc', 'get_giaban', 'gia_khuyenmai', 'get_trangthai')
     list_per_page = 10
-    search_fields = ('SanPham__TenSanPham', 'SanPham__MoTaNgan')
+    search_fields = ('^TenKhongDau',)
     list_filter = ('ChuyenMuc__TenChuyenMuc', 'TrangThai', 'GiaBan', 'PhanTramGiam', 'MauSac__TenMauSac') # add thêm lọc theo giá bán
     readonly_fields = ('display_hinh_anh',)  # Trường chỉ đọc để hiển thị hình ảnh
 
@@ -72,3 +73,14 @@ class ChuyenMucAdmin(admin.ModelAdmin):
     get_ten_chuyen_muc.short_description = 'Tên Chuyên Mục'
     get_duong_dan.short_description = 'Đường Dẫn'
     display_hinh_anh.short_description = 'Hình Ảnh'
+
+@admin.register(SanPhamHienThi)
+class SanPhamHienThiAdmin(admin.ModelAdmin):
+    list_display = ('SanPham', 'TenChuyenMuc', 'GiaBan', 'DanhSachMauSac', 'SoDonHang', 'SoLuongBan', 'updated_at')
+    list_per_page = 20
+    
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,126 @@
+import threading
+import zlib
+from django.core.cache import cache
+from django.db import transaction
+from website.versions import get_version, bump_version
+
+# Chỉ mục bitmap theo màu: mỗi MauSac ứng với một bitmap, bit thứ i bật khi SanPham id=i có màu đó.
+# Bitmap là số nguyên Python nên AND/OR nhiều màu chỉ là phép & / | trên số nguyên, không cần JOIN
+# bảng SanPham_MauSac. Bản nén (zlib) được lưu vào cache theo phiên bản để tiến trình khác
+# nạp lại mà không phải quét DB; tiến trình nhận thay đổi M2M cập nhật tăng dần rồi tăng phiên bản,
+# sau khi transaction commit (rollback thì không có bản nén sai nào được lưu).
+
+VERSION_NAME = 'bitmap_mausac'
+SNAPSHOT_TIMEOUT = 60 * 60
+AND, OR = 'va', 'hoac'
+
+
+def bitmap_from_ids(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, 'little')
+
+
+def ids_from_bitmap(bitmap):
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for position, byte in enumerate(data):
+        if byte:
+            base = position * 8
+            ids.extend(base + bit for bit in range(8) if byte >> bit & 1)
+    return ids
+
+
+def bit_count(bitmap):
+    return bin(bitmap).count('1')
+
+
+def compress(bitmap):
+    return zlib.compress(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'))
+
+
+def decompress(data):
+    return int.from_bytes(zlib.decompress(data), 'little')
+
+
+class ColorIndex:
+    def __init__(self):
+        self.bitmaps = {}
+        self.version = None
+        self.lock = threading.Lock()
+
+    def snapshot_key(self, version):
+        return '%s:%s' % (VERSION_NAME, version)
+
+    def build(self):
+        from .models import SanPham
+        ids = {}
+        for sanpham_id, mausac_id in SanPham.MauSac.through.objects.values_list('sanpham_id', 'mausac_id').iterator():
+            ids.setdefault(mausac_id, []).append(sanpham_id)
+        self.bitmaps = {mausac_id: bitmap_from_ids(sanpham_ids) for mausac_id, sanpham_ids in ids.items()}
+
+    def save_snapshot(self, version):
+        cache.set(self.snapshot_key(version), {pk: compress(bitmap) for pk, bitmap in self.bitmaps.items()}, SNAPSHOT_TIMEOUT)
+
+    def ensure_current(self):
+        version = get_version(VERSION_NAME)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    snapshot = cache.get(self.snapshot_key(version))
+                    if snapshot is not None:
+                        self.bitmaps = {pk: decompress(data) for pk, data in snapshot.items()}
+                    else:
+                        self.build()
+                        self.save_snapshot(version)
+                    self.version = version
+        return self.bitmaps
+
+    def set_products(self, colors_by_product):
+        """
+        Cập nhật tăng dần: colors_by_product = {sanpham_id: [mausac_id, ...]} (danh sách rỗng khi xóa).
+        Áp dụng khi transaction hiện tại commit, ngay lập tức nếu không ở trong transaction.
+        """
+        transaction.on_commit(lambda: self.apply(colors_by_product))
+
+    def apply(self, colors_by_product):
+        with self.lock:
+            previous = self.version
+            bitmaps = dict(self.bitmaps)
+            for sanpham_id, mausac_ids in colors_by_product.items():
+                bit = 1 << sanpham_id
+                for mausac_id in list(bitmaps):
+                    bitmaps[mausac_id] &= ~bit
+                for mausac_id in mausac_ids:
+                    bitmaps[mausac_id] = bitmaps.get(mausac_id, 0) | bit
+            version = bump_version(VERSION_NAME)
+            # Bản cục bộ chỉ đúng khi không tiến trình nào tăng phiên bản xen giữa (phiên bản mới = phiên bản cục bộ + 1);
+            # nếu không thì bỏ qua, lần đọc sau không thấy bản nén của phiên bản mới nên dựng lại từ bảng SanPham_MauSac
+            if previous is not None and version == previous + 1:
+                self.bitmaps = {pk: bitmap for pk, bitmap in bitmaps.items() if bitmap}
+                self.version = version
+                self.save_snapshot(version)
+
+    def combine(self, color_ids, mode=OR):
+        """Bitmap các sản phẩm có tất cả (va) hoặc ít nhất một (hoac) trong các màu."""
+        bitmaps = self.ensure_current()
+        selected = [bitmaps.get(pk, 0) for pk in color_ids]
+        if not selected:
+            return 0
+        result = selected[0]
+        for bitmap in selected[1:]:
+            result = result & bitmap if mode == AND else result | bitmap
+        return result
+
+    def ids(self, color_ids, mode=OR):
+        return ids_from_bitmap(self.combine(color_ids, mode))
+
+    def count(self, color_ids, mode=OR):
+        return bit_count(self.combine(color_ids, mode))
+
+
+index = ColorIndex()
@@ -0,0 +1,123 @@
+from django.db.models import Q
+from search.index import search_ids, rank_expression
+from website.pagination import paginate
+from .models import MauSac, SanPhamHienThi
+from . import bitmap, engine
+
+# Lớp truy vấn danh mục sản phẩm dùng chung cho Product, DetailCategory...
+# Gộp tìm kiếm, khoảng giá, màu sắc, chuyên mục và sắp xếp vào một truy vấn.
+# Truy vấn chạy trên bảng SanPhamHienThi (một bảng, không JOIN), khóa chính là id sản phẩm.
+
+SORTS = {
+    'moi': ('-pk',),
+    'tang': ('GiaBan', 'pk'),
+    'giam': ('-GiaBan', '-pk'),
+    'banchay': ('-SoDonHang', 'pk'),
+}
+DEFAULT_SORT = ('pk',)
+
+# Bộ lọc màu khớp nhiều hơn chừng này sản phẩm thì lọc bằng LIKE trên DanhSachMauSac (quét một bảng)
+# thay vì gửi id__in=(...) với hàng chục nghìn id: câu SQL hàng trăm KB, DB phân tích còn chậm hơn quét.
+MAX_COLOR_IDS = 1000
+
+# Các cột thẻ sản phẩm (card) trong danh sách thực sự dùng. Không tải MoTaDai (CKEditor)
+# và các ảnh phụ khi chỉ cần hiển thị danh sách.
+CARD_FIELDS = ('id', 'TenSanPham', 'GiaBan', 'GiaKhuyenMai', 'PhanTramGiam', 'AnhChinh', 'DuongDan', 'MoTaNgan', 'ChuyenMuc', 'updated_at')
+
+
+def cards(rows):
+    """Đổi các dòng SanPhamHienThi thành đối tượng SanPham cho template, không truy vấn thêm."""
+    return [row.the_san_pham() for row in rows]
+
+
+def color_filter(color_id):
+    return Q(DanhSachMauSac__contains=',%s,' % color_id)
+
+
+class CatalogQuery:
+    def __init__(self, text=None, price_min=None, price_max=None, colors=None, color_mode=bitmap.OR, category=None, sort=None):
+        self.text = text
+        self.price_min = price_min
+        self.price_max = price_max
+        self.colors = list(colors or [])
+        self.color_mode = color_mode if color_mode in (bitmap.AND, bitmap.OR) else bitmap.OR
+        self.category = category
+        self.sort = sort if sort in SORTS else None
+        self._search_ids = None
+        self._color_ids = None
+
+    @classmethod
+    def from_params(cls, params, category=None):
+        """
+        Đọc các tham số s, min, max, mau (có thể lặp lại), ket_hop (va/hoac), sap_xep từ request.GET.
+        Ném ValueError khi giá không hợp lệ và MauSac.DoesNotExist khi màu không tồn tại.
+        """
+        text = params.get('s')
+        text = text.strip() if text is not None else None
+
+        price_min = params.get('min')
+        price_max = params.get('max')
+        price_min = int(price_min) if price_min not in (None, '') else None
+        price_max = int(price_max) if price_max not in (None, '') else None
+
+        colors = [MauSac.objects.all().get(TenMauSac__iexact=name.strip()) for name in params.getlist('mau')]
+        color_mode = params.get('ket_hop', bitmap.OR).lower()
+
+        sort = params.get('sap_xep')
+        sort = sort.lower() if sort is not None else None
+        return cls(text=text, price_min=price_min, price_max=price_max, colors=colors, color_mode=color_mode, category=category, sort=sort)
+
+    def filters(self):
+        q = Q()
+        if self.text:
+            q &= Q(pk__in=self.search_ids())
+        if self.price_min is not None:
+            q &= Q(GiaBan__gte=self.price_min)
+        if self.price_max is not None:
+            q &= Q(GiaBan__lte=self.price_max)
+        if self.colors:
+            q &= self.color_q()
+        if self.category is not None:
+            q &= Q(ChuyenMuc_id=self.category.id)
+        return q
+
+    def color_q(self):
+        # Ít sản phẩm thì lấy id từ chỉ mục bitmap (theo khóa chính), nhiều thì LIKE trên DanhSachMauSac
+        if bitmap.index.count([color.id for color in self.colors], self.color_mode) <= MAX_COLOR_IDS:
+            return Q(pk__in=self.color_ids())
+        q = Q()
+        for color in self.colors:
+            q = q & color_filter(color.id) if self.color_mode == bitmap.AND else q | color_filter(color.id)
+        return q
+
+    def color_ids(self):
+        # Id sản phẩm thỏa điều kiện màu, tính bằng AND/OR trên chỉ mục bitmap thay vì JOIN bảng màu
+        if self._color_ids is None:
+            self._color_ids = bitmap.index.ids([color.id for color in self.colors], self.color_mode)
+        return self._color_ids
+
+    def search_ids(self):
+        # Kết quả tìm kiếm toàn văn đã xếp hạng BM25, chỉ tính một lần cho mỗi truy vấn
+        if self._search_ids is None:
+            self._search_ids = search_ids('sanpham', self.text)
+        return self._search_ids
+
+    def ordering(self):
+        if self.sort:
+            return SORTS[self.sort]
+        # Không chọn sắp xếp thì kết quả tìm kiếm theo độ liên quan
+        return ('rank', 'pk') if self.text else DEFAULT_SORT
+
+    def queryset(self):
+        queryset = SanPhamHienThi.objects.filter(self.filters())
+        if self.text:
+            queryset = queryset.annotate(rank=rank_expression(self.search_ids()))
+        return queryset.order_by(*self.ordering())
+
+    def page(self, number, per_page, token=None):
+        if engine.is_enabled():
+            catalog_page = engine.engine.page(self, number, per_page, token)
+        else:
+            catalog_page = paginate(self.queryset(), self.ordering(), per_page, number, token)
+        catalog_page.items = cards(catalog_page.items)
+        return catalog_page
@@ -0,0 +1,153 @@
+import threading
+from django.conf import settings
+from website.pagination import KeysetPage, decode_cursor, encode_cursor, InvalidCursor
+from website.versions import get_versions, model_version_name
+from .models import SanPhamHienThi
+from . import bitmap
+
+try:
+    import numpy as np
+except ImportError:  # numpy là phụ thuộc tùy chọn, không có thì chỉ dùng truy vấn DB
+    np = None
+
+# Bộ lọc danh mục trong bộ nhớ (tùy chọn, bật bằng settings.CATALOG_IN_MEMORY và cần numpy).
+# Giữ các cột của SanPhamHienThi dưới dạng mảng numpy; lọc bằng mặt nạ (mask), sắp xếp bằng
+# lexsort rồi chỉ lấy từ DB các dòng của trang hiện tại theo khóa chính.
+# Mảng được dựng lại khi phiên bản của SanPhamHienThi thay đổi (mỗi lần ghi sản phẩm); đơn hàng mới chỉ
+# tăng phiên bản bán chạy và cột SoDonHang được đọc lại khi có truy vấn sắp xếp theo cột này.
+# Điều kiện màu lấy từ chỉ mục bitmap (product/bitmap.py).
+
+# Số kết quả lọc + sắp xếp giữ lại cho các trang tiếp theo của cùng bộ lọc
+MAX_CACHED_RESULTS = 64
+
+
+def is_enabled():
+    return np is not None and getattr(settings, 'CATALOG_IN_MEMORY', False)
+
+
+def bitmap_mask(bitmap, pks):
+    """Đổi bitmap (số nguyên, bit i = sản phẩm id i) thành mặt nạ bool cho mảng pk."""
+    bits = np.unpackbits(np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8 or 1, 'little'), dtype=np.uint8), bitorder='little')
+    inside = pks < len(bits)
+    mask = np.zeros(len(pks), dtype=bool)
+    mask[inside] = bits[pks[inside]].astype(bool)
+    return mask
+
+
+class CatalogEngine:
+    def __init__(self):
+        self.columns = None
+        self.version = None
+        self.sales_version = None
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def build(self):
+        rows = list(SanPhamHienThi.objects.order_by('pk').values_list('pk', 'GiaBan', 'GiaKhuyenMai', 'PhanTramGiam', 'ChuyenMuc_id', 'SoDonHang'))
+        pks, gia_ban, gia_khuyen_mai, phan_tram_giam, chuyen_muc, so_don_hang = zip(*rows) if rows else ((),) * 6
+        self.columns = {
+            'pk': np.array(pks, dtype=np.int64),
+            'GiaBan': np.array(gia_ban, dtype=np.int64),
+            'GiaKhuyenMai': np.array(gia_khuyen_mai, dtype=np.int64),
+            'PhanTramGiam': np.array([value or 0 for value in phan_tram_giam], dtype=np.float64),
+            'ChuyenMuc': np.array(chuyen_muc, dtype=np.int64),
+            'SoDonHang': np.array(so_don_hang, dtype=np.int64),
+        }
+        self.results = {}
+
+    def reload_sales(self):
+        # Đơn hàng không thêm/bớt dòng (việc đó tăng phiên bản model), chỉ thay cột SoDonHang
+        so_don_hang = dict(SanPhamHienThi.objects.values_list('pk', 'SoDonHang'))
+        columns = dict(self.columns)
+        columns['SoDonHang'] = np.array([so_don_hang.get(pk, 0) for pk in columns['pk'].tolist()], dtype=np.int64)
+        self.columns = columns
+
+    def ensure_current(self, sales=False):
+        """sales=True khi truy vấn sắp xếp theo SoDonHang: đọc lại cột này nếu phiên bản bán chạy đã đổi."""
+        names = (model_version_name(SanPhamHienThi), SanPhamHienThi.PHIEN_BAN_BAN_CHAY)
+        versions = get_versions(names)
+        version, sales_version = versions[names[0]], versions[names[1]]
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.build()
+                    self.version = version
+                    self.sales_version = sales_version
+        if sales and sales_version != self.sales_version:
+            with self.lock:
+                if sales_version != self.sales_version:
+                    self.reload_sales()
+                    self.sales_version = sales_version
+        return self.columns
+
+    def ordered(self, query):
+        """Trả về dict cột (pk, GiaBan, SoDonHang, rank) của các dòng đã lọc, theo thứ tự sắp xếp."""
+        sales = any(field.lstrip('-') == 'SoDonHang' for field in query.ordering())
+        columns = self.ensure_current(sales)
+        key = (
+            tuple(query.search_ids()) if query.text else None, query.price_min, query.price_max,
+            query.category and query.category.id, tuple(color.id for color in query.colors), query.color_mode, tuple(query.ordering()),
+            self.sales_version if sales else None,
+        )
+        results = self.results
+        if key in results:
+            return results[key]
+
+        mask = np.ones(len(columns['pk']), dtype=bool)
+        if query.text:
+            mask &= np.isin(columns['pk'], np.array(query.search_ids(), dtype=np.int64))
+        if query.price_min is not None:
+            mask &= columns['GiaBan'] >= query.price_min
+        if query.price_max is not None:
+            mask &= columns['GiaBan'] <= query.price_max
+        if query.category is not None:
+            mask &= columns['ChuyenMuc'] == query.category.id
+        if query.colors:
+            mask &= bitmap_mask(bitmap.index.combine([color.id for color in query.colors], query.color_mode), columns['pk'])
+
+        index = np.flatnonzero(mask)
+        selected = {name: columns[name][index] for name in ('pk', 'GiaBan', 'SoDonHang')}
+        if query.text:
+            position = {pk: i for i, pk in enumerate(query.search_ids())}
+            selected['rank'] = np.array([position[pk] for pk in selected['pk'].tolist()], dtype=np.int64)
+
+        # lexsort sắp theo khóa cuối trước, nên đảo thứ tự ordering; cột giảm dần thì lấy số đối
+        keys = []
+        for field in reversed(query.ordering()):
+            name = field.lstrip('-')
+            keys.append(-selected[name] if field.startswith('-') else selected[name])
+        order = np.lexsort(keys) if keys else np.arange(len(index))
+        result = {name: values[order] for name, values in selected.items()}
+        with self.lock:
+            if len(results) >= MAX_CACHED_RESULTS:
+                results.pop(next(iter(results)), None)
+            results[key] = result
+        return result
+
+    def page(self, query, number, per_page, token=None):
+        """Giống paginate(): trả về KeysetPage các dòng SanPhamHienThi, con trỏ dùng chung định dạng."""
+        ordering = list(query.ordering())
+        if token:
+            values, number, direction = decode_cursor(token)
+            if len(values) != len(ordering):
+                raise InvalidCursor(token)
+
+        selected = self.ordered(query)
+        item_count = len(selected['pk'])
+        start = (number - 1) * per_page
+        page_pks = selected['pk'][start:start + per_page].tolist() if number > 0 else []
+        rows = SanPhamHienThi.objects.in_bulk(page_pks)
+        items = [rows[pk] for pk in page_pks if pk in rows]
+
+        def key_values(position):
+            return [int(selected[field.lstrip('-')][position]) for field in ordering]
+
+        next_token = previous_token = None
+        if page_pks and start + per_page < item_count:
+            next_token = encode_cursor(key_values(start + len(page_pks) - 1), number + 1, 'next')
+        if page_pks and number > 1:
+            previous_token = encode_cursor(key_values(start), number - 1, 'prev')
+        return KeysetPage(items, number, per_page, item_count, next_token, previous_token)
+
+
+engine = CatalogEngine()
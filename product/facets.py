@@ -0,0 +1,103 @@
+import hashlib
+from django.core.cache import cache
+from django.db.models import Count, Q
+from website.versions import get_model_version
+from .catalog import color_filter
+from .models import ChuyenMuc, MauSac, SanPhamHienThi
+
+# Đếm số sản phẩm theo chuyên mục, màu sắc và khoảng giá cho bộ lọc đang chọn.
+# Mỗi giá trị facet là một Count(..., filter=...) trong cùng một câu aggregate trên bảng
+# SanPhamHienThi, nên cả thanh bên chỉ tốn một truy vấn dù có bao nhiêu chuyên mục/màu. Mỗi facet bỏ qua bộ lọc của chính nó
+# (đang chọn màu đỏ vẫn thấy số lượng của các màu khác) để khách có thể đổi lựa chọn.
+
+FACET_TIMEOUT = 60 * 10
+
+# (nhãn, giá từ, giá đến) - giá đến không tính
+PRICE_BUCKETS = (
+    ('Dưới 100.000đ', None, 100000),
+    ('100.000đ - 300.000đ', 100000, 300000),
+    ('300.000đ - 500.000đ', 300000, 500000),
+    ('Trên 500.000đ', 500000, None),
+)
+
+
+def _bucket_filter(price_min, price_max):
+    q = Q()
+    if price_min is not None:
+        q &= Q(GiaBan__gte=price_min)
+    if price_max is not None:
+        q &= Q(GiaBan__lt=price_max)
+    return q
+
+
+def _price_filter(query):
+    q = Q()
+    if query.price_min is not None:
+        q &= Q(GiaBan__gte=query.price_min)
+    if query.price_max is not None:
+        q &= Q(GiaBan__lte=query.price_max)
+    return q
+
+
+class Facets:
+    def __init__(self, categories, colors, prices):
+        self.categories = categories
+        self.colors = colors
+        self.prices = prices
+
+    @classmethod
+    def for_query(cls, query, categories=None, colors=None):
+        """
+        query là CatalogQuery đang hiển thị. categories/colors là danh sách giá trị facet
+        (mặc định lấy tất cả ChuyenMuc/MauSac), truyền vào khi view đã có sẵn để đỡ truy vấn.
+        """
+        categories = list(categories if categories is not None else ChuyenMuc.objects.all())
+        colors = list(colors if colors is not None else MauSac.objects.all())
+        counts = facet_counts(query, [c.id for c in categories], [m.id for m in colors])
+        selected = {color.id for color in query.colors}
+        return cls(
+            [{"id": c.id, "ten": c.TenChuyenMuc, "duongdan": c.DuongDan, "count": counts['cm_%s' % c.id]} for c in categories],
+            [{"id": m.id, "ten": m.TenMauSac, "ma": m.MaMauSac, "count": counts['ms_%s' % m.id],
+              "selected": m.id in selected} for m in colors],
+            [{"ten": label, "min": price_min, "max": price_max, "count": counts['gia_%s' % i]}
+             for i, (label, price_min, price_max) in enumerate(PRICE_BUCKETS)],
+        )
+
+    def context(self):
+        return {"facet_chuyenmuc": self.categories, "facet_mausac": self.colors, "facet_gia": self.prices}
+
+
+def facet_counts(query, category_ids, color_ids):
+    """
+    Trả về dict {'cm_<id>': n, 'ms_<id>': n, 'gia_<i>': n}, tính bằng một câu aggregate
+    và được cache theo bộ lọc cùng phiên bản các model liên quan.
+    """
+    base = SanPhamHienThi.objects.all()
+    if query.text:
+        base = base.filter(pk__in=query.search_ids())
+
+    price = _price_filter(query)
+    category = Q(ChuyenMuc_id=query.category.id) if query.category is not None else Q()
+    color = query.color_q() if query.colors else Q()
+
+    aggregates = {}
+    for pk in category_ids:
+        aggregates['cm_%s' % pk] = Count('pk', filter=price & color & Q(ChuyenMuc_id=pk))
+    for pk in color_ids:
+        aggregates['ms_%s' % pk] = Count('pk', filter=price & category & color_filter(pk))
+    for i, (label, price_min, price_max) in enumerate(PRICE_BUCKETS):
+        aggregates['gia_%s' % i] = Count('pk', filter=category & color & _bucket_filter(price_min, price_max))
+
+    if not aggregates or (query.text and not query.search_ids()):
+        return {name: 0 for name in aggregates}
+
+    params = (
+        query.search_ids() if query.text else None, query.price_min, query.price_max,
+        query.category and query.category.id, [c.id for c in query.colors], query.color_mode, sorted(aggregates),
+    )
+    key = 'facets:%s:%s' % (hashlib.md5(repr(params).encode()).hexdigest(), get_model_version(SanPhamHienThi))
+    counts = cache.get(key)
+    if counts is None:
+        counts = base.aggregate(**aggregates)
+        cache.set(key, counts, FACET_TIMEOUT)
+    return counts
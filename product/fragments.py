@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .models import SanPhamHienThi
+
+# Cache HTML thẻ sản phẩm (card) dùng chung cho trang chủ, danh sách, chuyên mục và sản phẩm liên quan.
+# Khóa gồm kiểu thẻ, id và updated_at của sản phẩm nên lưu SanPham là thẻ cũ tự hết hạn;
+# đổi màu/chuyên mục không đổi updated_at nên product/signals.py xóa thẳng các khóa đó.
+# Cả trang chỉ tốn một cache.get_many, các thẻ thiếu được render và ghi lại cùng lúc bằng set_many.
+
+CARD_TIMEOUT = 60 * 60 * 24
+
+CARD_TEMPLATES = {
+    'grid': 'product/card/grid.html',
+    'list': 'product/card/list.html',
+    'home': 'product/card/home.html',
+}
+
+
+def card_key(kind, sanpham_id, updated_at):
+    return 'the_sp:%s:%s:%s' % (kind, sanpham_id, updated_at.timestamp())
+
+
+class CardBatch:
+    """Thẻ của một trang: đã có kết quả get_many, thẻ thiếu được render cùng lúc ở lần truy cập đầu tiên."""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.html = cache.get_many(keys)
+
+    def get(self, key):
+        if key not in self.html:
+            self.render_missing()
+        return mark_safe(self.html[key])
+
+    def render_missing(self):
+        missing = {key: render_to_string(CARD_TEMPLATES[kind], {'item': item})
+                   for key, (item, kind) in self.keys.items() if key not in self.html}
+        self.html.update(missing)
+        cache.set_many(missing, CARD_TIMEOUT)
+
+
+class Cards:
+    """item.the trong template: {{ item.the.grid }}, {{ item.the.list }}..."""
+
+    def __init__(self, batch, keys):
+        self.batch = batch
+        self.keys = keys
+
+    def __getitem__(self, kind):
+        return self.batch.get(self.keys[kind])
+
+
+def render_cards(items, kinds=('grid',)):
+    """
+    Gắn item.the cho từng sản phẩm (SanPham có các cột CARD_FIELDS), đọc cache của cả trang bằng một get_many.
+    Thẻ chưa có trong cache được render khi template dùng tới (trong lúc render trang).
+    Trả về chính danh sách items để dùng tiếp trong context.
+    """
+    keys = {}
+    for item in items:
+        item.the = {kind: card_key(kind, item.id, item.updated_at) for kind in kinds}
+        keys.update((key, (item, kind)) for kind, key in item.the.items())
+    if not keys:
+        return items
+    batch = CardBatch(keys)
+    for item in items:
+        item.the = Cards(batch, item.the)
+    return items
+
+
+def invalidate_cards(sanpham_ids):
+    """Xóa thẻ đã cache của các sản phẩm (dùng khi màu/chuyên mục đổi mà updated_at không đổi)."""
+    rows = SanPhamHienThi.objects.filter(SanPham_id__in=list(sanpham_ids)).values_list('SanPham_id', 'updated_at')
+    keys = [card_key(kind, sanpham_id, updated_at) for sanpham_id, updated_at in rows for kind in CARD_TEMPLATES]
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,68 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from product import engine
+from product.catalog import CatalogQuery
+from product.models import SanPham, ChuyenMuc, MauSac, SanPhamHienThi
+
+
+class Command(BaseCommand):
+    help = 'So sánh thời gian lọc/sắp xếp/phân trang giữa truy vấn DB và bộ lọc trong bộ nhớ (numpy) trên dữ liệu giả. Dữ liệu được rollback sau khi chạy.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--so-luong', type=int, default=100000, help='Số sản phẩm giả tạo ra.')
+        parser.add_argument('--lap', type=int, default=20, help='Số lần lặp mỗi truy vấn.')
+
+    def handle(self, *args, **options):
+        if engine.np is None:
+            raise CommandError('Cần cài numpy để chạy benchmark bộ lọc trong bộ nhớ.')
+
+        with transaction.atomic():
+            queries = self.seed(options['so_luong'])
+            started = time.perf_counter()
+            engine.engine.ensure_current()
+            self.stdout.write('Dựng mảng cho %d sản phẩm: %.1f ms' % (options['so_luong'], (time.perf_counter() - started) * 1000))
+
+            self.stdout.write('%-40s %12s %12s' % ('Truy vấn', 'DB (ms)', 'numpy (ms)'))
+            for name, query, number in queries:
+                orm = self.measure(options['lap'], lambda: self.orm_page(query, number))
+                engine.engine.results.clear()
+                memory = self.measure(options['lap'], lambda: engine.engine.page(query, number, 9))
+                self.stdout.write('%-40s %12.2f %12.2f' % (name, orm, memory))
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        rng = random.Random(1)
+        categories = [ChuyenMuc.objects.create(TenChuyenMuc='Bench %d' % i) for i in range(10)]
+        colors = [MauSac.objects.create(TenMauSac='bench-%d' % i, MaMauSac='#000000') for i in range(6)]
+        SanPham.objects.bulk_create(
+            (SanPham(TenSanPham='bench-%d' % i, TenKhongDau='bench-%d' % i, GiaBan=rng.randrange(10000, 1000000, 1000), GiaKhuyenMai=1000000,
+                     MoTaNgan='', MoTaDai='', The='', ChuyenMuc=rng.choice(categories)) for i in range(count)),
+            batch_size=2000,
+        )
+        rows = SanPham.objects.filter(TenSanPham__startswith='bench-').values_list('pk', 'TenSanPham', 'GiaBan', 'ChuyenMuc_id')
+        SanPhamHienThi.objects.bulk_create(
+            (SanPhamHienThi(SanPham_id=pk, TenSanPham=ten, TenKhongDau=ten, GiaBan=gia, GiaKhuyenMai=1000000, MoTaNgan='', ChuyenMuc_id=chuyenmuc_id,
+                            DanhSachMauSac=SanPhamHienThi.danh_sach_mau_sac(rng.sample([c.id for c in colors], 2)), SoDonHang=rng.randrange(100))
+             for pk, ten, gia, chuyenmuc_id in rows.iterator()),
+            batch_size=2000,
+        )
+        return [
+            ('Mặc định, trang 1', CatalogQuery(), 1),
+            ('Giá tăng dần, trang 50', CatalogQuery(sort='tang'), 50),
+            ('Chuyên mục + giá giảm dần', CatalogQuery(category=categories[0], sort='giam'), 1),
+            ('Khoảng giá + màu + bán chạy', CatalogQuery(price_min=100000, price_max=300000, colors=[colors[0]], sort='banchay'), 1),
+        ]
+
+    def orm_page(self, query, number):
+        # Đếm và lấy trang bằng OFFSET, không dùng cache số lượng để so sánh công bằng
+        queryset = query.queryset()
+        queryset.count()
+        return list(queryset[(number - 1) * 9:number * 9])
+
+    def measure(self, repeat, function):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,46 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from order.models import ThongKeBanChay
+from product.models import SanPham, SanPhamHienThi
+from website.versions import bump_model_version
+
+
+class Command(BaseCommand):
+    help = 'Tính lại toàn bộ bảng SanPhamHienThi từ SanPham, ChuyenMuc, MauSac và ThongKeBanChay.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Số sản phẩm xử lý mỗi lô.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        count = 0
+        with transaction.atomic():
+            SanPhamHienThi.objects.all().delete()
+            last_id = 0
+            while True:
+                batch = list(SanPham.objects.filter(pk__gt=last_id).order_by('pk').select_related('ChuyenMuc')[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+                ids = [sanpham.pk for sanpham in batch]
+
+                mausac = defaultdict(list)
+                for sanpham_id, mausac_id in SanPham.MauSac.through.objects.filter(sanpham_id__in=ids).values_list('sanpham_id', 'mausac_id'):
+                    mausac[sanpham_id].append(mausac_id)
+                thongke = {row['SanPham_id']: row for row in ThongKeBanChay.objects.filter(SanPham_id__in=ids).values('SanPham_id', 'SoDonHang', 'SoLuongBan')}
+
+                SanPhamHienThi.objects.bulk_create([
+                    SanPhamHienThi.tu_san_pham(
+                        sanpham,
+                        {'TenChuyenMuc': sanpham.ChuyenMuc.TenChuyenMuc, 'DuongDan': sanpham.ChuyenMuc.DuongDan},
+                        mausac[sanpham.pk],
+                        thongke.get(sanpham.pk, {}).get('SoDonHang', 0),
+                        thongke.get(sanpham.pk, {}).get('SoLuongBan', 0),
+                    )
+                    for sanpham in batch
+                ])
+                count += len(batch)
+
+        bump_model_version(SanPhamHienThi)
+        self.stdout.write(self.style.SUCCESS('Đã tính lại SanPhamHienThi cho %d sản phẩm.' % count))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:29
+
+from django.db import migrations, models
+from website.text import fold_text
+
+
+def populate_tenkhongdau(apps, schema_editor):
+    SanPham = apps.get_model('product', 'SanPham')
+    for obj in SanPham.objects.all().iterator():
+        obj.TenKhongDau = fold_text(obj.TenSanPham)
+        obj.save(update_fields=['TenKhongDau'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_alter_sanpham_phantramgiam'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sanpham',
+            name='TenKhongDau',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_tenkhongdau, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:45
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+
+
+def populate_sanphamhienthi(apps, schema_editor):
+    SanPham = apps.get_model('product', 'SanPham')
+    SanPhamHienThi = apps.get_model('product', 'SanPhamHienThi')
+    ThongKeBanChay = apps.get_model('order', 'ThongKeBanChay')
+    mausac = defaultdict(list)
+    for sanpham_id, mausac_id in SanPham.MauSac.through.objects.values_list('sanpham_id', 'mausac_id').iterator():
+        mausac[sanpham_id].append(mausac_id)
+    thongke = {row['SanPham_id']: row for row in ThongKeBanChay.objects.values('SanPham_id', 'SoDonHang', 'SoLuongBan').iterator()}
+    rows = []
+    for sanpham in SanPham.objects.select_related('ChuyenMuc').iterator():
+        mausac_ids = sorted(set(mausac[sanpham.pk]))
+        rows.append(SanPhamHienThi(
+            SanPham_id=sanpham.pk,
+            TenSanPham=sanpham.TenSanPham,
+            TenKhongDau=sanpham.TenKhongDau,
+            GiaKhuyenMai=sanpham.GiaKhuyenMai,
+            GiaBan=sanpham.GiaBan,
+            PhanTramGiam=sanpham.PhanTramGiam,
+            MoTaNgan=sanpham.MoTaNgan,
+            AnhChinh=sanpham.AnhChinh.name,
+            DuongDan=sanpham.DuongDan,
+            TrangThai=sanpham.TrangThai,
+            ChuyenMuc_id=sanpham.ChuyenMuc_id,
+            TenChuyenMuc=sanpham.ChuyenMuc.TenChuyenMuc,
+            DuongDanChuyenMuc=sanpham.ChuyenMuc.DuongDan,
+            DanhSachMauSac=',' + ','.join(str(pk) for pk in mausac_ids) + ',' if mausac_ids else '',
+            SoDonHang=thongke.get(sanpham.pk, {}).get('SoDonHang', 0),
+            SoLuongBan=thongke.get(sanpham.pk, {}).get('SoLuongBan', 0),
+        ))
+    SanPhamHienThi.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0010_sanpham_tenkhongdau'),
+        ('order', '0009_thongkebanchay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SanPhamHienThi',
+            fields=[
+                ('SanPham', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='HienThi', serialize=False, to='product.sanpham')),
+                ('TenSanPham', models.CharField(max_length=255)),
+                ('TenKhongDau', models.CharField(blank=True, db_index=True, default='', max_length=255)),
+                ('GiaKhuyenMai', models.IntegerField()),
+                ('GiaBan', models.IntegerField()),
+                ('PhanTramGiam', models.FloatField(blank=True, null=True)),
+                ('MoTaNgan', models.TextField(max_length=255)),
+                ('AnhChinh', models.ImageField(blank=True, null=True, upload_to='uploads/')),
+                ('DuongDan', models.SlugField(blank=True, null=True)),
+                ('TrangThai', models.BooleanField(default=True)),
+                ('TenChuyenMuc', models.CharField(blank=True, default='', max_length=255)),
+                ('DuongDanChuyenMuc', models.SlugField(blank=True, null=True)),
+                ('DanhSachMauSac', models.CharField(blank=True, default='', max_length=255)),
+                ('SoDonHang', models.IntegerField(default=0)),
+                ('SoLuongBan', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ChuyenMuc', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='product.chuyenmuc')),
+            ],
+            options={
+                'verbose_name': 'Sản Phẩm Hiển Thị',
+                'verbose_name_plural': 'Sản Phẩm Hiển Thị',
+                'indexes': [models.Index(fields=['ChuyenMuc', 'SanPham'], name='hienthi_chuyenmuc_idx'), models.Index(fields=['GiaBan', 'SanPham'], name='hienthi_giaban_idx'), models.Index(fields=['-SoDonHang', 'SanPham'], name='hienthi_sodonhang_idx')],
+            },
+        ),
+        migrations.RunPython(populate_sanphamhienthi, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:56
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_updated_at(apps, schema_editor):
+    SanPham = apps.get_model('product', 'SanPham')
+    SanPhamHienThi = apps.get_model('product', 'SanPhamHienThi')
+    SanPhamHienThi.objects.update(updated_at=Subquery(SanPham.objects.filter(pk=OuterRef('SanPham_id')).values('updated_at')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_sanphamhienthi'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sanphamhienthi',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,14 @@
 from django.db import models
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
 from django.utils.text import slugify 
 from ckeditor.fields import RichTextField
+from website.text import fold_text
 
 # Create your models here.
 class SanPham(models.Model):
     TenSanPham = models.CharField(max_length=255, unique=True)
+    TenKhongDau = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)  # Tên bỏ dấu, chữ thường để tìm kiếm
     GiaKhuyenMai = models.IntegerField(blank=False, null=False)
     GiaBan = models.IntegerField(blank=False, null=False)
     #PhanTramGiam = models.IntegerField(blank=True, null=True)
@@ -30,6 +34,7 @@ class SanPham(models.Model):
         
     def save(self, *args, **kwargs):
         self.DuongDan = slugify(self.TenSanPham)
+        self.TenKhongDau = fold_text(self.TenSanPham)
         self.PhanTramGiam = ((self.GiaKhuyenMai - self.GiaBan) / self.GiaKhuyenMai) * 100
         super(SanPham, self).save(*args, **kwargs)
     
@@ -83,4 +88,89 @@ class MauSac(models.Model):
         verbose_name_plural = "Màu Sắc"
         
     def __str__(self):
-        return self.TenMauSac
\ No newline at end of file
+        return self.TenMauSac
+
+
+def _gia_tri_cot(obj, field):
+    value = getattr(obj, field)
+    # Ảnh chỉ chép đường dẫn file, không chép đối tượng FieldFile gắn với instance cũ
+    return value.name if isinstance(value, FieldFile) else value
+
+
+class SanPhamHienThi(models.Model):
+    """
+    Bảng đọc (read model) phi chuẩn hóa cho danh sách sản phẩm ở cửa hàng: mỗi dòng là bản chụp
+    một SanPham gồm các cột thẻ sản phẩm, tên/đường dẫn chuyên mục, danh sách màu và số lượng bán.
+    Lọc, sắp xếp, đếm đều chạy trên một bảng này (không JOIN ChuyenMuc/MauSac), sau đó dựng lại
+    đối tượng SanPham từ chính dòng này bằng the_san_pham() mà không truy vấn thêm.
+    Được cập nhật bởi product/signals.py, tính lại toàn bộ bằng lệnh rebuild_san_pham_hien_thi.
+    """
+    SanPham = models.OneToOneField(SanPham, on_delete=models.CASCADE, primary_key=True, related_name='HienThi')
+    TenSanPham = models.CharField(max_length=255)
+    TenKhongDau = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    GiaKhuyenMai = models.IntegerField()
+    GiaBan = models.IntegerField()
+    PhanTramGiam = models.FloatField(blank=True, null=True)
+    MoTaNgan = models.TextField(max_length=255)
+    AnhChinh = models.ImageField(upload_to='uploads/', blank=True, null=True)
+    DuongDan = models.SlugField(blank=True, null=True)
+    TrangThai = models.BooleanField(default=True)
+    ChuyenMuc = models.ForeignKey(ChuyenMuc, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    TenChuyenMuc = models.CharField(max_length=255, blank=True, default='')
+    DuongDanChuyenMuc = models.SlugField(blank=True, null=True)
+    DanhSachMauSac = models.CharField(max_length=255, blank=True, default='')  # Dạng ",1,3," để lọc bằng LIKE '%,1,%'
+    SoDonHang = models.IntegerField(default=0)
+    SoLuongBan = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)  # Chép từ SanPham.updated_at, là một phần khóa cache thẻ sản phẩm
+
+    # Các cột chép nguyên từ SanPham, cũng là các cột dùng để dựng lại SanPham cho thẻ sản phẩm
+    COT_SAN_PHAM = ('TenSanPham', 'TenKhongDau', 'GiaKhuyenMai', 'GiaBan', 'PhanTramGiam', 'MoTaNgan', 'AnhChinh', 'DuongDan', 'TrangThai', 'ChuyenMuc_id', 'updated_at')
+
+    # Phiên bản riêng của SoDonHang/SoLuongBan, tăng mỗi dòng đơn hàng. Chỉ thứ tự 'banchay' đọc phiên bản này;
+    # số lượng, facet, danh sách id vẫn theo phiên bản model nên không mất cache mỗi khi có đơn hàng.
+    PHIEN_BAN_BAN_CHAY = 'banchay'
+
+    class Meta:
+        verbose_name = "Sản Phẩm Hiển Thị"
+        verbose_name_plural = "Sản Phẩm Hiển Thị"
+        indexes = [
+            models.Index(fields=['ChuyenMuc', 'SanPham'], name='hienthi_chuyenmuc_idx'),
+            models.Index(fields=['GiaBan', 'SanPham'], name='hienthi_giaban_idx'),
+            models.Index(fields=['-SoDonHang', 'SanPham'], name='hienthi_sodonhang_idx'),
+        ]
+
+    @staticmethod
+    def danh_sach_mau_sac(mausac_ids):
+        mausac_ids = sorted(set(mausac_ids))
+        return ',' + ','.join(str(pk) for pk in mausac_ids) + ',' if mausac_ids else ''
+
+    @classmethod
+    def tu_san_pham(cls, sanpham, chuyenmuc, mausac_ids, so_don_hang=0, so_luong_ban=0):
+        values = {field: _gia_tri_cot(sanpham, field) for field in cls.COT_SAN_PHAM}
+        return cls(
+            SanPham_id=sanpham.pk,
+            TenChuyenMuc=chuyenmuc.get('TenChuyenMuc', ''),
+            DuongDanChuyenMuc=chuyenmuc.get('DuongDan'),
+            DanhSachMauSac=cls.danh_sach_mau_sac(mausac_ids),
+            SoDonHang=so_don_hang,
+            SoLuongBan=so_luong_ban,
+            **values
+        )
+
+    @classmethod
+    def cap_nhat(cls, sanpham):
+        """Chụp lại một SanPham (gọi sau khi lưu sản phẩm)."""
+        thongke = cls.objects.filter(SanPham_id=sanpham.pk).values('SoDonHang', 'SoLuongBan').first() or {}
+        chuyenmuc = ChuyenMuc.objects.filter(pk=sanpham.ChuyenMuc_id).values('TenChuyenMuc', 'DuongDan').first() or {}
+        mausac_ids = sanpham.MauSac.values_list('id', flat=True)
+        cls.tu_san_pham(sanpham, chuyenmuc, mausac_ids, thongke.get('SoDonHang', 0), thongke.get('SoLuongBan', 0)).save()
+
+    def the_san_pham(self):
+        """Dựng đối tượng SanPham (chỉ có các cột thẻ sản phẩm, cột khác hoãn tải) từ dòng này."""
+        values = {field: _gia_tri_cot(self, field) for field in self.COT_SAN_PHAM}
+        values['id'] = self.SanPham_id
+        field_names = [field.attname for field in SanPham._meta.concrete_fields if field.attname in values]
+        return SanPham.from_db(self._state.db, field_names, [values[name] for name in field_names])
+
+    def __str__(self):
+        return self.TenSanPham
@@ -0,0 +1,82 @@
+from collections import defaultdict
+from django.db.models import F
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from website.versions import bump_model_version, bump_version_on_commit
+from .models import SanPham, ChuyenMuc, MauSac, SanPhamHienThi
+from . import bitmap
+from .fragments import invalidate_cards
+
+# Giữ bảng SanPhamHienThi, chỉ mục bitmap màu và cache thẻ sản phẩm khớp với SanPham, ChuyenMuc, MauSac và số lượng bán.
+# SanPhamHienThi không nối signal phiên bản (website/signals.py), mọi chỗ ghi ở đây tự tăng phiên bản.
+
+
+def cap_nhat_mau_sac(sanpham_ids):
+    sanpham_ids = list(sanpham_ids)
+    if not sanpham_ids:
+        return
+    mausac = defaultdict(list)
+    for sanpham_id, mausac_id in SanPham.MauSac.through.objects.filter(sanpham_id__in=sanpham_ids).values_list('sanpham_id', 'mausac_id'):
+        mausac[sanpham_id].append(mausac_id)
+    for sanpham_id in sanpham_ids:
+        SanPhamHienThi.objects.filter(SanPham_id=sanpham_id).update(DanhSachMauSac=SanPhamHienThi.danh_sach_mau_sac(mausac[sanpham_id]))
+    bitmap.index.set_products({sanpham_id: mausac[sanpham_id] for sanpham_id in sanpham_ids})
+    invalidate_cards(sanpham_ids)
+    # update() không phát post_save nên tự tăng phiên bản để cache số lượng theo màu hết hạn
+    bump_model_version(SanPhamHienThi)
+
+
+@receiver(post_save, sender=SanPham)
+def hienthi_on_product_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        SanPhamHienThi.cap_nhat(instance)
+        bump_model_version(SanPhamHienThi)
+
+
+@receiver(m2m_changed, sender=SanPham.MauSac.through)
+def hienthi_on_color_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # sanpham.MauSac.add/remove/clear
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            cap_nhat_mau_sac([instance.pk])
+    elif action == 'pre_clear':
+        # mausac.SanPham.clear(): ghi lại các sản phẩm bị ảnh hưởng trước khi xóa liên kết
+        instance._hienthi_sanpham_ids = list(instance.SanPham.values_list('id', flat=True))
+    elif action == 'post_clear':
+        cap_nhat_mau_sac(getattr(instance, '_hienthi_sanpham_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        cap_nhat_mau_sac(pk_set or [])
+
+
+@receiver(post_delete, sender=SanPham)
+def bitmap_on_product_delete(sender, instance, **kwargs):
+    bitmap.index.set_products({instance.pk: []})
+    # Dòng SanPhamHienThi bị xóa theo CASCADE (fast delete, không phát signal)
+    bump_model_version(SanPhamHienThi)
+
+
+@receiver(post_save, sender=ChuyenMuc)
+def hienthi_on_category_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        SanPhamHienThi.objects.filter(ChuyenMuc_id=instance.pk).update(TenChuyenMuc=instance.TenChuyenMuc, DuongDanChuyenMuc=instance.DuongDan)
+        invalidate_cards(SanPhamHienThi.objects.filter(ChuyenMuc_id=instance.pk).values_list('SanPham_id', flat=True))
+        bump_model_version(SanPhamHienThi)
+
+
+@receiver(pre_delete, sender=MauSac)
+def hienthi_before_color_delete(sender, instance, **kwargs):
+    instance._hienthi_sanpham_ids = list(instance.SanPham.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=MauSac)
+def hienthi_on_color_delete(sender, instance, **kwargs):
+    cap_nhat_mau_sac(getattr(instance, '_hienthi_sanpham_ids', []))
+
+
+@receiver(post_save, sender='order.ChiTietDonHang')
+def hienthi_on_order_line(sender, instance, created=False, raw=False, **kwargs):
+    # Cùng cách đếm với ThongKeBanChay: mỗi dòng chi tiết đơn hàng là một lần bán
+    if created and not raw:
+        SanPhamHienThi.objects.filter(SanPham_id=instance.SanPham_id).update(SoDonHang=F('SoDonHang') + 1, SoLuongBan=F('SoLuongBan') + instance.SoLuong)
+        # Chỉ thứ tự 'banchay' đổi theo số lượng bán, không tăng phiên bản của cả SanPhamHienThi
+        bump_version_on_commit(SanPhamHienThi.PHIEN_BAN_BAN_CHAY)
@@ -4,7 +4,7 @@ from django.test import Client, RequestFactory
 from django.utils.text import slugify
 
 from product.views import DetailProduct
-from .models import ChuyenMuc, SanPham, MauSac
+from .models import ChuyenMuc, SanPham, MauSac, SanPhamHienThi
 from django.db import transaction
 from django.core.files.base import ContentFile  # Để mock file hình ảnh
 import re  # Để kiểm tra tên file với chuỗi ngẫu nhiên
@@ -959,6 +959,29 @@ def test_sanpham_without_discount(sample_category):
 
 
 
+
+@pytest.mark.django_db(transaction=True)
+def test_sanpham_tenkhongdau(sample_category):
+    """
+    Mục tiêu của test:
+        - Xác minh rằng cột TenKhongDau được cập nhật khi lưu sản phẩm.
+
+    Input:
+        - TenSanPham: 'Áo Đen BTS'
+
+    Expected Output:
+        - saved_product.TenKhongDau == 'ao den bts'
+        - Tìm kiếm 'ao den' và 'ÁO ĐEN' trên trang sản phẩm đều trả về sản phẩm này
+    """
+    sanpham = SanPham.objects.create(TenSanPham='Áo Đen BTS', GiaBan=100000, GiaKhuyenMai=120000, MoTaNgan='Áo', MoTaDai='<p>Áo</p>', ChuyenMuc=sample_category)
+    saved_product = SanPham.objects.get(id=sanpham.id)
+    assert saved_product.TenKhongDau == 'ao den bts'
+
+    client = Client()
+    for keyword in ('ao den', 'ÁO ĐEN', 'ao den b'):
+        response = client.get(reverse('product'), {'s': keyword}, HTTP_HOST='localhost')
+        assert [p.id for p in response.context['sanpham']] == [sanpham.id]
+
 # Fixtures
 @pytest.fixture
 def client():
@@ -1515,6 +1538,662 @@ def test_detail_product_view_related_products(client, sample_products):
 
 
 
+@pytest.mark.django_db
+def test_product_view_combined_search_color_price(client, sample_products, sample_colors):
+    """
+    Mục tiêu của test:
+        - Kiểm tra kết hợp đồng thời tìm kiếm, lọc màu, lọc giá và sắp xếp trong một truy vấn.
+
+    Input:
+        - GET request tới URL 'product' với s='Áo Kpop', mau='Đen', min='100000', max='200000', sap_xep='giam'.
+
+    Expected Output:
+        - response.status_code == 200
+        - Sản phẩm màu Đen trong khoảng giá: Áo Kpop 0, 3, 6, 9 (giá 100000, 130000, 160000, 190000)
+        - Thứ tự giá giảm dần
+        - response.context['item_count'] == 4
+
+    Ghi chú:
+        - Trước đây view chỉ áp dụng một bộ lọc duy nhất.
+    """
+    response = client.get(reverse('product'), {'s': 'Áo Kpop', 'mau': 'Đen', 'min': '100000', 'max': '200000', 'sap_xep': 'giam'}, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    products = list(response.context['sanpham'])
+    assert [p.GiaBan for p in products] == [190000, 160000, 130000, 100000]
+    assert response.context['item_count'] == 4
+
+@pytest.mark.django_db
+def test_product_view_search_is_paginated(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra kết quả tìm kiếm được phân trang và link phân trang giữ nguyên bộ lọc.
+
+    Input:
+        - GET request tới URL 'product' với s='Áo Kpop', trang=2.
+
+    Expected Output:
+        - len(response.context['sanpham']) == 6 (15 kết quả, 9 sản phẩm/trang)
+        - response.context['query_string'] == 's=%C3%81o+Kpop&'
+    """
+    response = client.get(reverse('product'), {'s': 'Áo Kpop', 'trang': '2'}, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    assert len(response.context['sanpham']) == 6
+    assert response.context['page'] == 2
+    assert response.context['query_string'] == 's=%C3%81o+Kpop&'
+
+
+
+@pytest.mark.django_db
+def test_product_view_keyset_next_page(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra phân trang theo con trỏ: đi theo next_token của trang 1 cho kết quả giống trang 2 dùng OFFSET.
+
+    Input:
+        - GET 'product' với sap_xep='giam', sau đó GET với sau=<next_token>.
+
+    Expected Output:
+        - Trang theo con trỏ giống trang=2
+        - response.context['page'] == 2, có previous_token, không còn next_token
+    """
+    first = client.get(reverse('product'), {'sap_xep': 'giam'}, HTTP_HOST='localhost')
+    token = first.context['next_token']
+    assert token is not None
+
+    by_cursor = client.get(reverse('product'), {'sap_xep': 'giam', 'sau': token}, HTTP_HOST='localhost')
+    by_offset = client.get(reverse('product'), {'sap_xep': 'giam', 'trang': '2'}, HTTP_HOST='localhost')
+    assert [p.id for p in by_cursor.context['sanpham']] == [p.id for p in by_offset.context['sanpham']]
+    assert by_cursor.context['page'] == 2
+    assert by_cursor.context['next_token'] is None
+    assert by_cursor.context['previous_token'] is not None
+
+    back = client.get(reverse('product'), {'sap_xep': 'giam', 'sau': by_cursor.context['previous_token']}, HTTP_HOST='localhost')
+    assert [p.id for p in back.context['sanpham']] == [p.id for p in first.context['sanpham']]
+    assert back.context['page'] == 1
+
+@pytest.mark.django_db
+def test_product_view_keyset_invalid_token(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra con trỏ không hợp lệ hiển thị trang lỗi.
+
+    Input:
+        - GET 'product' với sau='khong-hop-le'.
+
+    Expected Output:
+        - b"404" in response.content
+    """
+    response = client.get(reverse('product'), {'sau': 'khong-hop-le'}, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    assert b"404" in response.content
+
+@pytest.mark.django_db
+def test_product_view_count_is_cached(client, sample_products, django_assert_num_queries):
+    """
+    Mục tiêu của test:
+        - Kiểm tra tổng số sản phẩm được cache, chỉ đếm lại khi SanPham thay đổi.
+
+    Expected Output:
+        - Lần gọi thứ hai không chạy lại COUNT
+        - Sau khi thêm sản phẩm, item_count được cập nhật
+    """
+    from product.catalog import CatalogQuery
+    from website.pagination import cached_count
+
+    queryset = CatalogQuery().queryset()
+    assert cached_count(queryset) == 15
+    with django_assert_num_queries(0):
+        assert cached_count(queryset) == 15
+
+    SanPham.objects.create(TenSanPham="Áo Kpop Mới", GiaBan=1000, GiaKhuyenMai=2000, ChuyenMuc=sample_products[0].ChuyenMuc)
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert response.context['item_count'] == 16
+
+@pytest.mark.django_db
+def test_product_view_facet_counts(client, sample_products, sample_colors, django_assert_num_queries):
+    """
+    Mục tiêu của test:
+        - Kiểm tra số lượng theo chuyên mục, màu sắc và khoảng giá được tính cho bộ lọc hiện tại trong một truy vấn.
+
+    Input:
+        - GET request tới URL 'product' với mau='Đen', sau đó thêm min='150000'.
+        - Gọi facet_counts trực tiếp.
+
+    Expected Output:
+        - Facet màu bỏ qua bộ lọc màu: mỗi màu 5 sản phẩm; khi min=150000: Đen 3, Trắng 3, Xanh 4
+        - Facet giá và chuyên mục áp dụng bộ lọc màu: 5 sản phẩm màu Đen trong khoảng 100.000đ - 300.000đ
+        - facet_counts chạy đúng 1 truy vấn, lần sau lấy từ cache
+    """
+    from product.catalog import CatalogQuery
+    from product.facets import facet_counts
+
+    response = client.get(reverse('product'), {'mau': 'Đen'}, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    assert [item['count'] for item in response.context['facet_mausac']] == [5, 5, 5]
+    assert [item['count'] for item in response.context['facet_gia']] == [0, 5, 0, 0]
+    assert [item['count'] for item in response.context['facet_chuyenmuc']] == [5]
+    assert [item['selected'] for item in response.context['facet_mausac']] == [True, False, False]
+
+    response = client.get(reverse('product'), {'mau': 'Đen', 'min': '150000'}, HTTP_HOST='localhost')
+    assert [item['count'] for item in response.context['facet_mausac']] == [3, 3, 4]
+
+    query = CatalogQuery(price_max=200000)
+    category_ids = [sample_products[0].ChuyenMuc_id]
+    color_ids = [color.id for color in sample_colors]
+    with django_assert_num_queries(1):
+        counts = facet_counts(query, category_ids, color_ids)
+    assert counts['cm_%s' % category_ids[0]] == 11
+    with django_assert_num_queries(0):
+        assert facet_counts(query, category_ids, color_ids) == counts
+
+@pytest.mark.django_db
+def test_related_products_random_sample(client, sample_products, django_assert_num_queries):
+    """
+    Mục tiêu của test:
+        - Kiểm tra sản phẩm liên quan được lấy ngẫu nhiên từ danh sách id đã cache, không dùng ORDER BY RAND().
+
+    Input:
+        - GET request tới URL 'detail_product' với slug='ao-kpop-0'.
+        - Gọi random_sample hai lần với cùng queryset.
+
+    Expected Output:
+        - 4 sản phẩm khác nhau, không gồm sản phẩm đang xem
+        - Lần gọi thứ hai chỉ chạy 1 truy vấn lấy theo khóa chính
+        - Tập ứng viên ít hơn k thì trả về tất cả
+    """
+    from website.sampling import random_sample
+
+    response = client.get(reverse('detail_product', kwargs={'slug': 'ao-kpop-0'}), HTTP_HOST='localhost')
+    related_ids = [p.id for p in response.context['sanphamlienquan']]
+    assert len(related_ids) == 4
+    assert len(set(related_ids)) == 4
+    assert sample_products[0].id not in related_ids
+
+    queryset = SanPham.objects.filter(ChuyenMuc=sample_products[0].ChuyenMuc)
+    random_sample(queryset, 4)
+    with django_assert_num_queries(1):
+        sample = random_sample(queryset, 4)
+    assert len(sample) == 4
+    assert len(random_sample(queryset.filter(GiaBan__lt=120000), 4)) == 2
+
+@pytest.mark.django_db
+def test_product_listing_query_budget(client, sample_products, django_assert_max_num_queries, settings):
+    """
+    Mục tiêu của test:
+        - Giữ số truy vấn của trang danh sách sản phẩm cố định và không tải cột MoTaDai/ảnh phụ cho thẻ sản phẩm.
+
+    Input:
+        - GET request tới URL 'product' (lần thứ hai, tổng số đã được cache).
+
+    Expected Output:
+        - Không quá 8 truy vấn (không tăng theo số sản phẩm trên trang)
+        - Câu SELECT sản phẩm không có MoTaDai, AnhPhu1; các đối tượng trong context hoãn tải MoTaDai
+
+    Ghi chú:
+        - Tắt cache cả trang để đo truy vấn của chính view.
+    """
+    settings.PAGE_CACHE_ENABLED = False
+    client.get(reverse('product'), HTTP_HOST='localhost')
+    with django_assert_max_num_queries(8) as queries:
+        response = client.get(reverse('product'), HTTP_HOST='localhost')
+
+    product_sql = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and 'product_sanpham' in q['sql'].split('FROM')[1]]
+    assert product_sql
+    assert all('MoTaDai' not in sql and 'AnhPhu1' not in sql for sql in product_sql)
+    for item in response.context['sanpham']:
+        assert {'MoTaDai', 'AnhPhu1', 'AnhPhu2', 'AnhPhu3'} <= item.get_deferred_fields()
+
+@pytest.mark.django_db
+def test_sanphamhienthi_is_kept_in_sync(sample_products, sample_colors, sample_category):
+    """
+    Mục tiêu của test:
+        - Kiểm tra bảng SanPhamHienThi được cập nhật theo SanPham, màu sắc, chuyên mục, đơn hàng và lệnh tính lại.
+
+    Input:
+        - Sửa giá sản phẩm, thêm/bớt màu từ hai phía, đổi tên chuyên mục, thêm chi tiết đơn hàng, chạy rebuild_san_pham_hien_thi.
+
+    Expected Output:
+        - Các cột trong SanPhamHienThi khớp với dữ liệu mới
+        - Lệnh tính lại cho kết quả giống bảng được cập nhật tăng dần
+    """
+    from django.core.management import call_command
+
+    sanpham = sample_products[0]
+    sanpham.GiaBan = 99000
+    sanpham.save()
+    hienthi = SanPhamHienThi.objects.get(SanPham=sanpham)
+    assert hienthi.GiaBan == 99000
+    assert hienthi.TenChuyenMuc == 'Áo Kpop'
+    assert hienthi.DanhSachMauSac == ',%d,' % sample_colors[0].id
+
+    sanpham.MauSac.add(sample_colors[2])
+    sample_colors[1].SanPham.add(sanpham)
+    assert SanPhamHienThi.objects.get(SanPham=sanpham).DanhSachMauSac == ',%d,%d,%d,' % tuple(color.id for color in sample_colors)
+    sample_colors[1].SanPham.clear()
+    sample_colors[2].delete()
+    assert SanPhamHienThi.objects.get(SanPham=sanpham).DanhSachMauSac == ',%d,' % sample_colors[0].id
+
+    sample_category.TenChuyenMuc = 'Áo Thun Kpop'
+    sample_category.save()
+    assert SanPhamHienThi.objects.get(SanPham=sanpham).DuongDanChuyenMuc == 'ao-thun-kpop'
+
+    khachhang = KhachHang.objects.create(User=User.objects.create_user(username='hienthi', password='12345'))
+    donhang = DonHang.objects.create(KhachHang=khachhang, SoDienThoai='0912345678', DiaChi='Ha Noi', TongTien=0)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=sanpham, SoLuong=3)
+    hienthi = SanPhamHienThi.objects.get(SanPham=sanpham)
+    assert (hienthi.SoDonHang, hienthi.SoLuongBan) == (1, 3)
+
+    fields = [field.attname for field in SanPhamHienThi._meta.concrete_fields if field.attname != 'updated_at']
+    before = list(SanPhamHienThi.objects.order_by('pk').values_list(*fields))
+    call_command('rebuild_san_pham_hien_thi', batch_size=4)
+    assert list(SanPhamHienThi.objects.order_by('pk').values_list(*fields)) == before
+
+@pytest.mark.django_db
+def test_product_listing_reads_single_table(client, sample_products, django_assert_num_queries):
+    """
+    Mục tiêu của test:
+        - Kiểm tra trang danh sách lọc/sắp xếp trên một bảng SanPhamHienThi và dựng SanPham không cần truy vấn thêm.
+
+    Input:
+        - GET request tới URL 'product' với mau='Đen', sap_xep='banchay' sau khi có đơn hàng cho 'Áo Kpop 3'.
+
+    Expected Output:
+        - 'Áo Kpop 3' đứng đầu; câu truy vấn danh sách không JOIN bảng màu sắc
+        - Đọc các cột thẻ của sản phẩm trong context không chạy thêm truy vấn
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    khachhang = KhachHang.objects.create(User=User.objects.create_user(username='banchay', password='12345'))
+    donhang = DonHang.objects.create(KhachHang=khachhang, SoDienThoai='0912345678', DiaChi='Ha Noi', TongTien=0)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=sample_products[3], SoLuong=1)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('product'), {'mau': 'Đen', 'sap_xep': 'banchay'}, HTTP_HOST='localhost')
+    products = list(response.context['sanpham'])
+    assert products[0].TenSanPham == 'Áo Kpop 3'
+    listing_sql = [q['sql'] for q in queries.captured_queries if 'DanhSachMauSac' in q['sql'] and 'LIMIT' in q['sql']]
+    assert listing_sql and all('JOIN' not in sql for sql in listing_sql)
+    with django_assert_num_queries(0):
+        assert [(p.id, p.GiaBan, p.DuongDan, p.AnhChinh.name) for p in products]
+
+@pytest.mark.django_db
+def test_order_line_bumps_only_sales_version(sample_products, sample_category):
+    """
+    Mục tiêu của test:
+        - Kiểm tra dòng đơn hàng mới chỉ tăng phiên bản bán chạy, không tăng phiên bản của SanPhamHienThi
+          (cache số lượng, facet, danh sách id giữ nguyên), chỉ trang sắp xếp bán chạy đổi khóa cache.
+
+    Input:
+        - ChiTietDonHang cho 'Áo Kpop 3'; khóa page cache của trang chuyên mục có và không có sap_xep='banchay'.
+
+    Expected Output:
+        - Phiên bản SanPhamHienThi không đổi, phiên bản bán chạy đổi
+        - Khóa trang sap_xep='banchay' đổi, khóa trang mặc định giữ nguyên
+    """
+    from website import pagecache
+    from website.versions import get_model_version, get_version
+
+    def page_keys():
+        keys = []
+        for params in ({}, {'sap_xep': 'banchay'}):
+            request = RequestFactory().get(reverse('detail_category', kwargs={'slug': sample_category.DuongDan}), params)
+            keys.append(pagecache.page_key(request, 'detail_category', pagecache.normalized_params(request.GET)))
+        return keys
+
+    version, sales_version = get_model_version(SanPhamHienThi), get_version(SanPhamHienThi.PHIEN_BAN_BAN_CHAY)
+    default_key, sales_key = page_keys()
+
+    khachhang = KhachHang.objects.create(User=User.objects.create_user(username='banchay', password='12345'))
+    donhang = DonHang.objects.create(KhachHang=khachhang, SoDienThoai='0912345678', DiaChi='Ha Noi', TongTien=0)
+    ChiTietDonHang.objects.create(DonHang=donhang, SanPham=sample_products[3], SoLuong=1)
+
+    assert SanPhamHienThi.objects.get(SanPham=sample_products[3]).SoDonHang == 1
+    assert get_model_version(SanPhamHienThi) == version
+    assert get_version(SanPhamHienThi.PHIEN_BAN_BAN_CHAY) != sales_version
+    new_default_key, new_sales_key = page_keys()
+    assert new_default_key == default_key and new_sales_key != sales_key
+
+@pytest.mark.django_db
+def test_admin_search_uses_folded_prefix(sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra tìm kiếm sản phẩm trong admin bỏ dấu từ khóa và tìm theo đầu chuỗi TenKhongDau (dùng được index).
+
+    Input:
+        - get_search_results của SanPhamAdmin với q='ÁO  KPOP 1' và q='kpop'.
+
+    Expected Output:
+        - 'ÁO  KPOP 1' tìm thấy 'Áo Kpop 1', 'Áo Kpop 10'...'Áo Kpop 14'; câu SQL là LIKE 'ao kpop 1%', không có '%ao kpop 1%'
+        - 'kpop' không khớp đầu tên nào
+    """
+    from django.contrib import admin
+
+    model_admin = admin.site._registry[SanPham]
+    request = RequestFactory().get('/')
+    queryset, _ = model_admin.get_search_results(request, SanPham.objects.all(), 'ÁO  KPOP 1')
+    assert sorted(p.TenSanPham for p in queryset) == sorted(p.TenSanPham for p in sample_products if p.TenSanPham.startswith('Áo Kpop 1'))
+    assert 'LIKE ao kpop 1%' in str(queryset.query) and '%ao' not in str(queryset.query)
+
+    queryset, _ = model_admin.get_search_results(request, SanPham.objects.all(), 'kpop')
+    assert not queryset.exists()
+
+@pytest.mark.django_db
+def test_catalog_engine_matches_orm(sample_products, sample_colors, sample_category):
+    """
+    Mục tiêu của test:
+        - Kiểm tra bộ lọc trong bộ nhớ (numpy) cho cùng kết quả, tổng số và con trỏ như truy vấn DB.
+
+    Input:
+        - Các tổ hợp lọc giá, màu, chuyên mục, tìm kiếm và sắp xếp, trang 1 và 2.
+        - Sửa giá một sản phẩm sau khi đã dựng mảng.
+
+    Expected Output:
+        - Danh sách id, item_count, next_token, previous_token giống hệt đường DB
+        - Mảng được dựng lại theo phiên bản sau khi sản phẩm thay đổi
+
+    Ghi chú:
+        - Bỏ qua khi chưa cài numpy.
+    """
+    pytest.importorskip('numpy')
+    from product.catalog import CatalogQuery
+    from product.engine import engine
+    from website.pagination import paginate
+
+    def compare():
+        combos = [
+            CatalogQuery(),
+            CatalogQuery(sort='giam'),
+            CatalogQuery(price_min=120000, price_max=200000, sort='tang'),
+            CatalogQuery(colors=[sample_colors[1]], sort='moi'),
+            CatalogQuery(category=sample_category, sort='banchay'),
+            CatalogQuery(text='Áo Kpop'),
+        ]
+        for query in combos:
+            for number in (1, 2):
+                expected = paginate(query.queryset(), query.ordering(), 9, number)
+                actual = engine.page(query, number, 9)
+                assert [row.pk for row in actual.items] == [row.pk for row in expected.items]
+                assert (actual.item_count, actual.next_token, actual.previous_token) == (expected.item_count, expected.next_token, expected.previous_token)
+
+    compare()
+    sanpham = sample_products[4]
+    sanpham.GiaBan = 1
+    sanpham.save()
+    compare()
+
+
+@pytest.mark.django_db
+def test_product_view_filter_multiple_colors(client, sample_products, sample_colors):
+    """
+    Mục tiêu của test:
+        - Kiểm tra lọc nhiều màu cùng lúc theo chế độ "hoặc" (mặc định) và "và", kết hợp lọc giá.
+
+    Input:
+        - Sản phẩm 0 và 3 có thêm màu Trắng (vốn là màu Đen).
+        - GET 'product' với mau=Đen&mau=Trắng, có và không có ket_hop=va, max=150000.
+
+    Expected Output:
+        - hoac: 10 sản phẩm (màu Đen hoặc Trắng)
+        - va: chỉ sản phẩm 0 và 3
+        - va + max=150000: chỉ sản phẩm 0 và 3 (giá 100000, 130000)
+        - Link màu Trắng bỏ màu Trắng khỏi bộ lọc, link màu Xanh thêm màu Xanh
+
+    Ghi chú:
+        - Điều kiện màu lấy từ chỉ mục bitmap, không JOIN bảng màu.
+    """
+    den, trang, xanh = sample_colors
+    sample_products[0].MauSac.add(trang)
+    sample_products[3].MauSac.add(trang)
+
+    response = client.get(reverse('product'), {'mau': ['Đen', 'Trắng'], 'trang': 1}, HTTP_HOST='localhost')
+    assert response.context['item_count'] == 10
+    facet = {item['ten']: item for item in response.context['facet_mausac']}
+    assert facet['Đen']['selected'] and facet['Trắng']['selected'] and not facet['Xanh']['selected']
+    assert 'Tr%E1%BA%AFng' not in facet['Trắng']['query_string'] and 'trang=' not in facet['Trắng']['query_string']
+    assert facet['Xanh']['query_string'].count('mau=') == 3
+    assert response.context['ket_hop'] == 'hoac'
+
+    response = client.get(reverse('product'), {'mau': ['Đen', 'Trắng'], 'ket_hop': 'va'}, HTTP_HOST='localhost')
+    assert sorted(p.id for p in response.context['sanpham']) == [sample_products[0].id, sample_products[3].id]
+
+    response = client.get(reverse('product'), {'mau': ['Đen', 'Trắng'], 'ket_hop': 'VA', 'max': 150000}, HTTP_HOST='localhost')
+    assert sorted(p.id for p in response.context['sanpham']) == [sample_products[0].id, sample_products[3].id]
+
+    response = client.get(reverse('product'), {'mau': ['Đen', 'Không Có']}, HTTP_HOST='localhost')
+    assert b"404" in response.content
+
+@pytest.mark.django_db
+def test_color_filter_falls_back_to_like_for_large_sets(sample_products, sample_colors, monkeypatch):
+    """
+    Mục tiêu của test:
+        - Kiểm tra bộ lọc màu khớp nhiều sản phẩm hơn MAX_COLOR_IDS dùng LIKE trên DanhSachMauSac thay vì id__in.
+
+    Input:
+        - Sản phẩm 0 và 3 có thêm màu Trắng; lọc Đen + Trắng theo "hoặc" và "và" với MAX_COLOR_IDS = 1000 và 1.
+
+    Expected Output:
+        - Cùng danh sách sản phẩm và cùng số facet ở cả hai cách
+        - Với MAX_COLOR_IDS = 1 câu SQL không có danh sách id sản phẩm
+    """
+    from django.core.cache import cache
+    from product import catalog
+    from product.facets import facet_counts
+
+    den, trang, xanh = sample_colors
+    sample_products[0].MauSac.add(trang)
+    sample_products[3].MauSac.add(trang)
+    color_ids = [color.id for color in sample_colors]
+
+    for mode in ('hoac', 'va'):
+        query = catalog.CatalogQuery(colors=[den, trang], color_mode=mode)
+        expected = list(query.queryset().values_list('pk', flat=True))
+        counts = facet_counts(query, [], color_ids)
+
+        monkeypatch.setattr(catalog, 'MAX_COLOR_IDS', 1)
+        cache.clear()  # facet_counts được cache theo bộ lọc, không theo câu SQL
+        query = catalog.CatalogQuery(colors=[den, trang], color_mode=mode)
+        assert 'DanhSachMauSac' in str(query.queryset().query) and ' IN (' not in str(query.queryset().query)
+        assert list(query.queryset().values_list('pk', flat=True)) == expected
+        assert facet_counts(query, [], color_ids) == counts
+        monkeypatch.setattr(catalog, 'MAX_COLOR_IDS', 1000)
+
+@pytest.mark.django_db
+def test_color_bitmap_index_updates_incrementally(sample_products, sample_colors):
+    """
+    Mục tiêu của test:
+        - Kiểm tra chỉ mục bitmap màu được cập nhật tăng dần khi đổi màu/xóa sản phẩm và nạp lại từ bản nén trong cache.
+
+    Input:
+        - Thêm/bỏ màu của sản phẩm, xóa một sản phẩm, sau đó mô phỏng tiến trình khác (bitmap trống).
+
+    Expected Output:
+        - ids/count khớp với bảng SanPham_MauSac sau mỗi thay đổi
+        - Tiến trình khác nạp bản nén mà không truy vấn DB
+
+    Ghi chú:
+        - Không cần dựng lại từ DB sau mỗi thay đổi.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from product import bitmap
+
+    den, trang, xanh = sample_colors
+
+    def expected(mausac):
+        return sorted(mausac.SanPham.values_list('id', flat=True))
+
+    assert bitmap.index.ids([den.id]) == expected(den)
+    sample_products[1].MauSac.add(xanh)
+    sample_products[2].MauSac.remove(xanh)
+    assert bitmap.index.ids([xanh.id]) == expected(xanh)
+    assert bitmap.index.ids([trang.id, xanh.id], bitmap.AND) == [sample_products[1].id]
+    assert bitmap.index.count([den.id, trang.id, xanh.id]) == 14
+
+    sample_products[0].delete()
+    assert bitmap.index.ids([den.id]) == expected(den)
+
+    other = bitmap.ColorIndex()
+    mong_doi = sorted(expected(den) + expected(xanh))
+    with CaptureQueriesContext(connection) as queries:
+        assert other.ids([den.id, xanh.id]) == mong_doi
+    assert len(queries.captured_queries) == 0
+
+@pytest.mark.django_db
+def test_color_bitmap_index_skips_snapshot_after_concurrent_change(sample_products, sample_colors, monkeypatch):
+    """
+    Mục tiêu của test:
+        - Kiểm tra bản nén bitmap không được lưu khi tiến trình khác tăng phiên bản xen giữa lúc cập nhật.
+
+    Input:
+        - Tiến trình khác thêm màu Xanh cho sản phẩm 1 và tăng phiên bản ngay trước bump_version của set_products.
+
+    Expected Output:
+        - Tiến trình mới đọc chỉ mục thấy cả hai thay đổi (dựng lại từ bảng SanPham_MauSac, không dùng bản nén thiếu)
+    """
+    from product import bitmap
+
+    den, trang, xanh = sample_colors
+    assert bitmap.index.ids([xanh.id]) == sorted(xanh.SanPham.values_list('id', flat=True))
+    bump_version = bitmap.bump_version
+
+    def concurrent_bump(name):
+        # Tiến trình khác ghi liên kết màu (không qua signal của tiến trình này) và tăng phiên bản trước
+        SanPham.MauSac.through.objects.create(sanpham_id=sample_products[1].id, mausac_id=xanh.id)
+        bump_version(name)
+        return bump_version(name)
+
+    monkeypatch.setattr(bitmap, 'bump_version', concurrent_bump)
+    SanPham.MauSac.through.objects.filter(sanpham_id=sample_products[2].id, mausac_id=xanh.id).delete()
+    bitmap.index.set_products({sample_products[2].id: []})
+    monkeypatch.setattr(bitmap, 'bump_version', bump_version)
+
+    expected = sorted(xanh.SanPham.values_list('id', flat=True))
+    assert sample_products[1].id in expected and sample_products[2].id not in expected
+    assert bitmap.ColorIndex().ids([xanh.id]) == expected
+    assert bitmap.index.ids([xanh.id]) == expected
+
+@pytest.mark.django_db(transaction=True)
+def test_color_bitmap_index_ignores_rolled_back_changes(sample_products, sample_colors):
+    """
+    Mục tiêu của test:
+        - Kiểm tra chỉ mục bitmap chỉ nhận thay đổi màu sau khi transaction commit.
+
+    Input:
+        - Thêm màu Xanh cho sản phẩm 1 trong transaction.atomic() rồi rollback; sau đó thêm lại và commit.
+
+    Expected Output:
+        - Rollback: chỉ mục (kể cả tiến trình khác nạp bản nén) không có sản phẩm 1
+        - Commit: chỉ mục có sản phẩm 1
+    """
+    from django.db import transaction
+    from product import bitmap
+
+    den, trang, xanh = sample_colors
+    expected = sorted(xanh.SanPham.values_list('id', flat=True))
+    assert bitmap.index.ids([xanh.id]) == expected
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            sample_products[1].MauSac.add(xanh)
+            raise RuntimeError
+    assert bitmap.index.ids([xanh.id]) == expected
+    assert bitmap.ColorIndex().ids([xanh.id]) == expected
+
+    with transaction.atomic():
+        sample_products[1].MauSac.add(xanh)
+        assert bitmap.index.ids([xanh.id]) == expected
+    assert bitmap.index.ids([xanh.id]) == sorted(expected + [sample_products[1].id])
+
+@pytest.mark.django_db
+def test_product_card_fragment_cache(client, sample_products, sample_colors, sample_category):
+    """
+    Mục tiêu của test:
+        - Kiểm tra thẻ sản phẩm được cache theo id + updated_at và hết hạn khi sản phẩm, màu hoặc chuyên mục đổi.
+
+    Input:
+        - Xem trang 'product' hai lần, sau đó sửa tên sản phẩm, thêm màu, đổi tên chuyên mục.
+
+    Expected Output:
+        - Lần xem thứ hai không render lại template thẻ nào
+        - Sau mỗi thay đổi, đúng thẻ của sản phẩm bị ảnh hưởng được render lại
+
+    Ghi chú:
+        - Thẻ được đọc bằng một cache.get_many cho cả trang.
+    """
+    from django.core.cache import cache
+    from product.fragments import card_key, render_cards
+    from product.catalog import cards
+
+    def card_templates(response):
+        return [t.name for t in response.templates if t.name.startswith('product/card/')]
+
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert card_templates(response).count('product/card/grid.html') == 9
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert card_templates(response) == []
+
+    sanpham = sample_products[0]
+    sanpham.TenSanPham = 'Áo Kpop Mới'
+    sanpham.save()
+    assert card_templates(client.get(reverse('product'), HTTP_HOST='localhost')) == ['product/card/grid.html', 'product/card/list.html']
+    assert 'Áo Kpop Mới' in client.get(reverse('product'), HTTP_HOST='localhost').content.decode()
+
+    hienthi = SanPhamHienThi.objects.get(SanPham=sample_products[1])
+    assert cache.get(card_key('grid', hienthi.SanPham_id, hienthi.updated_at)) is not None
+    sample_products[1].MauSac.add(sample_colors[2])
+    assert cache.get(card_key('grid', hienthi.SanPham_id, hienthi.updated_at)) is None
+
+    sample_category.TenChuyenMuc = 'Chuyên Mục Mới'
+    sample_category.save()
+    assert card_templates(client.get(reverse('product'), HTTP_HOST='localhost')).count('product/card/grid.html') == 9
+
+    items = render_cards(cards(SanPhamHienThi.objects.order_by('pk')[:3]), ('grid',))
+    assert 'THÊM GIỎ HÀNG' in items[0].the['grid']
+
+@pytest.mark.django_db
+def test_detail_product_conditional_get(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra trang chi tiết sản phẩm trả 304 khi trình duyệt đã có bản mới nhất.
+
+    Input:
+        - GET 'detail_product', sau đó GET lại với If-None-Match / If-Modified-Since.
+        - Đổi tên chuyên mục (tag, không có thời điểm thay đổi) và sửa sản phẩm rồi gửi lại ETag cũ.
+
+    Expected Output:
+        - Lần đầu 200 có ETag, không có Last-Modified
+        - Gửi lại ETag: 304, không render template; chỉ gửi If-Modified-Since: 200
+        - Sau khi đổi chuyên mục hoặc sửa sản phẩm: 200 với ETag mới
+    """
+    from django.utils.http import http_date
+
+    sanpham = sample_products[0]
+    url = reverse('detail_product', kwargs={'slug': sanpham.DuongDan})
+    response = client.get(url, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    etag = response['ETag']
+    assert not response.has_header('Last-Modified')
+
+    response = client.get(url, HTTP_HOST='localhost', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.templates == []
+    assert client.get(url, HTTP_HOST='localhost', HTTP_IF_MODIFIED_SINCE=http_date()).status_code == 200
+
+    chuyenmuc = sanpham.ChuyenMuc
+    chuyenmuc.TenChuyenMuc = 'Áo Thun Kpop'
+    chuyenmuc.save()
+    response = client.get(url, HTTP_HOST='localhost', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    sanpham.GiaBan = 99000
+    sanpham.save()
+    response = client.get(url, HTTP_HOST='localhost', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
 # @pytest.fixture
 # def sample_colors():
 #     return [
@@ -2,109 +2,62 @@ from django.shortcuts import render, redirect
 from django.views import View
 from .models import * 
 from order.models import *
-from django.db.models import Count
+from .catalog import CatalogQuery, cards
+from .facets import Facets
+from .fragments import render_cards
+from website.conditional import conditional_get
+from website.pagination import page_query_string, replace_query_string, toggle_query_string
+from website.sampling import random_sample
+from search.bktree import suggester
 # Create your views here.
 template_error = '404error.html'
 
 class Product(View):
     template_name = 'product/product.html'
+    items_per_page = 9
     
     def get(self, request):
-        sanpham = SanPham.objects.all()
-        item_count = sanpham.count()
-        items_per_page = 9 
-        page_count = item_count // items_per_page + (1 if item_count % items_per_page > 0 else 0)
+        top_products = ThongKeBanChay.top(5)
         
-        top_products = ChiTietDonHang.objects.values('SanPham_id', 'SanPham__TenSanPham', 'SanPham__GiaBan', 'SanPham__GiaKhuyenMai', 'SanPham__PhanTramGiam', 'SanPham__AnhChinh', 'SanPham__DuongDan') \
-        .annotate(count=Count('SanPham_id')) \
-        .order_by('-count')[:5]
-        
-        if(request.GET.get('trang') is not None):
-            try:
-                page = int(request.GET.get('trang'))
-                start_index = (page - 1) * items_per_page
-                end_index = start_index + items_per_page
-                if page > page_count or page <= 0:
-                    return render(request, template_error)
-                else:
-                    pre_page = 1 if(page == 1) else page - 1
-                    next_page = page_count if(page == page_count) else page + 1
-                    sanpham = sanpham[int(start_index):int(end_index)]
-                    chuyenmuc = ChuyenMuc.objects.all().filter()
-                    if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "giam":
-                        sanpham = SanPham.objects.all().filter().order_by('-GiaBan')[int(start_index):int(end_index)]
-                    if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "tang":
-                        sanpham = SanPham.objects.all().filter().order_by('GiaBan')[int(start_index):int(end_index)]
-                    if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "moi":
-                        sanpham = SanPham.objects.all().filter().order_by('-id')[int(start_index):int(end_index)]
-                    number_page = [i for i in range(1, page_count + 1)]
-                    data = {"top_products": top_products, "sanpham": sanpham, "chuyenmuc": chuyenmuc, 'page_count': number_page, "title": "Sản Phẩm KPOP Chất Lượng, Giá Rẻ!", "page": page, "pre_page": pre_page, "next_page": next_page, "len_page_count": len(number_page)}
-                    return render(request, self.template_name, data)
-            except:
-                return render(request, template_error)
-        elif request.GET.get('s') is not None:
-            try:
-                tensanpham = request.GET.get('s')
-                sanpham = SanPham.objects.all().filter(TenSanPham__icontains=tensanpham)
-                chuyenmuc = ChuyenMuc.objects.all().filter()
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "giam":
-                    sanpham = SanPham.objects.all().filter(TenSanPham__icontains=tensanpham).order_by('-GiaBan')
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "tang":
-                    sanpham = SanPham.objects.all().filter(TenSanPham__icontains=tensanpham).order_by('GiaBan')
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "moi":
-                    sanpham = SanPham.objects.all().filter(TenSanPham__icontains=tensanpham).order_by('-id')
-                data = {"top_products": top_products, "sanpham": sanpham, "chuyenmuc": chuyenmuc, "title": "Sản Phẩm KPOP Chất Lượng, Giá Rẻ!"}
-                return render(request, self.template_name, data)
-            except:
-                return render(request, template_error)
-        elif (request.GET.get('min') is not None) and (request.GET.get('max') is not None):
-            try:
-                min = int(request.GET.get('min'))
-                max = int(request.GET.get('max'))
-                sanpham = SanPham.objects.all().filter(GiaBan__range=(min, max))
-                chuyenmuc = ChuyenMuc.objects.all().filter()
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "giam":
-                    sanpham = SanPham.objects.all().filter(GiaBan__range=(min, max)).order_by('-GiaBan')
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "tang":
-                    sanpham = SanPham.objects.all().filter(GiaBan__range=(min, max)).order_by('GiaBan')
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "moi":
-                    sanpham = SanPham.objects.all().filter(GiaBan__range=(min, max)).order_by('-id')
-                data = {"top_products": top_products, "sanpham": sanpham, "chuyenmuc": chuyenmuc, "title": "Sản Phẩm KPOP Chất Lượng, Giá Rẻ!"}
-                return render(request, self.template_name, data)
-            except:
-                return render(request, template_error)
-        elif request.GET.get('mau') is not None:
-            try:
-                mau = str(request.GET.get('mau')).capitalize()
-                mausac = MauSac.objects.all().get(TenMauSac=mau)
-                sanpham = SanPham.objects.all().filter(MauSac=mausac)
-                chuyenmuc = ChuyenMuc.objects.all().filter()
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "giam":
-                    sanpham = SanPham.objects.all().filter(MauSac=mausac).order_by('-GiaBan')
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "tang":
-                    sanpham = SanPham.objects.all().filter(MauSac=mausac).order_by('GiaBan')
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "moi":
-                    sanpham = SanPham.objects.all().filter(MauSac=mausac).order_by('-id')
-                data = {"top_products": top_products, "sanpham": sanpham, "chuyenmuc": chuyenmuc, "title": "Sản Phẩm KPOP Chất Lượng, Giá Rẻ!"}
-                return render(request, self.template_name, data)
-            except:
-                return render(request, template_error)
-        else:
-            try:
-                sanpham = SanPham.objects.all().filter()[:9]
-                chuyenmuc = ChuyenMuc.objects.all().filter()
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "giam":
-                    sanpham = SanPham.objects.all().filter().order_by('-GiaBan')[:9]
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "tang":
-                    sanpham = SanPham.objects.all().filter().order_by('GiaBan')[:9]
-                if (request.GET.get('sap_xep') is not None) and request.GET.get('sap_xep').lower() == "moi":
-                    sanpham = SanPham.objects.all().filter().order_by('-id')[:9]
-                number_page = [i for i in range(1, page_count + 1)]
-                data = {"top_products": top_products, "sanpham": sanpham, "chuyenmuc": chuyenmuc, 'page_count': number_page, "title": "Sản Phẩm KPOP Chất Lượng, Giá Rẻ!", "page": 1, "len_page_count": len(number_page)}
-                return render(request, self.template_name, data)
-            except:
+        try:
+            page = int(request.GET.get('trang', 1))
+            query = CatalogQuery.from_params(request.GET)
+            catalog_page = query.page(page, self.items_per_page, request.GET.get('sau'))
+            if not catalog_page.is_valid():
                 return render(request, template_error)
+            
+            chuyenmuc = ChuyenMuc.objects.all()
+            data = {
+                "top_products": top_products, 
+                "chuyenmuc": chuyenmuc, 
+                "title": "Sản Phẩm KPOP Chất Lượng, Giá Rẻ!", 
+                "query_string": page_query_string(request.GET),
+                "gia_query_string": page_query_string(request.GET, ('min', 'max')),
+            }
+            data.update(catalog_page.context('sanpham'))
+            render_cards(data["sanpham"], ('grid', 'list'))
+            data.update(Facets.for_query(query, categories=chuyenmuc).context())
+            for item in data["facet_mausac"]:
+                item["query_string"] = toggle_query_string(request.GET, 'mau', item["ten"])
+            if len(query.colors) > 1:
+                # Đổi giữa "có một trong các màu" và "có tất cả các màu"
+                data["ket_hop"] = query.color_mode
+                data["ket_hop_query_string"] = page_query_string(request.GET, ('ket_hop',))
+            if query.text and catalog_page.item_count == 0:
+                # Không có kết quả: gợi ý từ khóa gần đúng (thường là gõ sai tên nhóm nhạc)
+                data["goi_y"] = suggester.suggest(query.text)
+                if data["goi_y"]:
+                    # Link gợi ý giữ chuyên mục, giá, màu và sắp xếp đang chọn
+                    data["goi_y_query_string"] = replace_query_string(request.GET, 's', data["goi_y"])
+            return render(request, self.template_name, data)
+        except:
+            return render(request, template_error)
+
+def product_last_modified(request, slug):
+    return SanPham.objects.filter(DuongDan=slug).values_list('updated_at', flat=True).first()
+
 
+@conditional_get(product_last_modified, tags=('product.sanphamhienthi', 'product.mausac', 'order.dongmua'))
 class DetailProduct(View):
     template_name = 'product/detail.html'
 
@@ -114,8 +67,12 @@ class DetailProduct(View):
         
         try:
             sanpham = SanPham.objects.all().get(DuongDan=slug)
-            sanphamlienquan = SanPham.objects.all().filter(ChuyenMuc=sanpham.ChuyenMuc).order_by('?')[:4]
-            data = {"sanpham": sanpham, "title": "Sản Phẩm " + sanpham.TenSanPham, "sanphamlienquan": sanphamlienquan}
+            # Ưu tiên sản phẩm hay được mua cùng, thiếu thì lấy ngẫu nhiên trong cùng chuyên mục
+            sanphamlienquan = DongMua.mua_kem(sanpham.id, 4)
+            if len(sanphamlienquan) < 4:
+                exclude = {sanpham.id} | {item.id for item in sanphamlienquan}
+                sanphamlienquan += cards(random_sample(SanPhamHienThi.objects.filter(ChuyenMuc_id=sanpham.ChuyenMuc_id), 4 - len(sanphamlienquan), exclude=exclude))
+            data = {"sanpham": sanpham, "title": "Sản Phẩm " + sanpham.TenSanPham, "sanphamlienquan": render_cards(sanphamlienquan)}
             return render(request, self.template_name, data)
         except:
             return render(request, template_error)
@@ -0,0 +1,124 @@
+import threading
+from collections import Counter
+from website.versions import get_model_version
+from .index import tokenize
+
+# Gợi ý "Có phải bạn muốn tìm" bằng BK-tree trên từ vựng của tên và thẻ sản phẩm.
+# BK-tree dựa vào bất đẳng thức tam giác của khoảng cách Levenshtein: khi tìm trong bán kính r
+# quanh từ q, tại nút có khoảng cách d chỉ cần đi xuống các nhánh có nhãn trong [d - r, d + r],
+# nên số lần tính khoảng cách tăng chậm hơn nhiều so với số từ trong từ vựng.
+
+
+def levenshtein(a, b):
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    def __init__(self, distance=levenshtein):
+        self.distance = distance
+        self.root = None
+        self.size = 0
+        self.comparisons = 0  # Số lần tính khoảng cách ở lần tìm gần nhất (dùng cho benchmark)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = self.distance(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """Trả về [(khoảng cách, từ)] trong bán kính max_distance, sắp theo khoảng cách."""
+        self.comparisons = 0
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            d = self.distance(word, node_word)
+            self.comparisons += 1
+            if d <= max_distance:
+                results.append((d, node_word))
+            for label in range(max(1, d - max_distance), d + max_distance + 1):
+                child = children.get(label)
+                if child is not None:
+                    stack.append(child)
+        results.sort()
+        return results
+
+
+def max_distance_for(word):
+    return 1 if len(word) <= 4 else 2
+
+
+class Suggester:
+    def __init__(self):
+        self.tree = BKTree()
+        self.frequency = Counter()
+        self.version = None
+        self.lock = threading.Lock()
+
+    def build(self):
+        from product.models import SanPham
+        frequency = Counter()
+        for ten, the in SanPham.objects.values_list('TenSanPham', 'The').iterator():
+            frequency.update(token for token in tokenize(ten) + tokenize(the) if not token.isdigit())
+        tree = BKTree()
+        # Thêm từ phổ biến trước để cây cân đối hơn và kết quả ổn định
+        for token, count in sorted(frequency.items(), key=lambda item: (-item[1], item[0])):
+            tree.add(token)
+        self.tree, self.frequency = tree, frequency
+
+    def ensure_current(self):
+        from product.models import SanPham
+        version = get_model_version(SanPham)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.build()
+                    self.version = version
+
+    def correct(self, token):
+        if token in self.frequency or token.isdigit() or len(token) < 3:
+            return token
+        matches = self.tree.search(token, max_distance_for(token))
+        if not matches:
+            return token
+        best_distance = matches[0][0]
+        candidates = [word for distance, word in matches if distance == best_distance]
+        return max(candidates, key=lambda word: (self.frequency[word], word))
+
+    def suggest(self, text):
+        """Câu tìm kiếm đã sửa chính tả, hoặc None nếu không có gì để sửa."""
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        self.ensure_current()
+        corrected = [self.correct(token) for token in tokens]
+        if corrected == tokens:
+            return None
+        return ' '.join(corrected)
+
+
+suggester = Suggester()
@@ -0,0 +1,138 @@
+import math
+import re
+from collections import Counter, defaultdict
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Avg, Case, Count, IntegerField, Value, When
+from django.utils.html import strip_tags
+from website.text import fold_text
+from .models import TaiLieuTimKiem, ChiMucTimKiem
+
+# Các nguồn được đánh chỉ mục: loại -> (model, [(trường, trọng số)], cột tên không dấu)
+# Trọng số nhân số lần xuất hiện, nên tên sản phẩm/tiêu đề được ưu tiên hơn mô tả.
+SOURCES = {
+    'sanpham': ('product.SanPham', (('TenSanPham', 3), ('The', 2), ('MoTaNgan', 1)), 'TenKhongDau'),
+    'tintuc': ('news.TinTuc', (('TieuDe', 3), ('The', 2), ('NoiDung', 1)), 'TieuDeKhongDau'),
+}
+
+# Tham số BM25
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [token[:64] for token in TOKEN_RE.findall(fold_text(strip_tags(str(text))))]
+
+
+def source_model(loai):
+    return apps.get_model(SOURCES[loai][0])
+
+
+def source_for(model):
+    label = model._meta.label
+    for loai, (model_label, fields, folded_field) in SOURCES.items():
+        if model_label == label:
+            return loai
+    return None
+
+
+def document_terms(loai, obj):
+    terms = Counter()
+    for field, weight in SOURCES[loai][1]:
+        for token in tokenize(getattr(obj, field, '')):
+            terms[token] += weight
+    return terms
+
+
+def index_object(loai, obj):
+    terms = document_terms(loai, obj)
+    with transaction.atomic():
+        tailieu, created = TaiLieuTimKiem.objects.get_or_create(Loai=loai, MaDoiTuong=obj.pk)
+        if not created:
+            tailieu.ChiMuc.all().delete()
+        tailieu.DoDai = sum(terms.values())
+        tailieu.save()
+        ChiMucTimKiem.objects.bulk_create(
+            [ChiMucTimKiem(TuKhoa=token, TaiLieu=tailieu, Loai=loai, TanSuat=tf) for token, tf in terms.items()]
+        )
+
+
+def remove_object(loai, pk):
+    TaiLieuTimKiem.objects.filter(Loai=loai, MaDoiTuong=pk).delete()
+
+
+def reindex(loai, batch_size=500):
+    TaiLieuTimKiem.objects.filter(Loai=loai).delete()
+    count = 0
+    for obj in source_model(loai).objects.all().order_by('pk').iterator(chunk_size=batch_size):
+        index_object(loai, obj)
+        count += 1
+    return count
+
+
+def search_ids(loai, text, limit=None):
+    """
+    Trả về danh sách id đối tượng chứa tất cả từ khóa, sắp theo điểm BM25 giảm dần.
+    Mặc định trả về mọi kết quả (như icontains trước đây) để tổng số và thanh số trang đúng; limit để lấy top-k.
+    Chỉ đọc các dòng chỉ mục của những từ khóa trong câu tìm kiếm (tra theo index Loai, TuKhoa).
+    Không có kết quả thì thử tìm theo tiền tố trên cột tên không dấu (khách gõ dở chữ cuối).
+    """
+    terms = list(dict.fromkeys(tokenize(text)))
+    if not terms:
+        return []
+
+    ids = _ranked_ids(loai, terms, limit)
+    if not ids:
+        ids = prefix_ids(loai, text, limit)
+    return ids
+
+
+def prefix_ids(loai, text, limit=None):
+    """Tra theo tiền tố trên cột không dấu có index, ví dụ 'ao bt' khớp 'Áo BTS'."""
+    model_label, fields, folded_field = SOURCES[loai]
+    prefix = ' '.join(tokenize(text))
+    if not prefix:
+        return []
+    return list(source_model(loai).objects.filter(**{folded_field + '__startswith': prefix}).order_by(folded_field, 'pk').values_list('pk', flat=True)[:limit])
+
+
+def _ranked_ids(loai, terms, limit):
+    postings = ChiMucTimKiem.objects.filter(Loai=loai, TuKhoa__in=terms) \
+        .values_list('TuKhoa', 'TanSuat', 'TaiLieu__MaDoiTuong', 'TaiLieu__DoDai')
+
+    by_term = defaultdict(list)
+    for term, tf, pk, length in postings:
+        by_term[term].append((pk, tf, length))
+    if len(by_term) < len(terms):
+        return []
+
+    stats = TaiLieuTimKiem.objects.filter(Loai=loai).aggregate(n=Count('id'), avgdl=Avg('DoDai'))
+    n = stats['n'] or 0
+    avgdl = stats['avgdl'] or 1
+
+    scores = None
+    for term in terms:
+        rows = by_term[term]
+        df = len(rows)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        term_scores = {}
+        for pk, tf, length in rows:
+            term_scores[pk] = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avgdl))
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {pk: score + term_scores[pk] for pk, score in scores.items() if pk in term_scores}
+        if not scores:
+            return []
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [pk for pk, score in ranked[:limit]]
+
+
+def rank_expression(ids):
+    """Biểu thức SQL trả về vị trí của id trong danh sách kết quả để ORDER BY theo điểm."""
+    return Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)], default=Value(len(ids)), output_field=IntegerField())
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from search.index import SOURCES, reindex
+
+
+class Command(BaseCommand):
+    help = 'Đánh chỉ mục lại toàn bộ sản phẩm và tin tức cho tìm kiếm.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('loai', nargs='*', help='Chỉ đánh lại chỉ mục cho các loại này (mặc định: tất cả).')
+
+    def handle(self, *args, **options):
+        for loai in options['loai']:
+            if loai not in SOURCES:
+                raise CommandError('Loại không hợp lệ: %s (chọn trong: %s)' % (loai, ', '.join(SOURCES)))
+        for loai in options['loai'] or SOURCES:
+            count = reindex(loai)
+            self.stdout.write(self.style.SUCCESS('Đã đánh chỉ mục %d %s.' % (count, loai)))
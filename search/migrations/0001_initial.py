@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaiLieuTimKiem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('Loai', models.CharField(max_length=20)),
+                ('MaDoiTuong', models.BigIntegerField()),
+                ('DoDai', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tài Liệu Tìm Kiếm',
+                'verbose_name_plural': 'Tài Liệu Tìm Kiếm',
+                'constraints': [models.UniqueConstraint(fields=('Loai', 'MaDoiTuong'), name='tailieu_loai_madoituong_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChiMucTimKiem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('TuKhoa', models.CharField(max_length=64)),
+                ('Loai', models.CharField(max_length=20)),
+                ('TanSuat', models.IntegerField(default=1)),
+                ('TaiLieu', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ChiMuc', to='search.tailieutimkiem')),
+            ],
+            options={
+                'verbose_name': 'Chỉ Mục Tìm Kiếm',
+                'verbose_name_plural': 'Chỉ Mục Tìm Kiếm',
+                'indexes': [models.Index(fields=['Loai', 'TuKhoa'], name='chimuc_loai_tukhoa_idx')],
+            },
+        ),
+    ]
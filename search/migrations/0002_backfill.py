@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def backfill_index(apps, schema_editor):
+    from search.index import SOURCES, document_terms
+    TaiLieuTimKiem = apps.get_model('search', 'TaiLieuTimKiem')
+    ChiMucTimKiem = apps.get_model('search', 'ChiMucTimKiem')
+    for loai, (model_label, fields, folded_field) in SOURCES.items():
+        model = apps.get_model(model_label)
+        for obj in model.objects.all().iterator():
+            terms = document_terms(loai, obj)
+            tailieu = TaiLieuTimKiem.objects.create(Loai=loai, MaDoiTuong=obj.pk, DoDai=sum(terms.values()))
+            ChiMucTimKiem.objects.bulk_create(
+                [ChiMucTimKiem(TuKhoa=token, TaiLieu=tailieu, Loai=loai, TanSuat=tf) for token, tf in terms.items()]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('product', '0009_alter_sanpham_phantramgiam'),
+        ('news', '0004_alter_tintuc_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
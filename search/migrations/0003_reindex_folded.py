@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def reindex_folded(apps, schema_editor):
+    # Bộ tách từ đã chuyển sang bỏ dấu nên phải dựng lại các từ khóa cũ
+    from search.index import SOURCES, document_terms
+    TaiLieuTimKiem = apps.get_model('search', 'TaiLieuTimKiem')
+    ChiMucTimKiem = apps.get_model('search', 'ChiMucTimKiem')
+    TaiLieuTimKiem.objects.all().delete()
+    for loai, (model_label, fields, folded_field) in SOURCES.items():
+        model = apps.get_model(model_label)
+        for obj in model.objects.all().iterator():
+            terms = document_terms(loai, obj)
+            tailieu = TaiLieuTimKiem.objects.create(Loai=loai, MaDoiTuong=obj.pk, DoDai=sum(terms.values()))
+            ChiMucTimKiem.objects.bulk_create(
+                [ChiMucTimKiem(TuKhoa=token, TaiLieu=tailieu, Loai=loai, TanSuat=tf) for token, tf in terms.items()]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_backfill'),
+        ('product', '0010_sanpham_tenkhongdau'),
+        ('news', '0005_tintuc_tieudekhongdau'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_folded, migrations.RunPython.noop),
+    ]
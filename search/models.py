@@ -0,0 +1,37 @@
+from django.db import models
+
+# Chỉ mục ngược cho tìm kiếm sản phẩm và tin tức.
+# Mỗi đối tượng được đánh chỉ mục là một TaiLieuTimKiem, mỗi từ khóa của nó là một ChiMucTimKiem.
+
+class TaiLieuTimKiem(models.Model):
+    Loai = models.CharField(max_length=20)  # 'sanpham' hoặc 'tintuc'
+    MaDoiTuong = models.BigIntegerField()
+    DoDai = models.IntegerField(default=0)  # Tổng số từ (đã nhân trọng số trường)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Tài Liệu Tìm Kiếm"
+        verbose_name_plural = "Tài Liệu Tìm Kiếm"
+        constraints = [
+            models.UniqueConstraint(fields=['Loai', 'MaDoiTuong'], name='tailieu_loai_madoituong_uniq'),
+        ]
+
+    def __str__(self):
+        return self.Loai + ": " + str(self.MaDoiTuong)
+
+
+class ChiMucTimKiem(models.Model):
+    TuKhoa = models.CharField(max_length=64)
+    TaiLieu = models.ForeignKey(TaiLieuTimKiem, on_delete=models.CASCADE, related_name='ChiMuc')
+    Loai = models.CharField(max_length=20)
+    TanSuat = models.IntegerField(default=1)
+
+    class Meta:
+        verbose_name = "Chỉ Mục Tìm Kiếm"
+        verbose_name_plural = "Chỉ Mục Tìm Kiếm"
+        indexes = [
+            models.Index(fields=['Loai', 'TuKhoa'], name='chimuc_loai_tukhoa_idx'),
+        ]
+
+    def __str__(self):
+        return self.TuKhoa + " - " + str(self.TaiLieu)
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .index import SOURCES, source_for, index_object, remove_object
+from . import typeahead
+
+
+def index_on_save(sender, instance, raw=False, **kwargs):
+    loai = source_for(sender)
+    if loai is not None and not raw:
+        index_object(loai, instance)
+
+
+def remove_on_delete(sender, instance, **kwargs):
+    loai = source_for(sender)
+    if loai is not None:
+        remove_object(loai, instance.pk)
+
+
+# Chỉ nối với các model được đánh chỉ mục, để QuerySet.delete() của model khác vẫn fast delete
+for loai, (model_label, fields, folded_field) in SOURCES.items():
+    post_save.connect(index_on_save, sender=model_label, dispatch_uid='search_save:' + loai)
+    post_delete.connect(remove_on_delete, sender=model_label, dispatch_uid='search_delete:' + loai)
+
+
+@receiver(post_save, sender='product.SanPham')
+def typeahead_on_product_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        typeahead.index.update('sanpham', instance.pk, typeahead.product_entry(instance.TenSanPham, instance.DuongDan))
+
+
+@receiver(post_save, sender='product.ChuyenMuc')
+def typeahead_on_category_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        typeahead.index.update('chuyenmuc', instance.pk, typeahead.category_entry(instance.TenChuyenMuc, instance.DuongDan))
+
+
+@receiver(post_delete, sender='product.SanPham')
+def typeahead_on_product_delete(sender, instance, **kwargs):
+    typeahead.index.update('sanpham', instance.pk)
+
+
+@receiver(post_delete, sender='product.ChuyenMuc')
+def typeahead_on_category_delete(sender, instance, **kwargs):
+    typeahead.index.update('chuyenmuc', instance.pk)
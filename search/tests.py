@@ -0,0 +1,188 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.http import QueryDict
+from product.models import ChuyenMuc, SanPham
+from news.models import TinTuc
+from search.index import search_ids, tokenize
+from search.models import TaiLieuTimKiem, ChiMucTimKiem
+
+
+@pytest.fixture
+def sample_products(db):
+    chuyenmuc = ChuyenMuc.objects.create(TenChuyenMuc="Album")
+    products = [
+        SanPham.objects.create(TenSanPham="Album BTS Proof", MoTaNgan="Album mới", The="bts,album", GiaBan=1000, GiaKhuyenMai=2000, ChuyenMuc=chuyenmuc),
+        SanPham.objects.create(TenSanPham="Lightstick Blackpink", MoTaNgan="Quà tặng fan BTS", The="blackpink", GiaBan=1000, GiaKhuyenMai=2000, ChuyenMuc=chuyenmuc),
+        SanPham.objects.create(TenSanPham="Áo Twice", MoTaNgan="Áo thun", The="twice", GiaBan=1000, GiaKhuyenMai=2000, ChuyenMuc=chuyenmuc),
+    ]
+    return products
+
+
+def test_tokenize_strips_html_and_lowercases():
+    """
+    Mục tiêu: Kiểm tra tách từ bỏ thẻ HTML và chuyển về chữ thường.
+    Input: '<p>Album BTS</p>'.
+    Expected Output: ['album', 'bts'].
+    """
+    assert tokenize('<p>Album BTS</p>') == ['album', 'bts']
+
+
+def test_index_is_updated_on_save(sample_products):
+    """
+    Mục tiêu: Kiểm tra chỉ mục được cập nhật khi lưu và xóa SanPham.
+    Input: Đổi tên sản phẩm, sau đó xóa sản phẩm.
+    Expected Output: Từ khóa mới tìm thấy được, từ khóa cũ không còn; sau khi xóa không còn tài liệu.
+    """
+    sanpham = sample_products[2]
+    sanpham.TenSanPham = "Áo Seventeen"
+    sanpham.save()
+    assert search_ids('sanpham', 'seventeen') == [sanpham.id]
+    assert search_ids('sanpham', 'twice') == [sanpham.id]  # vẫn còn trong thẻ The
+
+    sanpham.delete()
+    assert not TaiLieuTimKiem.objects.filter(Loai='sanpham', MaDoiTuong=sanpham.id).exists()
+
+
+def test_search_ranks_title_matches_first(sample_products):
+    """
+    Mục tiêu: Kiểm tra xếp hạng BM25: sản phẩm có từ khóa trong tên và thẻ đứng trước sản phẩm chỉ có trong mô tả.
+    Input: 'bts'.
+    Expected Output: [Album BTS Proof, Lightstick Blackpink].
+    """
+    assert search_ids('sanpham', 'bts') == [sample_products[0].id, sample_products[1].id]
+
+
+def test_search_requires_all_terms(sample_products):
+    """
+    Mục tiêu: Kiểm tra tìm kiếm nhiều từ chỉ trả về sản phẩm chứa tất cả các từ.
+    Input: 'bts proof' và 'bts twice'.
+    Expected Output: chỉ Album BTS Proof; không có kết quả.
+    """
+    assert search_ids('sanpham', 'bts proof') == [sample_products[0].id]
+    assert search_ids('sanpham', 'bts twice') == []
+
+
+def test_reindex_command(sample_products):
+    """
+    Mục tiêu: Kiểm tra lệnh reindex_search dựng lại chỉ mục từ đầu.
+    Input: Xóa toàn bộ chỉ mục rồi chạy lệnh.
+    Expected Output: Tìm lại được sản phẩm và tin tức.
+    """
+    tintuc = TinTuc.objects.create(TieuDe="BTS trở lại", AnhChinh="uploads/a.jpg", The="bts", NoiDung="<p>Comeback</p>")
+    TaiLieuTimKiem.objects.all().delete()
+    assert search_ids('sanpham', 'bts') == []
+
+    call_command('reindex_search')
+
+    assert search_ids('sanpham', 'bts') == [sample_products[0].id, sample_products[1].id]
+    assert search_ids('tintuc', 'comeback') == [tintuc.id]
+    assert ChiMucTimKiem.objects.filter(Loai='tintuc', TuKhoa='comeback').count() == 1
+
+
+def test_product_view_uses_ranked_search(client, sample_products):
+    """
+    Mục tiêu: Kiểm tra trang sản phẩm trả kết quả tìm kiếm theo độ liên quan khi không chọn sắp xếp.
+    Input: GET /san-pham/?s=bts.
+    Expected Output: Album BTS Proof đứng đầu, tổng 2 kết quả.
+    """
+    response = client.get(reverse('product'), {'s': 'BTS'}, HTTP_HOST='testserver')
+    assert [p.id for p in response.context['sanpham']] == [sample_products[0].id, sample_products[1].id]
+    assert response.context['item_count'] == 2
+
+
+def test_news_view_lists_all_on_empty_search(client, sample_products):
+    """
+    Mục tiêu: Kiểm tra trang tin tức với ô tìm kiếm gửi trống vẫn hiển thị tất cả tin, có từ khóa thì lọc theo chỉ mục.
+    Input: Hai tin tức; GET /tin-tuc/?s= , ?s=%20 và ?s=comeback.
+    Expected Output: 2 tin khi từ khóa trống; chỉ tin "BTS trở lại" khi tìm comeback.
+    """
+    tintuc = TinTuc.objects.create(TieuDe="BTS trở lại", AnhChinh="uploads/a.jpg", The="bts", NoiDung="<p>Comeback</p>")
+    TinTuc.objects.create(TieuDe="Twice ra mắt", AnhChinh="uploads/b.jpg", The="twice", NoiDung="<p>Debut</p>")
+
+    for text in ('', ' '):
+        response = client.get(reverse('list_news'), {'s': text}, HTTP_HOST='testserver')
+        assert response.context['item_count'] == 2
+    response = client.get(reverse('list_news'), {'s': 'comeback'}, HTTP_HOST='testserver')
+    assert [t.id for t in response.context['tintuc']] == [tintuc.id]
+
+
+def test_autocomplete_prefix_lookup(client, sample_products):
+    """
+    Mục tiêu: Kiểm tra endpoint gợi ý trả về sản phẩm/chuyên mục có từ bắt đầu bằng tiền tố, không phân biệt dấu.
+    Input: GET /tim-kiem/goi-y/?q=ao tw và ?q=alb.
+    Expected Output: 'Áo Twice'; 'Album BTS Proof' và chuyên mục 'Album'.
+    """
+    response = client.get(reverse('autocomplete'), {'q': 'ao tw'}, HTTP_HOST='testserver')
+    assert [item['ten'] for item in response.json()['goiy']] == ['Áo Twice']
+
+    response = client.get(reverse('autocomplete'), {'q': 'ALB'}, HTTP_HOST='testserver')
+    assert sorted(item['ten'] for item in response.json()['goiy']) == ['Album', 'Album BTS Proof']
+
+
+def test_autocomplete_updates_incrementally(client, sample_products, django_assert_num_queries):
+    """
+    Mục tiêu: Kiểm tra chỉ mục gợi ý được cập nhật khi SanPham thay đổi và tra cứu không truy vấn DB.
+    Input: Đổi tên sản phẩm, xóa sản phẩm rồi tra cứu.
+    Expected Output: Tên mới xuất hiện, tên cũ và sản phẩm đã xóa biến mất; 0 truy vấn khi tra cứu.
+    """
+    from search.typeahead import index
+    index.lookup('bts')
+
+    sanpham = sample_products[2]
+    sanpham.TenSanPham = "Áo Seventeen"
+    sanpham.save()
+    with django_assert_num_queries(0):
+        assert [item['ten'] for item in index.lookup('seven')] == ['Áo Seventeen']
+        assert index.lookup('twice') == []
+
+    sample_products[0].delete()
+    with django_assert_num_queries(0):
+        assert [item['ten'] for item in index.lookup('proof')] == []
+
+
+def test_product_view_suggests_correction_when_empty(client, sample_products):
+    """
+    Mục tiêu: Kiểm tra trang sản phẩm gợi ý từ khóa gần đúng khi tìm kiếm không có kết quả.
+    Input: GET /san-pham/?s=blakpink (gõ sai) kèm giá, sắp xếp, trang và ?s=bts (có kết quả).
+    Expected Output: goi_y = 'blackpink' khi không có kết quả, link gợi ý giữ bộ lọc và bỏ trang; không có gợi ý khi có kết quả.
+    """
+    response = client.get(reverse('product'), {'s': 'blakpink', 'max': '500000', 'sap_xep': 'giam', 'trang': '1'}, HTTP_HOST='testserver')
+    assert response.context['item_count'] == 0
+    assert response.context['goi_y'] == 'blackpink'
+    assert QueryDict(response.context['goi_y_query_string']).dict() == {'s': 'blackpink', 'max': '500000', 'sap_xep': 'giam'}
+
+    response = client.get(reverse('product'), {'s': 'bts'}, HTTP_HOST='testserver')
+    assert 'goi_y' not in response.context
+
+
+def test_bktree_lookup_is_sublinear():
+    """
+    Mục tiêu: Benchmark số lần tính khoảng cách khi tra BK-tree với từ vựng tăng dần.
+    Input: Từ vựng ngẫu nhiên 500 và 4000 từ, 30 từ cần tra, bán kính 1.
+    Expected Output: Kết quả giống quét tuần tự; số lần tính luôn ít hơn một nửa số từ và tỉ lệ
+                     số lần tính / số từ giảm khi từ vựng tăng 8 lần.
+    """
+    import random
+    import string
+    from search.bktree import BKTree, levenshtein
+
+    rng = random.Random(7)
+    def word():
+        return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+    words = list(dict.fromkeys(word() for _ in range(4000)))
+    queries = [word() for _ in range(30)]
+
+    costs = {}
+    for size in (500, 4000):
+        tree = BKTree()
+        for w in words[:size]:
+            tree.add(w)
+        total = 0
+        for q in queries:
+            matches = tree.search(q, 1)
+            total += tree.comparisons
+            assert matches == sorted((levenshtein(q, w), w) for w in words[:size] if levenshtein(q, w) <= 1)
+        costs[size] = total / len(queries)
+        assert costs[size] < size / 2
+    assert costs[4000] / 4000 < costs[500] / 500
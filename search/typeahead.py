@@ -0,0 +1,114 @@
+import threading
+from bisect import bisect_left, insort
+from django.db import transaction
+from django.urls import reverse
+from website.versions import get_version, bump_version
+from .index import tokenize
+
+# Chỉ mục tiền tố trong bộ nhớ cho ô gợi ý tìm kiếm (tên sản phẩm và chuyên mục).
+# Mỗi tên được lưu dưới dạng mảng khóa đã sắp xếp, một khóa cho mỗi vị trí bắt đầu của từ:
+# "album bts proof" -> "album bts proof", "bts proof", "proof", nên gõ "bts" hay "pro" đều khớp.
+# Tra cứu là bisect trên mảng, không truy vấn DB. Khi SanPham/ChuyenMuc thay đổi (sau khi commit), tiến trình
+# hiện tại cập nhật tăng dần và tăng số phiên bản để các tiến trình khác tự dựng lại.
+
+VERSION_NAME = 'typeahead'
+DEFAULT_LIMIT = 8
+KINDS = ('sanpham', 'chuyenmuc')
+
+
+def entry_keys(name):
+    words = tokenize(name)
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.keys = []
+        self.entries = {}
+        self.version = None
+        self.lock = threading.Lock()
+
+    def _add(self, kind, pk, entry):
+        self._remove(kind, pk)
+        order = KINDS.index(kind)
+        for key in entry_keys(entry['ten']):
+            insort(self.keys, (key, order, pk))
+        self.entries[(kind, pk)] = entry
+
+    def _remove(self, kind, pk):
+        entry = self.entries.pop((kind, pk), None)
+        if entry is None:
+            return
+        order = KINDS.index(kind)
+        for key in entry_keys(entry['ten']):
+            position = bisect_left(self.keys, (key, order, pk))
+            if position < len(self.keys) and self.keys[position] == (key, order, pk):
+                del self.keys[position]
+
+    def build(self):
+        from product.models import SanPham, ChuyenMuc
+        keys, entries = [], {}
+        for pk, ten, duongdan in SanPham.objects.values_list('id', 'TenSanPham', 'DuongDan').iterator():
+            entries[('sanpham', pk)] = product_entry(ten, duongdan)
+        for pk, ten, duongdan in ChuyenMuc.objects.values_list('id', 'TenChuyenMuc', 'DuongDan').iterator():
+            entries[('chuyenmuc', pk)] = category_entry(ten, duongdan)
+        for (kind, pk), entry in entries.items():
+            order = KINDS.index(kind)
+            keys.extend((key, order, pk) for key in entry_keys(entry['ten']))
+        keys.sort()
+        self.keys, self.entries = keys, entries
+
+    def ensure_current(self):
+        version = get_version(VERSION_NAME)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.build()
+                    self.version = version
+
+    def update(self, kind, pk, entry=None):
+        """Cập nhật một tên (entry=None khi xóa) sau khi transaction hiện tại commit, không áp dụng nếu rollback."""
+        transaction.on_commit(lambda: self.apply(kind, pk, entry))
+
+    def apply(self, kind, pk, entry=None):
+        with self.lock:
+            previous = self.version
+            if entry is None:
+                self._remove(kind, pk)
+            else:
+                self._add(kind, pk, entry)
+            # Chỉ giữ bản cục bộ khi không tiến trình nào tăng phiên bản xen giữa, nếu không để lần tra sau dựng lại
+            version = bump_version(VERSION_NAME)
+            if previous is not None and version == previous + 1:
+                self.version = version
+
+    def lookup(self, text, limit=DEFAULT_LIMIT):
+        prefix = ' '.join(tokenize(text))
+        if not prefix:
+            return []
+        self.ensure_current()
+        keys = self.keys
+        results, seen = [], set()
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys) and len(results) < limit:
+            key, order, pk = keys[position]
+            if not key.startswith(prefix):
+                break
+            if (order, pk) not in seen:
+                seen.add((order, pk))
+                entry = self.entries.get((KINDS[order], pk))
+                if entry is not None:
+                    results.append(entry)
+            position += 1
+        return results
+
+
+def product_entry(ten, duongdan):
+    return {'loai': 'sanpham', 'ten': ten, 'duongdan': reverse('detail_product', kwargs={'slug': duongdan}) if duongdan else ''}
+
+
+def category_entry(ten, duongdan):
+    return {'loai': 'chuyenmuc', 'ten': ten, 'duongdan': reverse('detail_category', kwargs={'slug': duongdan}) if duongdan else ''}
+
+
+index = PrefixIndex()
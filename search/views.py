@@ -0,0 +1,12 @@
+from django.http import JsonResponse
+from . import typeahead
+
+# Create your views here.
+
+def Autocomplete(request):
+    tukhoa = request.GET.get('q', '')
+    try:
+        limit = min(int(request.GET.get('limit', typeahead.DEFAULT_LIMIT)), 20)
+    except ValueError:
+        limit = typeahead.DEFAULT_LIMIT
+    return JsonResponse({"goiy": typeahead.index.lookup(tukhoa, limit)})
@@ -1,5 +1,16 @@
 from django.contrib import admin
 from .models import *
+from .text import fold_text
+
+
+class FoldedSearchMixin:
+    # search_fields trỏ vào các cột không dấu nên từ khóa cũng phải được bỏ dấu trước khi tìm.
+    # Cột không dấu khai báo dạng '^Cot' (tìm theo đầu chuỗi, LIKE 'tu khoa%') để dùng được index của cột;
+    # cả từ khóa được đặt trong ngoặc kép để admin không tách thành từng từ (mỗi từ phải là đầu chuỗi).
+    def get_search_results(self, request, queryset, search_term):
+        search_term = ' '.join(fold_text(search_term).replace('"', ' ').split())
+        return super().get_search_results(request, queryset, '"%s"' % search_term if search_term else '')
+
 
 admin.site.register(Slide)
 admin.site.register(BannerTop)
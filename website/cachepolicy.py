@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from .pagecache import url_name
+
+# Header Cache-Control theo tên URL, khai báo trong settings.CACHE_POLICIES, để trình duyệt và
+# proxy/CDN phía trước giữ các trang đọc nhiều. Mỗi policy gồm:
+#   max_age, s_maxage, stale_while_revalidate (giây), private (chỉ trình duyệt của người xem được cache),
+#   vary_cookie (giữ Vary: Cookie - chỉ bật cho trang phụ thuộc session).
+# Khóa 'media' áp cho file trong MEDIA_URL. View đã tự đặt Cache-Control (ví dụ never_cache) thì giữ nguyên.
+
+MEDIA = 'media'
+POLICY_KEYS = ('max_age', 's_maxage', 'stale_while_revalidate', 'private', 'vary_cookie')
+
+
+def policies():
+    return getattr(settings, 'CACHE_POLICIES', {})
+
+
+def policy_for(request):
+    if request.path.startswith(settings.MEDIA_URL):
+        return policies().get(MEDIA)
+    match = getattr(request, 'resolver_match', None)
+    return policies().get(match.url_name if match is not None else url_name(request))
+
+
+def remove_vary_cookie(response):
+    if response.has_header('Vary'):
+        vary = [value.strip() for value in response['Vary'].split(',') if value.strip().lower() != 'cookie']
+        if vary:
+            response['Vary'] = ', '.join(vary)
+        else:
+            del response['Vary']
+
+
+def apply_policy(response, policy):
+    if response.has_header('Cache-Control') or response.status_code not in (200, 304):
+        return
+    # Phản hồi đặt cookie (session, csrftoken...) là của riêng người xem, không cho proxy giữ
+    private = policy.get('private', False) or bool(response.cookies)
+    if private:
+        patch_cache_control(response, private=True, max_age=policy.get('max_age', 0))
+    else:
+        directives = {name: policy[name] for name in ('max_age', 's_maxage', 'stale_while_revalidate') if name in policy}
+        patch_cache_control(response, public=True, **directives)
+        if not policy.get('vary_cookie', False):
+            remove_vary_cookie(response)
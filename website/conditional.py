@@ -0,0 +1,36 @@
+import hashlib
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from .pagecache import COMMON_TAGS, version_names
+from .versions import get_versions
+
+# GET có điều kiện (If-None-Match) cho các trang chi tiết và chuyên mục.
+# ETag gồm updated_at lớn nhất của các đối tượng trên trang, URL đầy đủ và phiên bản các model còn lại
+# trên trang (chuyên mục, thông tin ở base.html...), nên trình duyệt/crawler nhận 304 mà server không phải
+# render template khi không có gì đổi. Không gửi Last-Modified: các tag chỉ có số phiên bản, không có thời điểm
+# thay đổi, nên If-Modified-Since sẽ trả 304 cho trang đã đổi chuyên mục, màu, sản phẩm mua kèm...
+
+
+def conditional_get(last_modified_func, tags=()):
+    """
+    Decorator cho class view (áp vào get). last_modified_func(request, *args, **kwargs) trả về
+    datetime hoặc None (không có đối tượng: không gửi ETag, view render như bình thường).
+    tags: các model (app_label.model) mà trang hiển thị nhưng không nằm trong last_modified_func.
+    """
+    tags = COMMON_TAGS + tuple(tags)
+
+    def last_modified(request, *args, **kwargs):
+        # Chỉ truy vấn một lần cho mỗi request
+        if not hasattr(request, '_last_modified'):
+            request._last_modified = last_modified_func(request, *args, **kwargs)
+        return request._last_modified
+
+    def etag(request, *args, **kwargs):
+        value = last_modified(request, *args, **kwargs)
+        if value is None:
+            return None
+        versions = get_versions(version_names(tags, request.GET))
+        raw = '%s|%s|%s' % (request.get_full_path(), value.timestamp(), [versions[name] for name in sorted(versions)])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    return method_decorator(condition(etag_func=etag), name='get')
@@ -0,0 +1,47 @@
+import threading
+from .models import LoaiThongTin, ThongTin
+from .versions import get_versions, model_version_name
+
+# Cấu hình cửa hàng (ThongTin) theo MaLoai: phí ship, VAT, logo, tiêu đề web...
+# Cả bảng chỉ vài dòng và gần như không đổi, nên giữ trong bộ nhớ của tiến trình và chỉ đọc lại
+# khi phiên bản của ThongTin hoặc LoaiThongTin thay đổi (mỗi lần lưu/xóa, website/signals.py).
+
+VERSION_NAMES = [model_version_name(ThongTin), model_version_name(LoaiThongTin)]
+
+
+class ShopConfig:
+    def __init__(self):
+        self.values = {}
+        self.version = None
+        self.lock = threading.Lock()
+
+    def ensure_current(self):
+        versions = get_versions(VERSION_NAMES)
+        version = tuple(versions[name] for name in VERSION_NAMES)
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.values = {item.LoaiThongTin.MaLoai: item for item in ThongTin.objects.select_related('LoaiThongTin')}
+                    self.version = version
+        return self.values
+
+    def all(self):
+        """{MaLoai: ThongTin}, dùng trong template: {{ thongtin.tieudeweb.GiaTri }}."""
+        return self.ensure_current()
+
+    def get(self, ma_loai):
+        """ThongTin theo MaLoai, raise ThongTin.DoesNotExist khi chưa cấu hình (như .get() trước đây)."""
+        try:
+            return self.ensure_current()[ma_loai]
+        except KeyError:
+            raise ThongTin.DoesNotExist('Chưa cấu hình thông tin "%s".' % ma_loai)
+
+    def value(self, ma_loai):
+        return self.get(ma_loai).GiaTri
+
+    def integer(self, ma_loai):
+        """GiaTri dạng số nguyên (phí ship, phần trăm VAT...), ValueError nếu không phải số."""
+        return int(self.value(ma_loai))
+
+
+config = ShopConfig()
@@ -1,8 +1,7 @@
-from customer.models import KhachHang
 from product.models import ChuyenMuc
 from .models import *
-from cart.models import GioHang
-from django.contrib.auth.models import User
+from .config import config
+from cart.summary import cart_summary
 
 def category_context_processor(request):
     chuyenmuc_load = ChuyenMuc.objects.all()
@@ -13,23 +12,14 @@ def nhataitro_context_processor(request):
     return {'nhataitro_load': nhataitro_load}
 
 def thongtin_context_processor(request):
-    thongtin_load = ThongTin.objects.all()
-    return {'thongtin_load': thongtin_load}
+    # {MaLoai: ThongTin} giữ trong bộ nhớ (website/config.py), template dùng {{ thongtin.logo.HinhAnh.url }}
+    return {'thongtin': config.all()}
 
 def giohang_context_processor(request):
+    # Đọc tóm tắt đã cache (cart/summary.py), không truy vấn giỏ hàng khi cache còn
     if request.user.is_authenticated and request.user.is_superuser == False:
-        user = User.objects.all().get(id=request.user.id)
-        khachhang = KhachHang.objects.all().get(User=user)
-        giohang_load = GioHang.objects.all().filter(KhachHang=khachhang)
-        
-        total_price = 0
-        count_product = 0
-        
-        for item in giohang_load:
-            total_price += item.SoLuong * item.GiaBan
-            count_product = count_product + 1
-        
-        return {'giohang_load': giohang_load, "total_price": total_price, "count_product": count_product}
+        summary = cart_summary(request.user.id)
+        return {'giohang_load': summary['lines'], "total_price": summary['total'], "count_product": summary['count']}
     else:
         return {'giohang_load': None}
 
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from website.pagecache import stats
+
+
+class Command(BaseCommand):
+    help = 'In số lần trúng/trượt cache cả trang và số lần trả bản dự phòng theo từng trang (chỉ đúng khi cache dùng chung giữa các tiến trình).'
+
+    def handle(self, *args, **options):
+        self.stdout.write('%-20s %10s %10s %10s %10s %8s' % ('Trang', 'Hit', 'Miss', 'Stale', 'Lỗi CSDL', 'Tỉ lệ'))
+        for name, counts in stats().items():
+            total = counts['hit'] + counts['miss']
+            ratio = '%.1f%%' % (counts['hit'] * 100 / total) if total else '-'
+            self.stdout.write('%-20s %10d %10d %10d %10d %8s' % (name, counts['hit'], counts['miss'], counts['stale'], counts['outage'], ratio))
@@ -1,4 +1,10 @@
+from django.db import DatabaseError, connection
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import parse_http_date_safe
+from customer.models import KhachHang
+from . import cachepolicy, pagecache
 
 class AuthMiddleware:
     def __init__(self, get_response):
@@ -29,3 +35,119 @@ class AuthMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+def get_khachhang(request):
+    """
+    KhachHang của người đang đăng nhập (kèm User, một truy vấn), chỉ tìm một lần cho mỗi request.
+    Chưa đăng nhập hoặc tài khoản không có KhachHang thì raise KhachHang.DoesNotExist như .get() trước đây.
+    """
+    if not hasattr(request, '_cached_khachhang'):
+        request._cached_khachhang = None
+        user = request.user
+        if user.is_authenticated:
+            request._cached_khachhang = KhachHang.objects.select_related('User').filter(User_id=user.pk).first()
+    if request._cached_khachhang is None:
+        raise KhachHang.DoesNotExist('Người dùng chưa đăng nhập hoặc không có thông tin khách hàng.')
+    return request._cached_khachhang
+
+
+class KhachHangMiddleware:
+    """Gắn request.khachhang, chỉ truy vấn khi view dùng tới (đặt sau AuthenticationMiddleware)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.khachhang = SimpleLazyObject(lambda: get_khachhang(request))
+        return self.get_response(request)
+
+
+class PageCacheMiddleware:
+    """
+    Trả trang đã cache dùng chung cho mọi người xem, kèm bản dự phòng khi làm mới/CSDL lỗi (xem website/pagecache.py).
+    Đặt trước SessionMiddleware/AuthenticationMiddleware: lỗi CSDL khi nạp session cũng được tính là CSDL lỗi.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        name = pagecache.url_name(request) if pagecache.is_cacheable(request) else None
+        if name not in pagecache.PAGE_TAGS:
+            return self.get_response(request)
+
+        # View chỉ thấy các tham số có trong khóa, để trang lưu lại đúng với mọi URL cùng khóa
+        request.GET = pagecache.normalized_params(request.GET)
+        key = pagecache.page_key(request, name, request.GET)
+        response = pagecache.cached_response(key)
+        if response is not None:
+            return self.serve(request, name, response, 'hit')
+
+        if name not in pagecache.RESILIENT_PAGES:
+            pagecache.record(name, 'miss')
+            response = self.get_response(request)
+            if pagecache.store(key, response):
+                response['X-Page-Cache'] = 'MISS'
+            return response
+
+        last_good_key = pagecache.last_good_key(request, name, request.GET)
+        stale = pagecache.last_good_response(last_good_key)
+        if stale is not None and pagecache.database_down():
+            return self.serve(request, name, stale, 'outage')
+        refreshing = pagecache.acquire_refresh(key)
+        if not refreshing and stale is not None:
+            return self.serve(request, name, stale, 'stale')
+        try:
+            pagecache.record(name, 'miss')
+            response, failed = self.render(request, stale is not None)
+        finally:
+            if refreshing:
+                pagecache.release_refresh(key)
+
+        if failed:
+            pagecache.mark_database_down()
+            if stale is not None:
+                return self.serve(request, name, stale, 'outage')
+        elif pagecache.store(key, response, last_good_key):
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    def render(self, request, has_stale):
+        """Chạy view, trả về (response, CSDL có lỗi không). Không kết nối được mà đã có bản cũ thì không gọi view."""
+        recorder = pagecache.DatabaseErrorRecorder()
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            if has_stale:
+                return None, True
+            recorder.failed = True
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return response, recorder.failed
+
+    def serve(self, request, name, response, result):
+        pagecache.record(name, result)
+        # Trang cache có validator của view thì vẫn trả 304 như khi view chạy
+        response = get_conditional_response(request, etag=response.get('ETag'),
+                                            last_modified=parse_http_date_safe(response.get('Last-Modified', '')), response=response)
+        response['X-Page-Cache'] = 'HIT' if result == 'hit' else 'STALE'
+        return response
+
+
+class CachePolicyMiddleware:
+    """
+    Đặt Cache-Control theo settings.CACHE_POLICIES (xem website/cachepolicy.py).
+    Đặt ngay sau SecurityMiddleware để chạy sau cùng khi trả về, sau khi SessionMiddleware đã thêm Vary: Cookie.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method in ('GET', 'HEAD'):
+            policy = cachepolicy.policy_for(request)
+            if policy is not None:
+                cachepolicy.apply_policy(response, policy)
+        return response
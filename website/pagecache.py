@@ -0,0 +1,178 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import InterfaceError, OperationalError
+from django.http import HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+from product.models import SanPhamHienThi
+from .versions import get_versions
+
+# Cache cả trang (GET) ở các trang xem nhiều: trang chủ, danh sách sản phẩm,
+# chuyên mục, tin tức. Khóa gồm đường dẫn, query đã chuẩn hóa (chỉ giữ tham số view thực sự đọc)
+# và phiên bản của các "tag" - mỗi tag là một model, phiên bản tăng khi model đó được ghi
+# (website/signals.py), nên sửa sản phẩm/tin tức/banner/thông tin là trang cũ tự hết hạn.
+# Trang không chứa gì riêng của người xem: tài khoản, giỏ hàng mini và csrf token được base.html
+# nạp sau qua view PersonalFragments, nên người đã đăng nhập cũng dùng chung trang cache.
+#
+# Các trang trong RESILIENT_PAGES còn được giữ bản render tốt gần nhất trong cache cục bộ của tiến trình
+# (không kèm phiên bản, không mất khi dữ liệu đổi hay khi cache dùng chung lỗi):
+# - Trang hết hạn: một request giữ khóa làm mới và render lại, các request cùng lúc nhận bản cũ (stale).
+# - CSDL lỗi (không kết nối được hoặc truy vấn lỗi): nhận bản cũ, và trong OUTAGE_SECONDS giây sau đó
+#   nhận bản cũ luôn mà không gọi tới CSDL.
+
+PAGE_TIMEOUT = 60 * 10
+
+# Tham số query ảnh hưởng tới nội dung trang, tham số khác (utm_...) bị bỏ khỏi khóa và request
+PAGE_PARAMS = ('trang', 'sau', 'sap_xep', 's', 'min', 'max', 'mau', 'ket_hop')
+
+# Tag dùng chung: dữ liệu của base.html (context processors)
+COMMON_TAGS = ('product.chuyenmuc', 'website.nhataitro', 'website.thongtin', 'website.loaithongtin')
+
+# Trang có bản dự phòng khi cần làm mới hoặc khi CSDL lỗi
+RESILIENT_PAGES = ('home', 'product', 'detail_category', 'detail_product')
+LAST_GOOD_TIMEOUT = 60 * 60 * 24
+REFRESH_LOCK_TIMEOUT = 30
+OUTAGE_SECONDS = 30
+
+# Header ETag/Last-Modified do view đặt (website/conditional.py) được lưu cùng trang
+VALIDATORS = ('ETag', 'Last-Modified')
+
+# Tên URL được cache -> các model mà trang đó hiển thị
+PAGE_TAGS = {
+    'home': ('product.sanpham', 'product.sanphamhienthi', 'order.thongkebanchay', 'news.tintuc',
+             'website.slide', 'website.bannertop', 'website.bannermid', 'website.bannerbottom'),
+    'product': ('product.sanpham', 'product.sanphamhienthi', 'product.mausac', 'order.thongkebanchay'),
+    'detail_category': ('product.sanpham', 'product.sanphamhienthi', 'product.mausac'),
+    'list_news': ('news.tintuc', 'website.bannermid'),
+    'detail_product': ('product.sanpham', 'product.sanphamhienthi', 'product.mausac', 'order.dongmua'),
+}
+
+RESULTS = ('hit', 'miss', 'stale', 'outage')
+
+# Số lượng bán có phiên bản riêng (SanPhamHienThi.PHIEN_BAN_BAN_CHAY), chỉ trang sắp xếp theo bán chạy đọc
+SALES_SORT = 'banchay'
+
+
+def url_name(request):
+    try:
+        return resolve(request.path_info).url_name
+    except Resolver404:
+        return None
+
+
+def normalized_params(params):
+    normalized = QueryDict(mutable=True)
+    for name in PAGE_PARAMS:
+        values = sorted(params.getlist(name))
+        if values:
+            normalized.setlist(name, values)
+    return normalized
+
+
+def page_id(request, params):
+    return hashlib.md5(('%s?%s' % (request.path, params.urlencode())).encode()).hexdigest()
+
+
+def version_names(tags, params):
+    """Tên phiên bản của các tag, thêm phiên bản bán chạy khi params sắp xếp theo bán chạy."""
+    names = ['model:' + tag for tag in tags]
+    if params.get('sap_xep', '').lower() == SALES_SORT:
+        names.append(SanPhamHienThi.PHIEN_BAN_BAN_CHAY)
+    return names
+
+
+def page_key(request, name, params):
+    tags = COMMON_TAGS + PAGE_TAGS[name]
+    versions = get_versions(version_names(tags, params))
+    raw = '%s|%s' % (page_id(request, params), [versions[tag] for tag in sorted(versions)])
+    return 'page:%s:%s' % (name, hashlib.md5(raw.encode()).hexdigest())
+
+
+def is_cacheable(request):
+    return getattr(settings, 'PAGE_CACHE_ENABLED', True) and request.method == 'GET'
+
+
+def record(name, result):
+    key = 'pagecache_stats:%s:%s' % (name, result)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def stats():
+    """{tên URL: {'hit': n, 'miss': n, 'stale': n, 'outage': n}} tính từ lần xóa cache gần nhất."""
+    keys = ['pagecache_stats:%s:%s' % (name, result) for name in PAGE_TAGS for result in RESULTS]
+    values = cache.get_many(keys)
+    return {name: {result: values.get('pagecache_stats:%s:%s' % (name, result), 0) for result in RESULTS}
+            for name in PAGE_TAGS}
+
+
+def store(key, response, last_good_key=None):
+    # Không lưu trang lỗi, trang có Set-Cookie (ví dụ csrftoken/session mới) hoặc phản hồi streaming
+    if response.status_code != 200 or response.cookies or response.streaming:
+        return False
+    validators = {name: response[name] for name in VALIDATORS if response.has_header(name)}
+    page = (response.content, response['Content-Type'], validators)
+    cache.set(key, page, getattr(settings, 'PAGE_CACHE_TIMEOUT', PAGE_TIMEOUT))
+    if last_good_key is not None:
+        fallback_cache().set(last_good_key, page, LAST_GOOD_TIMEOUT)
+    return True
+
+
+def cached_response(key):
+    return _response(cache.get(key))
+
+
+def _response(page):
+    if page is None:
+        return None
+    content, content_type, validators = page
+    response = HttpResponse(content, content_type=content_type)
+    for name, value in validators.items():
+        response[name] = value
+    return response
+
+
+def fallback_cache():
+    return caches[getattr(settings, 'PAGE_FALLBACK_CACHE', 'fallback')]
+
+
+def last_good_key(request, name, params):
+    return 'trang_tot:%s:%s' % (name, page_id(request, params))
+
+
+def last_good_response(key):
+    return _response(fallback_cache().get(key))
+
+
+def acquire_refresh(key):
+    """Chỉ một request được làm mới trang hết hạn, trả về False nếu đã có request khác đang làm."""
+    return cache.add('lam_moi:' + key, 1, REFRESH_LOCK_TIMEOUT)
+
+
+def release_refresh(key):
+    cache.delete('lam_moi:' + key)
+
+
+def database_down():
+    return fallback_cache().get('csdl_loi') is not None
+
+
+def mark_database_down():
+    fallback_cache().set('csdl_loi', 1, getattr(settings, 'PAGE_OUTAGE_SECONDS', OUTAGE_SECONDS))
+
+
+class DatabaseErrorRecorder:
+    """execute_wrapper ghi nhận lỗi kết nối/truy vấn CSDL mà view đã nuốt bằng except."""
+
+    def __init__(self):
+        self.failed = False
+
+    def __call__(self, execute, sql, params, many, context):
+        try:
+            return execute(sql, params, many, context)
+        except (OperationalError, InterfaceError):
+            self.failed = True
+            raise
@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Q
+from .versions import get_model_version
+
+# Phân trang theo con trỏ (keyset/seek): thay vì OFFSET, trang sau được lấy bằng
+# điều kiện "sau dòng cuối của trang trước" theo đúng thứ tự sắp xếp đang dùng,
+# nên trang sâu tốn chi phí như trang 1. Tổng số dòng chỉ dùng cho thanh số trang
+# và được cache theo phiên bản của model.
+
+COUNT_TIMEOUT = 60 * 10
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values, number, direction):
+    data = json.dumps({'v': values, 'p': number, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padding = '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(token + padding))
+        values, number, direction = data['v'], int(data['p']), data['d']
+    except Exception:
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev') or not isinstance(values, list) or number <= 0:
+        raise InvalidCursor(token)
+    return values, number, direction
+
+
+def cached_count(queryset, timeout=COUNT_TIMEOUT):
+    """COUNT(*) được cache theo câu SQL và phiên bản model, chỉ chạy lại khi dữ liệu đổi."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        # Ví dụ id__in=[]: chắc chắn không có dòng nào
+        return 0
+    key = 'count:%s:%s' % (hashlib.md5(sql.encode()).hexdigest(), get_model_version(queryset.model))
+    item_count = cache.get(key)
+    if item_count is None:
+        item_count = queryset.count()
+        cache.set(key, item_count, timeout)
+    return item_count
+
+
+def _seek_filter(ordering, values, reverse=False):
+    # (a, b, id) > (x, y, z) viết thành: a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+    q = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-') != reverse
+        lookup = name + ('__lt' if descending else '__gt')
+        q |= Q(**equal, **{lookup: value})
+        equal[name] = value
+    return q
+
+
+def _reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+
+def _key_values(item, ordering):
+    return [getattr(item, field.lstrip('-')) for field in ordering]
+
+
+class KeysetPage:
+    def __init__(self, items, number, per_page, item_count, next_token=None, previous_token=None):
+        self.items = items
+        self.number = number
+        self.item_count = item_count
+        self.page_count = item_count // per_page + (1 if item_count % per_page > 0 else 0)
+        self.pre_page = 1 if number == 1 else number - 1
+        self.next_page = self.page_count if number >= self.page_count else number + 1
+        self.next_token = next_token
+        self.previous_token = previous_token
+
+    def is_valid(self):
+        return self.number == 1 or 1 <= self.number <= self.page_count
+
+    def context(self, items_name):
+        number_page = [i for i in range(1, self.page_count + 1)]
+        return {
+            items_name: self.items,
+            "item_count": self.item_count,
+            "page_count": number_page,
+            "page": self.number,
+            "pre_page": self.pre_page,
+            "next_page": self.next_page,
+            "next_token": self.next_token,
+            "previous_token": self.previous_token,
+            "len_page_count": len(number_page),
+        }
+
+
+def paginate(queryset, ordering, per_page, number=1, token=None):
+    """
+    ordering phải kết thúc bằng một cột duy nhất (id) để thứ tự ổn định.
+    - token (tham số 'sau'): lấy trang kế tiếp/trước bằng seek, không dùng OFFSET.
+    - number (tham số 'trang'): nhảy thẳng tới một trang, dùng OFFSET như trước.
+    """
+    ordering = list(ordering)
+    item_count = cached_count(queryset)
+
+    if token:
+        values, number, direction = decode_cursor(token)
+        if len(values) != len(ordering):
+            raise InvalidCursor(token)
+        if direction == 'next':
+            rows = list(queryset.filter(_seek_filter(ordering, values)).order_by(*ordering)[:per_page + 1])
+            has_more = len(rows) > per_page
+            items = rows[:per_page]
+            has_next, has_previous = has_more, True
+        else:
+            rows = list(queryset.filter(_seek_filter(ordering, values, reverse=True)).order_by(*_reverse_ordering(ordering))[:per_page + 1])
+            has_more = len(rows) > per_page
+            items = rows[:per_page][::-1]
+            has_next, has_previous = True, has_more
+    else:
+        start_index = (number - 1) * per_page
+        rows = list(queryset.order_by(*ordering)[start_index:start_index + per_page + 1]) if number > 0 else []
+        items = rows[:per_page]
+        has_next, has_previous = len(rows) > per_page, number > 1
+
+    next_token = previous_token = None
+    if items and has_next:
+        next_token = encode_cursor(_key_values(items[-1], ordering), number + 1, 'next')
+    if items and has_previous and number > 1:
+        previous_token = encode_cursor(_key_values(items[0], ordering), number - 1, 'prev')
+    return KeysetPage(items, number, per_page, item_count, next_token, previous_token)
+
+
+def page_query_string(params, drop=()):
+    """
+    Chuỗi query giữ nguyên bộ lọc hiện tại để nối thêm tham số trang vào link phân trang.
+    drop: các tham số bộ lọc cần bỏ thêm, ví dụ ('mau',) cho link chọn màu khác.
+    """
+    params = params.copy()
+    for name in ('trang', 'sau') + tuple(drop):
+        params.pop(name, None)
+    query_string = params.urlencode()
+    return query_string + '&' if query_string else ''
+
+
+def toggle_query_string(params, name, value):
+    """Chuỗi query (không có trang) sau khi bật/tắt một giá trị của tham số lặp lại, ví dụ chọn thêm/bỏ một màu."""
+    params = params.copy()
+    for drop in ('trang', 'sau'):
+        params.pop(drop, None)
+    values = params.getlist(name)
+    selected = [v for v in values if v.lower() != value.lower()]
+    if len(selected) == len(values):
+        selected.append(value)
+    params.setlist(name, selected)
+    return params.urlencode()
+
+
+def replace_query_string(params, name, value):
+    """Chuỗi query (không có trang) giữ nguyên bộ lọc, chỉ thay giá trị một tham số, ví dụ từ khóa gợi ý."""
+    params = params.copy()
+    for drop in ('trang', 'sau'):
+        params.pop(drop, None)
+    params[name] = value
+    return params.urlencode()
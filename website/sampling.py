@@ -0,0 +1,46 @@
+import hashlib
+import random
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from .versions import get_model_version
+
+# Lấy ngẫu nhiên k dòng mà không dùng ORDER BY RAND() (phải sắp xếp cả tập ứng viên mỗi lần xem).
+# Danh sách id ứng viên được cache theo câu SQL và phiên bản model, việc chọn ngẫu nhiên làm
+# trong Python, sau đó chỉ lấy k dòng theo khóa chính.
+# Dùng cho sản phẩm liên quan, banner và tin tức mới ở thanh bên.
+
+IDS_TIMEOUT = 60 * 10
+
+
+def cached_ids(queryset, timeout=IDS_TIMEOUT):
+    """Danh sách id của queryset (giữ nguyên thứ tự và slice), cache đến khi model thay đổi."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return []
+    key = 'ids:%s:%s' % (hashlib.md5(sql.encode()).hexdigest(), get_model_version(queryset.model))
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(queryset.values_list('pk', flat=True))
+        cache.set(key, ids, timeout)
+    return ids
+
+
+def random_ids(queryset, k, exclude=()):
+    ids = [pk for pk in cached_ids(queryset) if pk not in exclude]
+    return random.sample(ids, min(k, len(ids)))
+
+
+def random_sample(queryset, k, exclude=()):
+    """
+    Trả về list tối đa k đối tượng ngẫu nhiên của queryset, bỏ qua các id trong exclude.
+    Không đủ k dòng thì trả về tất cả (không lỗi như random.sample).
+    """
+    ids = random_ids(queryset, k, exclude)
+    if not ids:
+        return []
+    # Giữ .only()/select_related của queryset; queryset đã slice thì không filter được nữa
+    source = queryset.model._default_manager.all() if queryset.query.is_sliced else queryset
+    objects = source.in_bulk(ids)
+    # Đối tượng vừa bị xóa sau khi cache id thì bỏ qua
+    return [objects[pk] for pk in ids if pk in objects]
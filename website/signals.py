@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from .versions import bump_model_version
+
+# Model có phiên bản được đọc bởi cache (trang cache, số lượng, danh sách id, cấu hình...), tăng phiên bản
+# mỗi khi lưu/xóa. Chỉ nối signal với các model này: receiver post_delete không có sender làm mọi
+# QuerySet.delete() mất fast delete (nạp từng dòng và phát signal từng dòng).
+# Bảng dẫn xuất ghi theo lô (SanPhamHienThi, ThongKeBanChay, DongMua) tự tăng phiên bản nơi ghi.
+VERSIONED_MODELS = (
+    'product.SanPham', 'product.ChuyenMuc', 'product.MauSac',
+    'news.TinTuc',
+    'website.Slide', 'website.BannerTop', 'website.BannerMid', 'website.BannerBottom',
+    'website.NhaTaiTro', 'website.ThongTin', 'website.LoaiThongTin',
+)
+
+
+def bump_version_on_change(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def bump_version_on_m2m_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_model_version(instance.__class__)
+
+
+for label in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_change, sender=label, dispatch_uid='version_save:' + label)
+    post_delete.connect(bump_version_on_change, sender=label, dispatch_uid='version_delete:' + label)
+
+# SanPham.MauSac: sanpham.MauSac.add() (instance là SanPham) và mausac.SanPham.add() (instance là MauSac)
+m2m_changed.connect(bump_version_on_m2m_change, sender='product.SanPham_MauSac', dispatch_uid='version_m2m:product.SanPham_MauSac')
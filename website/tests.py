@@ -1,3 +1,458 @@
-from django.test import TestCase
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from django.utils.text import slugify
+
+from product.models import ChuyenMuc, SanPham
+from website import pagecache
+from website.models import LoaiThongTin, ThongTin
 
 # Create your tests here.
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+@pytest.fixture
+def sample_products():
+    chuyenmuc = ChuyenMuc.objects.create(TenChuyenMuc="Áo Kpop")
+    return [
+        SanPham.objects.create(TenSanPham=f"Áo Kpop {i}", GiaBan=100000 + i * 10000, GiaKhuyenMai=200000,
+                               MoTaNgan="Áo", MoTaDai="<p>Áo</p>", ChuyenMuc=chuyenmuc, DuongDan=slugify(f"Áo Kpop {i}"))
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_page_cache_serves_anonymous_pages(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra trang danh sách sản phẩm được cache cho khách chưa đăng nhập, khóa theo query đã chuẩn hóa.
+
+    Input:
+        - GET 'product' ?sap_xep=tang hai lần, rồi thêm tham số lạ utm_source và đảo thứ tự tham số.
+
+    Expected Output:
+        - Lần đầu MISS, các lần sau HIT với cùng nội dung
+        - Tham số lạ không đổi khóa và không xuất hiện trong link phân trang
+        - stats() đếm đúng số hit/miss
+    """
+    first = client.get(reverse('product'), {'sap_xep': 'tang'}, HTTP_HOST='localhost')
+    assert first['X-Page-Cache'] == 'MISS'
+    second = client.get(reverse('product'), {'sap_xep': 'tang'}, HTTP_HOST='localhost')
+    assert second['X-Page-Cache'] == 'HIT'
+    assert second.content == first.content
+
+    third = client.get(reverse('product') + '?utm_source=fb&sap_xep=tang', HTTP_HOST='localhost')
+    assert third['X-Page-Cache'] == 'HIT'
+    assert b'utm_source' not in third.content
+    assert pagecache.stats()['product'] == {'hit': 2, 'miss': 1, 'stale': 0, 'outage': 0}
+
+
+@pytest.mark.django_db
+def test_page_cache_invalidated_by_tags(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra trang đã cache hết hạn khi model gắn tag thay đổi.
+
+    Input:
+        - Cache trang 'product', sửa tên một sản phẩm; cache lại, sửa ThongTin (dữ liệu của base.html).
+
+    Expected Output:
+        - Sau mỗi thay đổi request kế tiếp là MISS và có dữ liệu mới
+    """
+    client.get(reverse('product'), HTTP_HOST='localhost')
+    sanpham = sample_products[0]
+    sanpham.TenSanPham = 'Áo Kpop Đổi Tên'
+    sanpham.save()
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert response['X-Page-Cache'] == 'MISS'
+    assert 'Áo Kpop Đổi Tên' in response.content.decode()
+
+    assert client.get(reverse('product'), HTTP_HOST='localhost')['X-Page-Cache'] == 'HIT'
+    ThongTin.objects.create(LoaiThongTin=LoaiThongTin.objects.create(MaLoai='hotline', TenLoai='Hotline'), GiaTri='0912345678')
+    assert client.get(reverse('product'), HTTP_HOST='localhost')['X-Page-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+def test_page_cache_shared_with_logged_in_users(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra người đã đăng nhập dùng chung trang cache, phần riêng lấy từ 'personal_fragments'.
+
+    Input:
+        - Khách chưa đăng nhập xem 'product', sau đó một khách hàng có 1 sản phẩm trong giỏ đăng nhập và xem lại.
+        - GET 'personal_fragments' với từng người.
+
+    Expected Output:
+        - Người đã đăng nhập nhận trang HIT giống hệt, trang không chứa link đăng xuất
+        - Phần riêng của người đã đăng nhập có link đăng xuất, số lượng giỏ hàng và csrf token
+        - Phần riêng không được cache (Cache-Control: no-cache)
+    """
+    from cart.models import GioHang
+    from customer.models import KhachHang
+    from product.models import MauSac
+
+    mausac = MauSac.objects.create(TenMauSac='Đen', MaMauSac='#000000')
+    anonymous = client.get(reverse('product'), HTTP_HOST='localhost')
+    fragments = client.get(reverse('personal_fragments'), HTTP_HOST='localhost').json()
+    assert 'ĐĂNG NHẬP' in fragments['taikhoan'] and fragments['csrf_token']
+
+    user = User.objects.create_user(username='khachhang', password='12345')
+    khachhang = KhachHang.objects.create(User=user)
+    GioHang.objects.create(KhachHang=khachhang, SanPham=sample_products[0], MauSac=mausac,
+                           SoLuong=2, GiaBan=sample_products[0].GiaBan)
+    client.force_login(user)
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert response['X-Page-Cache'] == 'HIT'
+    assert response.content == anonymous.content
+    assert 'ĐĂNG XUẤT' not in response.content.decode()
+
+    response = client.get(reverse('personal_fragments'), HTTP_HOST='localhost')
+    assert 'no-cache' in response['Cache-Control']
+    fragments = response.json()
+    assert 'ĐĂNG XUẤT' in fragments['taikhoan']
+    assert '<sup>1</sup>' in fragments['giohang'] and '200000 đ' in fragments['giohang']
+    assert 'Áo Kpop 0' in fragments['minicart'] and fragments['csrf_token']
+
+@pytest.mark.django_db
+def test_personal_fragments_read_cached_cart_summary(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra giỏ hàng mini đọc tóm tắt giỏ hàng đã cache và tóm tắt được làm mới khi GioHang đổi.
+
+    Input:
+        - Khách hàng có 1 sản phẩm trong giỏ, GET 'personal_fragments' hai lần.
+        - Thêm một sản phẩm vào giỏ rồi GET lại.
+
+    Expected Output:
+        - Lần thứ hai không truy vấn bảng giỏ hàng
+        - Sau khi thêm, số lượng và tổng tiền cập nhật ngay
+    """
+    from cart.models import GioHang
+    from customer.models import KhachHang
+
+    user = User.objects.create_user(username='khachhang', password='12345')
+    khachhang = KhachHang.objects.create(User=user)
+    GioHang.objects.create(KhachHang=khachhang, SanPham=sample_products[0], SoLuong=2)
+    client.force_login(user)
+    fragments = client.get(reverse('personal_fragments'), HTTP_HOST='localhost').json()
+    assert '<sup>1</sup>' in fragments['giohang'] and '200000 đ' in fragments['giohang']
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as queries:
+        fragments = client.get(reverse('personal_fragments'), HTTP_HOST='localhost').json()
+    assert not [query for query in queries.captured_queries if 'cart_giohang' in query['sql']]
+    assert 'Áo Kpop 0' in fragments['minicart']
+
+    GioHang.objects.create(KhachHang=khachhang, SanPham=sample_products[1], SoLuong=1)
+    fragments = client.get(reverse('personal_fragments'), HTTP_HOST='localhost').json()
+    assert '<sup>2</sup>' in fragments['giohang'] and '310000 đ' in fragments['giohang']
+    assert 'Áo Kpop 1' in fragments['minicart']
+    sample_products[1].delete()
+    fragments = client.get(reverse('personal_fragments'), HTTP_HOST='localhost').json()
+    assert '<sup>1</sup>' in fragments['giohang'] and '200000 đ' in fragments['giohang']
+    assert 'Áo Kpop 1' not in fragments['minicart']
+
+
+@pytest.mark.django_db
+def test_request_khachhang_resolved_once(client, django_assert_num_queries):
+    """
+    Mục tiêu của test:
+        - Kiểm tra request.khachhang chỉ truy vấn khi dùng tới, một lần cho mỗi request.
+
+    Input:
+        - Request chưa đăng nhập và request của khách hàng đã đăng nhập (RequestFactory + KhachHangMiddleware).
+
+    Expected Output:
+        - Chưa đăng nhập: dùng request.khachhang raise KhachHang.DoesNotExist
+        - Đã đăng nhập: một truy vấn (kèm User) cho nhiều lần truy cập
+    """
+    from django.contrib.auth.models import AnonymousUser
+    from django.contrib.sessions.backends.db import SessionStore
+    from customer.models import KhachHang
+    from website.middleware import KhachHangMiddleware
+
+    user = User.objects.create_user(username='khachhang', password='12345')
+    khachhang = KhachHang.objects.create(User=user)
+    middleware = KhachHangMiddleware(lambda request: request)
+
+    request = RequestFactory().get('/')
+    request.user, request.session = AnonymousUser(), SessionStore()
+    request = middleware(request)
+    with pytest.raises(KhachHang.DoesNotExist):
+        request.khachhang.pk
+
+    request = RequestFactory().get('/')
+    request.user, request.session = user, SessionStore()
+    request = middleware(request)
+    with django_assert_num_queries(1):
+        assert request.khachhang.pk == khachhang.pk
+        assert request.khachhang.User.username == 'khachhang'
+
+
+@pytest.mark.django_db
+def test_shop_config_cached_per_process(django_assert_num_queries):
+    """
+    Mục tiêu của test:
+        - Kiểm tra cấu hình ThongTin được giữ trong bộ nhớ theo MaLoai và đọc lại khi ThongTin/LoaiThongTin đổi.
+
+    Input:
+        - Cấu hình phiship = 30000, đọc nhiều lần; sửa GiaTri; xóa LoaiThongTin.
+
+    Expected Output:
+        - Sau lần đọc đầu không còn truy vấn CSDL
+        - Giá trị mới có ngay sau khi lưu, MaLoai đã xóa raise ThongTin.DoesNotExist
+    """
+    from website.config import config
+
+    loai = LoaiThongTin.objects.create(MaLoai='phiship', TenLoai='Phí ship')
+    thongtin = ThongTin.objects.create(LoaiThongTin=loai, GiaTri='30000')
+    assert config.integer('phiship') == 30000
+    with django_assert_num_queries(0):
+        assert config.value('phiship') == '30000'
+        assert config.all()['phiship'].LoaiThongTin.MaLoai == 'phiship'
+
+    thongtin.GiaTri = '35000'
+    thongtin.save()
+    assert config.integer('phiship') == 35000
+
+    loai.delete()
+    with pytest.raises(ThongTin.DoesNotExist):
+        config.value('phiship')
+
+
+
+@pytest.mark.django_db
+def test_version_signals_keep_fast_delete():
+    """
+    Mục tiêu của test:
+        - Kiểm tra signal phiên bản chỉ nối với model có phiên bản được đọc, bảng dẫn xuất và giỏ hàng vẫn fast delete.
+
+    Input:
+        - QuerySet của DongMua, ThongKeBanChay, SanPhamHienThi, ChiMucTimKiem, GioHang; lưu một SanPham.
+
+    Expected Output:
+        - Collector.can_fast_delete() đúng cho các queryset trên
+        - Lưu SanPham vẫn tăng phiên bản của SanPham
+    """
+    from django.db import connection
+    from django.db.models.deletion import Collector
+    from cart.models import GioHang
+    from order.models import DongMua, ThongKeBanChay
+    from product.models import SanPhamHienThi
+    from search.models import ChiMucTimKiem
+    from website.versions import get_model_version
+
+    for model in (DongMua, ThongKeBanChay, SanPhamHienThi, ChiMucTimKiem, GioHang):
+        assert Collector(using=connection.alias).can_fast_delete(model.objects.all()), model
+
+    chuyenmuc = ChuyenMuc.objects.create(TenChuyenMuc="Áo Kpop")
+    version = get_model_version(SanPham)
+    SanPham.objects.create(TenSanPham="Áo Kpop", GiaBan=100000, GiaKhuyenMai=200000, MoTaNgan="Áo", MoTaDai="<p>Áo</p>", ChuyenMuc=chuyenmuc)
+    assert get_model_version(SanPham) != version
+
+
+@pytest.mark.django_db(transaction=True)
+def test_version_bumped_after_commit():
+    """
+    Mục tiêu của test:
+        - Kiểm tra phiên bản chỉ tăng sau khi transaction ghi dữ liệu commit, không tăng khi rollback.
+
+    Input:
+        - Tạo ChuyenMuc trong transaction.atomic(), một lần commit và một lần rollback.
+
+    Expected Output:
+        - Trong transaction phiên bản chưa đổi (request khác không cache dữ liệu cũ dưới phiên bản mới)
+        - Sau commit phiên bản đổi; rollback thì giữ nguyên
+    """
+    from django.db import transaction
+    from website.versions import get_model_version
+
+    version = get_model_version(ChuyenMuc)
+    with transaction.atomic():
+        ChuyenMuc.objects.create(TenChuyenMuc="Áo Kpop")
+        assert get_model_version(ChuyenMuc) == version
+    assert get_model_version(ChuyenMuc) != version
+
+    version = get_model_version(ChuyenMuc)
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            ChuyenMuc.objects.create(TenChuyenMuc="Album Kpop")
+            raise RuntimeError
+    assert get_model_version(ChuyenMuc) == version
+
+
+@pytest.mark.django_db
+def test_customer_admin_search_by_name_prefix():
+    """
+    Mục tiêu của test:
+        - Kiểm tra admin khách hàng tìm được theo họ đệm và theo tên riêng (không dấu, đầu chuỗi).
+
+    Input:
+        - Khách hàng "Nguyễn Văn" "Ánh"; tìm 'nguyen van', 'ÁNH', 'van'; đổi last_name của User thành "Bình".
+
+    Expected Output:
+        - 'nguyen van' và 'ÁNH' tìm thấy, 'van' (giữa chuỗi) không; sau khi đổi tên tìm được 'binh'
+    """
+    from django.contrib import admin
+    from customer.models import KhachHang
+
+    user = User.objects.create_user(username='khachhang', password='12345', first_name='Nguyễn Văn', last_name='Ánh')
+    khachhang = KhachHang.objects.create(User=user)
+    model_admin = admin.site._registry[KhachHang]
+    request = RequestFactory().get('/')
+
+    def search(term):
+        queryset, _ = model_admin.get_search_results(request, KhachHang.objects.all(), term)
+        return list(queryset)
+
+    assert search('nguyen van') == [khachhang]
+    assert search('ÁNH') == [khachhang]
+    assert search('van') == []
+
+    user.last_name = 'Bình'
+    user.save()
+    assert search('binh') == [khachhang]
+
+
+def test_cache_policies_are_valid(settings):
+    """
+    Mục tiêu của test:
+        - Kiểm tra mọi khóa trong settings.CACHE_POLICIES là tên URL có thật (hoặc 'media') và chỉ dùng tham số hợp lệ.
+
+    Expected Output:
+        - reverse() được mọi tên URL, không có tham số lạ, trang công khai có s_maxage
+    """
+    from django.urls import get_resolver
+    from website import cachepolicy
+
+    names = {name for name in get_resolver().reverse_dict.keys() if isinstance(name, str)}
+    for name, policy in settings.CACHE_POLICIES.items():
+        assert name == cachepolicy.MEDIA or name in names, name
+        assert set(policy) <= set(cachepolicy.POLICY_KEYS), name
+        assert policy.get('private') or 's_maxage' in policy, name
+
+
+@pytest.mark.django_db
+def test_cache_policy_headers(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra Cache-Control được đặt theo tên URL và Vary: Cookie chỉ giữ ở trang phụ thuộc session.
+
+    Input:
+        - GET 'product' (lần đầu và lần lấy từ cache cả trang), 'detail_product', 'personal_fragments'.
+        - Khách hàng đăng nhập xem 'customer'.
+
+    Expected Output:
+        - 'product': public, max-age=60, s-maxage=300, stale-while-revalidate=600, không Vary: Cookie
+        - 'detail_product': public, max-age=0
+        - 'personal_fragments': giữ nguyên no-cache của view
+        - 'customer': private
+    """
+    from customer.models import KhachHang
+
+    for _ in range(2):
+        response = client.get(reverse('product'), HTTP_HOST='localhost')
+        directives = {value.strip() for value in response['Cache-Control'].split(',')}
+        assert directives == {'public', 'max-age=60', 's-maxage=300', 'stale-while-revalidate=600'}
+        assert 'cookie' not in response.get('Vary', '').lower()
+
+    response = client.get(reverse('detail_product', kwargs={'slug': sample_products[0].DuongDan}), HTTP_HOST='localhost')
+    assert 'public' in response['Cache-Control'] and 'max-age=0' in response['Cache-Control']
+
+    response = client.get(reverse('personal_fragments'), HTTP_HOST='localhost')
+    assert 'no-cache' in response['Cache-Control'] and 'public' not in response['Cache-Control']
+
+    user = User.objects.create_user(username='khachhang', password='12345')
+    KhachHang.objects.create(User=user)
+    client.force_login(user)
+    response = client.get(reverse('customer'), HTTP_HOST='localhost')
+    assert 'private' in response['Cache-Control']
+    assert 'Cookie' in response['Vary']
+
+
+@pytest.mark.django_db
+def test_page_cache_serves_stale_while_refreshing(client, sample_products):
+    """
+    Mục tiêu của test:
+        - Kiểm tra trang hết hạn được trả bản cũ khi một request khác đang làm mới.
+
+    Input:
+        - Cache trang 'product', đổi tên sản phẩm, giữ khóa làm mới (mô phỏng request khác đang render).
+        - Nhả khóa rồi xem lại.
+
+    Expected Output:
+        - Trong lúc khóa bị giữ: trả bản cũ (X-Page-Cache: STALE), stats() đếm stale
+        - Sau khi nhả khóa: render lại (MISS) với dữ liệu mới
+    """
+    client.get(reverse('product'), HTTP_HOST='localhost')
+    sanpham = sample_products[0]
+    sanpham.TenSanPham = 'Áo Kpop Đổi Tên'
+    sanpham.save()
+
+    request = RequestFactory().get(reverse('product'))
+    key = pagecache.page_key(request, 'product', pagecache.normalized_params(request.GET))
+    assert pagecache.acquire_refresh(key)
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert response['X-Page-Cache'] == 'STALE'
+    assert 'Áo Kpop Đổi Tên' not in response.content.decode()
+    assert pagecache.stats()['product']['stale'] == 1
+
+    pagecache.release_refresh(key)
+    response = client.get(reverse('product'), HTTP_HOST='localhost')
+    assert response['X-Page-Cache'] == 'MISS'
+    assert 'Áo Kpop Đổi Tên' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_page_cache_serves_last_good_page_when_database_fails(client, sample_products, monkeypatch):
+    """
+    Mục tiêu của test:
+        - Kiểm tra khi CSDL lỗi, trang chính trả bản render tốt gần nhất thay vì trang 404.
+
+    Input:
+        - Xem 'detail_product' và 'product', đổi dữ liệu để trang hết hạn.
+        - Mô phỏng CSDL lỗi: mọi truy vấn ném OperationalError; sau đó cả kết nối cũng lỗi.
+        - Khách chưa đăng nhập và khách đã đăng nhập (session lưu trong CSDL).
+
+    Expected Output:
+        - Trả bản cũ (STALE, status 200) cho cả hai khách và stats() đếm outage
+        - Trong PAGE_OUTAGE_SECONDS sau đó trang khác cũng trả bản cũ mà không gọi tới CSDL
+    """
+    from django.db import OperationalError, connection
+    from django.db.backends.utils import CursorWrapper
+
+    # Lỗi CSDL ngoài try của view (ví dụ lúc tính Last-Modified) thành trang 500 thay vì ném ra test
+    client = Client(raise_request_exception=False)
+    url = reverse('detail_product', kwargs={'slug': sample_products[0].DuongDan})
+    good = client.get(url, HTTP_HOST='localhost')
+    client.get(reverse('product'), HTTP_HOST='localhost')
+    sample_products[1].save()
+    logged_in = Client(raise_request_exception=False)
+    logged_in.force_login(User.objects.create_user(username='khachhang', password='12345'))
+
+    def broken(self, *args, **kwargs):
+        raise OperationalError('MySQL server has gone away')
+
+    monkeypatch.setattr(CursorWrapper, '_execute', broken)
+    response = client.get(url, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    assert response['X-Page-Cache'] == 'STALE'
+    assert response.content == good.content
+    assert pagecache.stats()['detail_product']['outage'] == 1
+    response = logged_in.get(url, HTTP_HOST='localhost')
+    assert response.status_code == 200
+    assert response['X-Page-Cache'] == 'STALE'
+
+    def refuse():
+        raise OperationalError("Can't connect to MySQL server")
+
+    monkeypatch.setattr(connection, 'ensure_connection', refuse)
+    assert client.get(reverse('product'), HTTP_HOST='localhost')['X-Page-Cache'] == 'STALE'
+    assert logged_in.get(reverse('product'), HTTP_HOST='localhost')['X-Page-Cache'] == 'STALE'
+    assert pagecache.stats()['product']['outage'] == 2
@@ -0,0 +1,12 @@
+import unicodedata
+
+# Bỏ dấu tiếng Việt và chuyển về chữ thường: "Áo BTS Đẹp" -> "ao bts dep".
+# Dùng cho các cột tìm kiếm không dấu và cho bộ tách từ của chỉ mục tìm kiếm.
+
+
+def fold_text(text):
+    if not text:
+        return ''
+    text = str(text).replace('đ', 'd').replace('Đ', 'D')
+    text = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in text if unicodedata.category(c) != 'Mn').lower()
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import Home
+from .views import Home, PersonalFragments
 
 urlpatterns = [
     path('', Home.as_view(), name='home'),
+    path('manh-trang/', PersonalFragments.as_view(), name='personal_fragments'),
 ]
@@ -0,0 +1,57 @@
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+# Số phiên bản theo tên (thường là model), tăng mỗi khi dữ liệu thay đổi.
+# Các khóa cache nối thêm số phiên bản nên tự hết hạn khi dữ liệu đổi.
+# Nơi ghi dữ liệu tăng phiên bản sau khi transaction commit (bump_version_on_commit): tăng trước đó thì
+# request khác thấy phiên bản mới nhưng vẫn đọc dòng cũ đã commit và cache chúng dưới khóa mới đến hết hạn,
+# còn khi rollback thì phiên bản tăng sai.
+
+
+def version_key(name):
+    return 'version:' + name
+
+
+def model_version_name(model):
+    return 'model:' + model._meta.label_lower
+
+
+def get_version(name):
+    key = version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Khóa bị xóa hoặc chưa có: dùng mốc thời gian để không trùng phiên bản cũ
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(names):
+    """Như get_version cho nhiều tên cùng lúc, một lần get_many."""
+    versions = cache.get_many([version_key(name) for name in names])
+    return {name: versions.get(version_key(name)) or get_version(name) for name in names}
+
+
+def bump_version(name):
+    key = version_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+def bump_version_on_commit(name):
+    """Tăng phiên bản khi transaction hiện tại commit, ngay lập tức nếu không ở trong transaction."""
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def get_model_version(model):
+    return get_version(model_version_name(model))
+
+
+def bump_model_version(model):
+    """Tăng phiên bản của model sau khi transaction hiện tại commit."""
+    bump_version_on_commit(model_version_name(model))
@@ -1,24 +1,49 @@
 from django.shortcuts import render, HttpResponse
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.cache import add_never_cache_headers
 from django.views import View
-from product.models import SanPham
+from product.models import SanPhamHienThi
+from product.catalog import cards
+from product.fragments import render_cards
 from .models import *
 from news.models import *
-from django.db.models import Count
 from order.models import *
+from .context_processors import giohang_context_processor
 # Create your views here.
 
 class Home(View):
     template_name = 'website/home.html'
     def get(self, request):
-        sanpham = SanPham.objects.all().filter(TrangThai=True).order_by('-id')[:12]
+        sanpham = render_cards(cards(SanPhamHienThi.objects.filter(TrangThai=True).order_by('-pk')[:12]), ('home',))
         slide = Slide.objects.all().filter(HienThi=True).order_by('-id')
         bannertop = BannerTop.objects.all().filter(HienThi=True).order_by('-id')[:3]
         bannermid = BannerMid.objects.all().filter(HienThi=True).order_by('-id')[:2]
         bannerbottom = BannerBottom.objects.all().filter(HienThi=True).order_by('-id')[:1]
         tintuc = TinTuc.objects.all().order_by('-id')[:10]
-        top_products = ChiTietDonHang.objects.values('SanPham_id', 'SanPham__TenSanPham', 'SanPham__GiaBan', 'SanPham__GiaKhuyenMai', 'SanPham__PhanTramGiam', 'SanPham__AnhChinh', 'SanPham__DuongDan') \
-        .annotate(count=Count('SanPham_id')) \
-        .order_by('-count')[:8]
+        top_products = ThongKeBanChay.top(8)
         data = {"top_products": top_products, "sanpham": sanpham, "slide": slide, "bannertop": bannertop, "bannermid": bannermid, "bannerbottom": bannerbottom, "tintuc": tintuc, "title": "Cửa Hàng KPOP Chất Lượng, Giá Rẻ!"}
         return render(request, self.template_name, data)
-    
\ No newline at end of file
+    
+
+
+# Phần riêng của từng người trên base.html. Trang được render với trạng thái chưa đăng nhập
+# (nên dùng chung được cache cả trang), sau đó JS thay các phần data-manh bằng kết quả từ đây.
+FRAGMENT_TEMPLATES = {
+    'taikhoan': 'website/fragments/taikhoan.html',
+    'giohang': 'website/fragments/giohang.html',
+    'minicart': 'website/fragments/minicart.html',
+    'minicart_cuoi': 'website/fragments/minicart_cuoi.html',
+}
+
+class PersonalFragments(View):
+    def get(self, request):
+        context = giohang_context_processor(request)
+        context['dang_nhap'] = request.user.is_authenticated
+        data = {name: render_to_string(template, context) for name, template in FRAGMENT_TEMPLATES.items()}
+        # Trang cache không chứa csrf token của người xem, lấy token ở đây (đồng thời đặt cookie csrftoken)
+        data['csrf_token'] = get_token(request)
+        response = JsonResponse(data)
+        add_never_cache_headers(response)
+        return response